@@ -4,7 +4,8 @@ boundary condition
 """
 
 import logging
-import math
+
+from lolFem.core.boundary_conditions.expression import Expression
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class BoundaryCondition(object):
             the value of the boundary condition as a function of
             space and time, (t,x,y,z). If the type of `value` is
             a float it will be interpreted as being a constant.
+            See `lolFem.core.boundary_conditions.expression.Expression`.
         dof_ids : list of ints
             Represents the dof ids the bc applies to.
         essential : bool
@@ -39,6 +41,8 @@ class BoundaryCondition(object):
         ======
         SetTypeError
             When applying a boundary condition to a set of the wrong type.
+        lolFem.core.boundary_conditions.expression.ExpressionError
+            When the value is not a valid expression.
 
         See also
         ========
@@ -46,12 +50,13 @@ class BoundaryCondition(object):
         lolFem.core.boundary_conditions.point_load.PointLoad
         """
 
-        # Some eval tricksing to create the function from the string.
-        # This is so we don't have to parse the string every time
-        # we want to evaluate the expression.
-        def f_value(op):
-            return eval("lambda t,x,y,z:" + str(op), math.__dict__)
-        self.f_value = f_value(value)
+        # The expression is compiled once here so we don't have to
+        # parse the string every time we want to evaluate it.
+        self.value = value
+        self.f_value = Expression(value)
+
+        # The last values computed by `give_values`.
+        self._values_cache = None
 
         self.dof_ids = dof_ids
         self.essential = essential
@@ -66,12 +71,46 @@ class BoundaryCondition(object):
         t : float
             Current time in analysis
         """
+        if self.f_value.constant is not None:
+            return self.f_value.constant
+
         x = node.give_coordinate(1)
         y = node.give_coordinate(2)
         z = node.give_coordinate(3)
 
         return self.f_value(t, x, y, z)
 
+    def give_values(self, t, coordinates):
+        """
+        Returns the values in many nodes at once.
+
+        The values from the last call are cached, so calling
+        this again with the same time and the same coordinate
+        array does not evaluate the expression again.
+
+        Parameters
+        ==========
+        t : float
+            Current time in analysis
+        coordinates : numpy.ndarray
+            n_nodes x n_dim array with the coordinates of the nodes.
+            Should not be modified between calls.
+
+        Returns
+        =======
+        numpy.ndarray
+            The values in the nodes. Should not be modified.
+        """
+        if self._values_cache is not None:
+            cached_t, cached_coordinates, values = self._values_cache
+            if cached_coordinates is coordinates and (
+                    cached_t == t or not self.f_value.depends_on_time):
+                return values
+
+        values = self.f_value.evaluate(t, coordinates)
+        self._values_cache = (t, coordinates, values)
+        return values
+
     def print_out(self, name):
         """
         Prints information about itself.
@@ -84,10 +123,9 @@ class BoundaryCondition(object):
         name : string
             The name of the inheriting boundary condition
         """
-        return "Boundary condition of type: {}, with n = {}, value = {}, dofids = {}".format(
+        return "Boundary condition of type: {}, with value = {}, dofids = {}".format(
             name,
-            self.n,
-            self._value,
+            self.value,
             self.dof_ids)
 
 
@@ -0,0 +1,287 @@
+"""
+File that contains the Expression class used to
+evaluate the values of boundary conditions.
+"""
+
+import ast
+import logging
+import math
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _minimum(*args):
+    return reduce(np.minimum, args)
+
+
+def _maximum(*args):
+    return reduce(np.maximum, args)
+
+
+def _log(x, base=None):
+    if base is None:
+        return np.log(x)
+    return np.log(x) / np.log(base)
+
+
+def _vectorize(function):
+    """
+    Vectorizes a function of scalars that has no numpy equivalent.
+    This loops in python, so it is slow for many points.
+    """
+    return np.vectorize(function, otypes=[np.float64])
+
+
+#: The functions and constants that can be used in an expression.
+#: These are the names from the math module, and a few builtins,
+#: mapped to their numpy equivalents so that an expression can
+#: be evaluated for arrays of coordinates. The math functions
+#: that have no numpy equivalent are vectorized with
+#: `numpy.vectorize`. The math functions frexp, modf and fsum,
+#: which return tuples or take sequences, are not supported.
+namespace = {"pi": np.pi,
+             "e": np.e,
+             "abs": np.abs,
+             "fabs": np.abs,
+             "min": _minimum,
+             "max": _maximum,
+             "round": _vectorize(round),
+             "acos": np.arccos,
+             "acosh": np.arccosh,
+             "asin": np.arcsin,
+             "asinh": np.arcsinh,
+             "atan": np.arctan,
+             "atan2": np.arctan2,
+             "atanh": np.arctanh,
+             "ceil": np.ceil,
+             "copysign": np.copysign,
+             "cos": np.cos,
+             "cosh": np.cosh,
+             "degrees": np.degrees,
+             "erf": _vectorize(math.erf),
+             "erfc": _vectorize(math.erfc),
+             "exp": np.exp,
+             "expm1": np.expm1,
+             "factorial": _vectorize(math.factorial),
+             "floor": np.floor,
+             "fmod": np.fmod,
+             "gamma": _vectorize(math.gamma),
+             "hypot": np.hypot,
+             "isinf": np.isinf,
+             "isnan": np.isnan,
+             "ldexp": np.ldexp,
+             "lgamma": _vectorize(math.lgamma),
+             "log": _log,
+             "log10": np.log10,
+             "log1p": np.log1p,
+             "pow": np.power,
+             "radians": np.radians,
+             "sin": np.sin,
+             "sinh": np.sinh,
+             "sqrt": np.sqrt,
+             "tan": np.tan,
+             "tanh": np.tanh,
+             "trunc": np.trunc,
+             "where": np.where,
+             "logical_and": np.logical_and,
+             "logical_or": np.logical_or,
+             "logical_not": np.logical_not}
+
+#: The variables of an expression.
+variables = ("t", "x", "y", "z")
+
+# The syntax allowed in an expression.
+_allowed_nodes = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp,
+                  ast.Compare, ast.IfExp, ast.Call, ast.Num, ast.Name,
+                  ast.Load, ast.operator, ast.unaryop, ast.boolop, ast.cmpop)
+
+
+class Expression(object):
+
+    """
+    A compiled expression of time and space, (t, x, y, z).
+
+    The expression is parsed and checked once and compiled to a
+    code object. It can then be evaluated for a single point or
+    for arrays of coordinates in one call. So that they work for
+    arrays too, conditional expressions, "a if c else b", are
+    evaluated with `numpy.where`, "and", "or" and "not" with
+    `numpy.logical_and`, `numpy.logical_or` and `numpy.logical_not`,
+    and chained comparisons, "a < b < c", as "a < b and b < c".
+    The logical operators therefore always give booleans.
+
+    An expression that does not depend on any variable is
+    evaluated once and is then treated as a constant.
+    """
+
+    def __init__(self, value):
+        """
+        Parameters
+        ==========
+        value : string or float
+            A python expression of the variables t, x, y and z
+            using the functions in `namespace`, or a constant.
+
+        Raises
+        ======
+        ExpressionError
+            If the expression has invalid syntax or uses
+            something that is not allowed.
+        """
+        self.value = value
+        self.names = frozenset()
+        self.constant = None
+        self.code = None
+
+        if isinstance(value, (int, long, float, np.number)):
+            self.constant = float(value)
+            return
+
+        try:
+            tree = ast.parse(str(value).strip(), mode="eval")
+        except SyntaxError as e:
+            raise ExpressionError(
+                "Invalid expression: {}, {}".format(value, e))
+
+        names = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, _allowed_nodes):
+                raise ExpressionError(
+                    "Invalid expression: {}, {} is not "
+                    "allowed".format(value, type(node).__name__))
+            if isinstance(node, ast.Call):
+                if (not isinstance(node.func, ast.Name) or node.keywords or
+                        node.starargs or node.kwargs):
+                    raise ExpressionError(
+                        "Invalid expression: {}, only calls with positional "
+                        "arguments to the functions in the namespace are "
+                        "allowed".format(value))
+            if isinstance(node, ast.Name):
+                if node.id not in namespace and node.id not in variables:
+                    raise ExpressionError(
+                        "Invalid expression: {}, unknown name "
+                        "{}".format(value, node.id))
+                names.add(node.id)
+
+        self.names = frozenset(names).intersection(variables)
+        tree = ast.fix_missing_locations(_ToArrayOperations().visit(tree))
+        self.code = compile(tree, "<expression>", "eval", dont_inherit=True)
+
+        if not self.names:
+            self.constant = float(self._eval(0.0, 0.0, 0.0, 0.0))
+            self.code = None
+
+    @property
+    def depends_on_time(self):
+        """
+        True if the expression depends on the time.
+        """
+        return "t" in self.names
+
+    @property
+    def depends_on_space(self):
+        """
+        True if the expression depends on the coordinates.
+        """
+        return bool(self.names.difference(("t",)))
+
+    def _eval(self, t, x, y, z):
+        return eval(self.code, {"__builtins__": {}},
+                    dict(namespace, t=t, x=x, y=y, z=z))
+
+    def __call__(self, t, x, y, z):
+        """
+        Evaluates the expression in a single point.
+
+        Returns
+        =======
+        float
+        """
+        if self.constant is not None:
+            return self.constant
+        return float(self._eval(t, x, y, z))
+
+    def evaluate(self, t, coordinates):
+        """
+        Evaluates the expression in many points.
+
+        Parameters
+        ==========
+        t : float
+            The time.
+        coordinates : numpy.ndarray
+            n_points x n_dim array with the coordinates, z is
+            taken as zero if there are only two columns.
+
+        Returns
+        =======
+        numpy.ndarray
+            The n_points values.
+        """
+        values = np.empty(len(coordinates), dtype=np.float64)
+        if self.constant is not None:
+            values.fill(self.constant)
+            return values
+
+        zero = np.zeros(len(coordinates), dtype=np.float64)
+        x, y, z = [coordinates[:, i] if i < coordinates.shape[1] else zero
+                   for i in range(3)]
+        values[:] = self._eval(t, x, y, z)
+        return values
+
+    def __str__(self):
+        return str(self.value)
+
+
+def _call(name, args, node):
+    """
+    Creates a call to a function in the namespace.
+    """
+    return ast.copy_location(
+        ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args,
+                 keywords=[], starargs=None, kwargs=None), node)
+
+
+class _ToArrayOperations(ast.NodeTransformer):
+
+    """
+    Rewrites the conditional expressions, the logical operators and the
+    chained comparisons to numpy functions that work for arrays.
+    """
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        return _call("where", [node.test, node.body, node.orelse], node)
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        name = "logical_and" if isinstance(node.op, ast.And) else "logical_or"
+        return reduce(lambda a, b: _call(name, [a, b], node), node.values)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return _call("logical_not", [node.operand], node)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        lefts = [node.left] + node.comparators[:-1]
+        compares = [ast.copy_location(ast.Compare(left=left, ops=[op],
+                                                  comparators=[right]), node)
+                    for left, op, right in zip(lefts, node.ops,
+                                               node.comparators)]
+        return reduce(lambda a, b: _call("logical_and", [a, b], node),
+                      compares)
+
+
+class ExpressionError(Exception):
+
+    """
+    Exception to raise when an expression can not be compiled.
+    """
+    pass
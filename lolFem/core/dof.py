@@ -5,6 +5,8 @@ dof
 
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 # Dof ids
@@ -74,3 +76,149 @@ class Dof(object):
             self.node.n,
             self.dof_type,
             self.dof_id)
+
+
+class DofTable(object):
+
+    """
+    Array backed storage of all the dofs in a domain.
+
+    Instead of every node holding a list of `Dof` objects the
+    properties of the dofs are stored in contiguous arrays where
+    the i:th entry of each array belongs to the dof with number
+    i + 1. The dofs are ordered by node and then by dof id.
+    """
+
+    def __init__(self, nodes, has_dof, prescribed):
+        """
+        Creates a dof table.
+
+        Parameters
+        ==========
+        nodes : list of `lolFem.core.node.Node`
+            The nodes in the mesh.
+        has_dof : numpy.ndarray
+            n_nodes x 3 boolean array, True at [i, j] if node i has
+            a dof with dof id j + 1.
+        prescribed : numpy.ndarray
+            n_nodes x 3 boolean array, True at [i, j] if dof id j + 1 of
+            node i has an essential boundary condition.
+        """
+        self.nodes = nodes
+
+        node_index, dof_col = np.nonzero(has_dof)
+        n_dofs = len(node_index)
+
+        #: Unique dof numbers
+        self.n = np.arange(1, n_dofs + 1, dtype=np.int64)
+        #: Index of the node in `nodes` that the dof belongs to
+        self.node_index = node_index.astype(np.int64)
+        #: Physical meaning of the dof, {D_u, D_v, D_w}
+        self.dof_id = (dof_col + 1).astype(np.int64)
+        #: Type of dof, {DT_master, DT_active}
+        self.dof_type = np.where(prescribed[node_index, dof_col],
+                                 DT_active, DT_master).astype(np.int64)
+        #: Equation numbers, see `Dof`
+        self.equation_number = np.zeros(n_dofs, dtype=np.int64)
+        #: Values of the dofs
+        self.value = np.zeros(n_dofs, dtype=np.float64)
+
+        #: n_nodes x 3 array with the index of the dof with dof id j + 1
+        #: of node i at [i, j], -1 if the node does not have that dof.
+        self.node_dofs = -np.ones(has_dof.shape, dtype=np.int64)
+        self.node_dofs[node_index, dof_col] = np.arange(n_dofs)
+
+    def __len__(self):
+        return len(self.n)
+
+    def give_dof_indices(self, node_indices, dof_ids=None):
+        """
+        Gives the indices of the dofs in a number of nodes.
+
+        Parameters
+        ==========
+        node_indices : numpy.ndarray
+            Array of node indices of any shape.
+        dof_ids : list of ints, optional
+            The dof ids to include, defaults to all
+            dof ids.
+
+        Returns
+        =======
+        numpy.ndarray
+            Array with the dof indices with an added last
+            dimension for the dof ids.
+        """
+        if dof_ids is None:
+            return self.node_dofs[node_indices]
+        return self.node_dofs[node_indices][..., np.asarray(dof_ids) - 1]
+
+    def give_node_dofs(self, node_index):
+        """
+        Gives views of the dofs in a node.
+
+        Parameters
+        ==========
+        node_index : int
+            The index of the node.
+
+        Returns
+        =======
+        list of `DofView`
+        """
+        return [DofView(self, i) for i in self.node_dofs[node_index] if i >= 0]
+
+
+class DofView(object):
+
+    """
+    A view of one dof in a `DofTable`.
+
+    Has the same attributes as a `Dof` but reads and writes them
+    in the arrays of the table.
+    """
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def n(self):
+        return int(self.table.n[self.index])
+
+    @property
+    def node(self):
+        return self.table.nodes[self.table.node_index[self.index]]
+
+    @property
+    def dof_id(self):
+        return int(self.table.dof_id[self.index])
+
+    @property
+    def dof_type(self):
+        return int(self.table.dof_type[self.index])
+
+    @property
+    def equation_number(self):
+        return int(self.table.equation_number[self.index])
+
+    @equation_number.setter
+    def equation_number(self, equation_number):
+        self.table.equation_number[self.index] = equation_number
+
+    @property
+    def value(self):
+        return self.table.value[self.index]
+
+    @value.setter
+    def value(self, value):
+        self.table.value[self.index] = value
+
+    def update(self):
+        pass
+
+    def __str__(self):
+        return "Dof for node {} of type {} with id {}.".format(
+            self.node.n,
+            self.dof_type,
+            self.dof_id)
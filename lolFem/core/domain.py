@@ -2,14 +2,21 @@
 File that contains the class definition of a domain
 """
 
-from collections import defaultdict, OrderedDict
+from collections import OrderedDict
 import logging
 
 import numpy as np
 from scipy import sparse
 
 from lolFem.core.boundary_conditions.point_load import PointLoad
-from lolFem.core.dof import Dof, DT_active, DT_master
+from lolFem.core.dof import DofTable, DT_active, DT_master, D_u, D_v
+from lolFem.core.element_block import create_element_blocks
+from lolFem.core.error_estimator import ErrorEstimator
+from lolFem.core.parallel_assembly import assemblers
+from lolFem.core.recovery import NodalRecovery, PatchRecovery
+from lolFem.core.renumbering import (compute_bandwidth_and_profile,
+                                     give_rcm_node_order)
+from lolFem.core.sparsity import SparsityPattern
 
 
 logger = logging.getLogger(__name__)
@@ -31,7 +38,10 @@ class Domain(object):
     def __init__(self,
                  mesh,
                  boundary_conditions=None,
-                 domain_type=None):
+                 domain_type=None,
+                 assembly="element",
+                 cache_geometry=False,
+                 renumbering=None):
         """
         Initiates a domain class.
 
@@ -44,11 +54,32 @@ class Domain(object):
             List of different boundary conditions.
         domain_type: {"plane_strain"}
             Type of domain, right now, only plane strain supported
+        assembly: {"element", "batched"}
+            How the global matrices are assembled. "element" loops
+            over the elements one by one, "batched" computes
+            the contributions from all elements of the same type
+            and section at once with stacked numpy arrays.
+        cache_geometry: bool
+            If True, the B-matrices and volumes of all gauss points
+            are computed once when the analysis starts and are
+            reused in every assembly. The cache needs to be
+            invalidated with `invalidate_geometry_cache` if the
+            coordinates of the nodes are changed.
+        renumbering: {None, "rcm"}
+            How the equations are numbered. With None they are
+            numbered in the order of the nodes in the mesh, with "rcm"
+            the nodes are ordered with the reverse Cuthill-McKee
+            algorithm to reduce the bandwidth and the profile of the
+            stiffness matrix, see `lolFem.core.renumbering`.
 
         Raises
         ======
         DomainTypeError
             If the domain type given is not supported.
+        AssemblyTypeError
+            If the assembly type given is not supported.
+        RenumberingError
+            If the renumbering given is not supported.
         """
 
         self.mesh = mesh
@@ -63,7 +94,45 @@ class Domain(object):
                 "Domain type: {} not supported").format(domain_type)
         self.domain_type = domain_type
 
-        self.dof_bc = None
+        if assembly not in ["element", "batched"]:
+            raise AssemblyTypeError(
+                "Assembly type: {} not supported".format(assembly))
+        self.assembly = assembly
+        self.element_blocks = None
+        self.sparsity_pattern = None
+        self.coupling_pattern = None
+        self.cache_geometry = cache_geometry
+        self.parallel_assembler = None
+
+        if renumbering not in [None, "rcm"]:
+            raise RenumberingError(
+                "Renumbering: {} not supported".format(renumbering))
+        self.renumbering = renumbering
+
+        self.bc_nodes = None
+        self.bc_coordinates = None
+        self.bc_dofs = None
+        self.bc_positions = None
+        self.bc_equation_numbers = None
+        self.dof_bc_index = None
+        self.load_bcs = None
+        self.essential_bcs = None
+        self.dof_table = None
+        self.internal_forces = None
+        self._node_index = None
+
+        #: The stress and the strain recovered in the nodes,
+        #: see `recover_fields_in_nodes`.
+        self.nodal_recovery = None
+        self.patch_recovery = None
+        self.nodal_stress = None
+        self.nodal_strain = None
+
+        #: Estimates the error of the solution, see `estimate_error`.
+        self.error_estimator = None
+        self._node_set_nodes = {}
+        self._unknowns = None
+        self._unknowns_time = None
         self.number_of_equations = 0
         self.number_of_prescribed_equations = 0
         self.model = None
@@ -75,85 +144,201 @@ class Domain(object):
         for element in self.mesh.elements.values():
             element.domain = self
 
-    def create_material_statuses(self):
+    def create_element_blocks(self):
         """
-        Loops over elements and calls their own
-        `create_material_statuses` methods.
+        Groups the elements into blocks of elements with the
+        same type and section, see
+        `lolFem.core.element_block.ElementBlock`.
         """
-        for element in self.mesh.elements.values():
-            element.create_material_statuses()
+        self.element_blocks = create_element_blocks(self.mesh)
 
-    def create_dofs(self):
+    def color_element_blocks(self):
         """
-        Creates the required dofs.
+        Colors the elements in all element blocks for parallel
+        assembly, see
+        `lolFem.core.element_block.ElementBlock.color_elements`.
+        """
+        for block in self.element_blocks:
+            block.color_elements()
 
-        Goes through all the elements and boundary conditions
-        and initiates the dofs for all the nodes. The dof type is
-        determined from what type of boundary condition is applied
-        to the dof.
-
-        This also sets a class variable "dof_bc". This is a list of
-        dictionaries, where each dictionary contain a mapping
-        between the id of the dof and the boundary condition applied
-        to it. If you for example want to see the boundary condition
-        for node 3, and dof it 2, you do dof_bc[3][2}. This will
-        return the boundary condition class instance active for
-        that dof
-        """
-
-        # Loop over elements, lookup what dof ids the element
-        # use, add this to a dictionary of such that node_dofs[node_number}
-        # returns a set of the dof ids for that node.
-        node_dofs = defaultdict(set)
-        for element_id in self.mesh.elements:
-            element = self.mesh.elements[element_id]
-            for vert in element.vertices:
-                node = self.mesh.nodes[vert]
-                # Check what type of dofs we have in the element for the
-                # current node
-                dof_ids = element.give_dof_mask()
-
-                # Add the dof types to the set at the position of the node
-                # number
-                [node_dofs[node.n].add(dof_id) for dof_id in dof_ids]
-
-        logger.debug("Created the following node, dof mapping: %s", node_dofs)
-
-        # Loop over the boundary conditions, and for each node the boundary
-        # condition is applied to we add the dof of the node the bc
-        # is applied to and store it.
-        self.dof_bc = defaultdict(dict)
-        for bc in self.boundary_conditions:
-            node_ids = bc.set_applied_to.give_node_ids()
+    def start_parallel_assembly(self, n_workers, parallel="processes"):
+        """
+        Starts assembling the stiffness matrix and the internal
+        forces with a pool of workers, see
+        `lolFem.core.parallel_assembly`.
+
+        The element blocks need to be colored with
+        `color_element_blocks` before the dofs are created.
 
-            for node_id in node_ids:
-                node = self.mesh.nodes[node_id]
-                node_number = node.n
+        Parameters
+        ==========
+        n_workers : int
+            The number of workers.
+        parallel : {"processes", "threads"}
+            If the workers are processes or threads.
 
-                for dof_id in bc.dof_ids:
-                    self.dof_bc[node_number].update({dof_id: bc})
+        Raises
+        ======
+        AssemblyTypeError
+            If the kind of workers given is not supported.
+        """
+        if parallel not in assemblers:
+            raise AssemblyTypeError(
+                "Parallel assembly: {} not supported".format(parallel))
+        self.stop_parallel_assembly()
+        self.parallel_assembler = assemblers[parallel](self, n_workers)
+        self.parallel_assembler.start()
+
+    def stop_parallel_assembly(self):
+        """
+        Stops the workers of the parallel assembly.
+        """
+        if self.parallel_assembler is not None:
+            self.parallel_assembler.stop()
+            self.parallel_assembler = None
 
-        logger.debug(
-            "Created the following node, dofid -> bc mapping: %s",
-            self.dof_bc)
+    def create_geometry_cache(self):
+        """
+        Computes and stores the B-matrices and volumes of all gauss
+        points in the element blocks.
+        """
+        coordinates = self.mesh.give_coordinates()
+        for block in self.element_blocks:
+            block.cache_geometry(coordinates)
+        logger.info("Created geometry cache using %d bytes.",
+                    self.give_geometry_cache_nbytes())
 
-        # This creates instances of the dof class and append
-        # them to the nodes. The type of dof is determined.
-        n = 1
-        for node in self.mesh.nodes.values():
-            for dof_id in node_dofs[node.n]:
+    def invalidate_geometry_cache(self):
+        """
+        Invalidates the geometry cache.
 
-                # Check if the dof id of that node has a bc attached to it
-                # and if that bc requires active dof
-                bc = self.dof_bc[node.n].get(dof_id, 0)
+        This needs to be called if the coordinates of the
+        nodes are changed. If the domain caches the geometry
+        it is recomputed with the new coordinates. The coordinates
+        the boundary conditions are evaluated in are updated too.
+        """
+        self.mesh.invalidate_arrays()
+        if self.bc_nodes is not None:
+            self._set_bc_coordinates()
+        for block in self.element_blocks:
+            block.clear_geometry_cache()
+        self.nodal_recovery = None
+        self.patch_recovery = None
+        self.error_estimator = None
+        if self.cache_geometry:
+            self.create_geometry_cache()
+
+    def give_geometry_cache_nbytes(self):
+        """
+        Gives the memory used by the geometry cache.
 
-                # Set the dof type according to what type of bc is acting
-                if bc and bc.essential:
-                    dof_type = DT_active
-                else:
-                    dof_type = DT_master
-                node.dofs.append(Dof(n, node, dof_type, dof_id))
-                n += 1
+        Returns
+        =======
+        int
+            The number of bytes.
+        """
+        return sum(block.give_geometry_cache_nbytes()
+                   for block in self.element_blocks)
+
+    def _give_coordinates(self):
+        """
+        Gives the coordinates of the nodes if they are needed,
+        that is, if the geometry is not cached.
+        """
+        if all(block.B is not None for block in self.element_blocks):
+            return None
+        return self.mesh.give_coordinates()
+
+    def create_material_statuses(self):
+        """
+        Creates the material state for all gauss points.
+
+        The state is stored in contiguous arrays per element block,
+        see `lolFem.core.element_block.ElementBlock.create_material_state`.
+        """
+        if self.element_blocks is None:
+            self.create_element_blocks()
+        for block in self.element_blocks:
+            block.create_material_state()
+
+    def create_dofs(self):
+        """
+        Creates the required dofs.
+
+        Goes through all the element blocks and boundary conditions
+        and initiates the dofs for all the nodes. The dof type is
+        determined from what type of boundary condition is applied
+        to the dof. The dofs are stored in a
+        `lolFem.core.dof.DofTable`, `self.dof_table`, and the nodes
+        get views into this table.
+
+        This also resolves the boundary conditions to index arrays.
+        For each boundary condition the indices and coordinates of
+        the nodes it is applied to are stored in "bc_nodes" and
+        "bc_coordinates" so the boundary condition can be evaluated
+        for all its nodes at once. The dofs the boundary condition is
+        active for are stored in "bc_dofs" and the positions of their
+        nodes in the node set in "bc_positions". A boundary condition
+        that is given later overrides an earlier one on the same dof.
+        The array "dof_bc_index" gives the index of the boundary
+        condition active for each dof, or -1 if there is none, see
+        also `give_boundary_condition`.
+        """
+        if self.element_blocks is None:
+            self.create_element_blocks()
+
+        nodes = self.mesh.nodes.values()
+        self._node_index = self.mesh.give_node_index()
+        self._node_set_nodes = {}
+
+        # For each element block, lookup what dof ids the elements
+        # use and mark them in the nodes of the block. The columns
+        # of has_dof are the dof ids.
+        has_dof = np.zeros((len(nodes), 3), dtype=bool)
+        for block in self.element_blocks:
+            dof_cols = np.asarray(block.prototype.give_dof_mask()) - 1
+            block_nodes = np.unique(block.vertices)
+            has_dof[block_nodes[:, np.newaxis], dof_cols] = True
+
+        # Loop over the boundary conditions and mark the dofs of the
+        # nodes the bc is applied to as prescribed if the bc is
+        # essential. A bc that is given later overrides an earlier
+        # one on the same dof.
+        self.bc_nodes = []
+        prescribed = np.zeros((len(nodes), 3), dtype=bool)
+        for bc in self.boundary_conditions:
+            bc_nodes = self.give_node_set_nodes(bc.set_applied_to)
+            dof_cols = np.asarray(bc.dof_ids) - 1
+            prescribed[bc_nodes[:, np.newaxis], dof_cols] = bc.essential
+            self.bc_nodes.append(bc_nodes)
+        self._set_bc_coordinates()
+
+        self.dof_table = DofTable(nodes, has_dof, prescribed)
+        for i, node in enumerate(nodes):
+            node.dof_table = self.dof_table
+            node.dof_index = i
+
+        self._resolve_boundary_conditions()
+
+        # Gather matrices from element dofs to global dofs.
+        for block in self.element_blocks:
+            dofs = self.dof_table.give_dof_indices(
+                block.vertices, block.prototype.give_dof_mask())
+            block.dofs = dofs.reshape(len(block), -1)
+            block.equation_numbers = None
+        self._unknowns = None
+
+        logger.debug("Created %d dofs.", len(self.dof_table))
+
+    def _set_bc_coordinates(self):
+        """
+        Gathers the coordinates of the nodes of the boundary
+        conditions into "bc_coordinates".
+        """
+        nodes = self.mesh.nodes.values()
+        self.bc_coordinates = [
+            np.array([nodes[i].coordinates for i in bc_nodes],
+                     dtype=np.float64) for bc_nodes in self.bc_nodes]
 
     def update_dof_values(self, u, time):
         """
@@ -170,19 +355,126 @@ class Domain(object):
         time: float
             Current time in the analysis.
         """
+        table = self.dof_table
+        free = np.flatnonzero(table.dof_type == DT_master)
+        table.value[free] += u[table.equation_number[free] - 1]
 
-        for node_id, node in self.mesh.nodes.iteritems():
-            # Loop over the dof ids in the node
-            for dof in node.dofs:
-                dof_id = dof.dof_id
-                # If boundary condition, get value from
-                # boundary condition class, else use
-                # the value form the argument u.
-                bc = self.dof_bc[node.n].get(dof_id, 0)
-                if bc and bc.essential:
-                    dof.value = bc.give_value(time, node)
-                else:
-                    dof.value += u[dof.equation_number - 1]
+        # Dofs with essential boundary condition get their value
+        # from the boundary condition.
+        self._set_bc_values(table.value, time)
+
+        self._unknowns = None
+
+    def _resolve_boundary_conditions(self):
+        """
+        Computes the dofs each boundary condition is active for.
+
+        Sets "dof_bc_index", "bc_dofs" and "bc_positions", and
+        sorts the boundary conditions into loads and essential
+        boundary conditions, see `create_dofs`.
+        """
+        table = self.dof_table
+        self.dof_bc_index = np.empty(len(table), dtype=np.int64)
+        self.dof_bc_index.fill(-1)
+        bc_dofs = []
+        for k, bc in enumerate(self.boundary_conditions):
+            dofs = table.give_dof_indices(self.bc_nodes[k], bc.dof_ids)
+            self.dof_bc_index[dofs[dofs >= 0]] = k
+            bc_dofs.append(dofs)
+
+        self.bc_dofs = []
+        self.bc_positions = []
+        self.bc_equation_numbers = None
+        self.load_bcs = []
+        self.essential_bcs = []
+        for k, bc in enumerate(self.boundary_conditions):
+            dofs = bc_dofs[k]
+            positions = np.repeat(np.arange(len(dofs)), dofs.shape[1])
+            dofs = dofs.ravel()
+            active = dofs >= 0
+            active[active] = self.dof_bc_index[dofs[active]] == k
+            self.bc_dofs.append(dofs[active])
+            self.bc_positions.append(positions[active])
+
+            if bc.essential:
+                self.essential_bcs.append(k)
+            # TODO: Fix this for more general forces
+            elif isinstance(bc, PointLoad):
+                self.load_bcs.append(k)
+
+    def give_boundary_condition(self, node_id, dof_id):
+        """
+        Gives the boundary condition active for a dof.
+
+        Parameters
+        ==========
+        node_id : int
+            The identifier of the node.
+        dof_id : int
+            The dof id.
+
+        Returns
+        =======
+        `lolFem.core.boundary_conditions.boundary_condition.BoundaryCondition`
+            The boundary condition or None if there is
+            no boundary condition on the dof.
+        """
+        i = self.dof_table.node_dofs[self.mesh.nodes[node_id].dof_index,
+                                     dof_id - 1]
+        if i < 0 or self.dof_bc_index[i] < 0:
+            return None
+        return self.boundary_conditions[self.dof_bc_index[i]]
+
+    def _set_bc_values(self, u, t):
+        """
+        Sets the values of the essential boundary conditions at the
+        time `t` in the dofs they are active for. Each boundary
+        condition is evaluated for all its nodes in one call and
+        scattered to its dofs.
+
+        Parameters
+        ==========
+        u : numpy.ndarray
+            The values of all dofs, updated in place.
+        t : float
+            The current time in the analysis.
+        """
+        for k in self.essential_bcs:
+            bc = self.boundary_conditions[k]
+            values = bc.give_values(t, self.bc_coordinates[k])
+            u[self.bc_dofs[k]] = values[self.bc_positions[k]]
+
+    def give_unknowns(self, t):
+        """
+        Gives the values of all dofs at a time.
+
+        Free dofs take their current value while dofs with essential
+        boundary conditions take the value of the boundary condition
+        at the time `t`. The result is cached until the dof
+        values are updated.
+
+        Parameters
+        ==========
+        t : float or None
+            The current time in the analysis. If None, the dofs with
+            essential boundary conditions keep the values they were
+            last updated to, see `update_dof_values`.
+
+        Returns
+        =======
+        numpy.ndarray
+            The values ordered by dof number. Should not be modified.
+        """
+        if self._unknowns is not None and self._unknowns_time == t:
+            return self._unknowns
+
+        u = self.dof_table.value.copy()
+        if t is not None:
+            self._set_bc_values(u, t)
+
+        self._unknowns = u
+        self._unknowns_time = t
+        return u
 
     def set_dof_numbering(self):
         """
@@ -191,48 +483,112 @@ class Domain(object):
         If the dof does not have an essential boundary condition
         the dof is given a positive unique "equation number".
         Else it is given a negative unique "prescribed equation number".
+
+        The equations are numbered in the order of the dofs, or if
+        the domain renumbers the equations, in the reverse
+        Cuthill-McKee order of the nodes. The values of the dofs are
+        always stored in the order of the dofs.
+
+        For the batched assembly the sparsity pattern of the
+        stiffness matrix is also computed here since it only depends
+        on the equation numbers.
         """
+        table = self.dof_table
+        free = table.dof_type == DT_master
+        prescribed = table.dof_type == DT_active
+
+        self.number_of_equations = int(np.count_nonzero(free))
+        self.number_of_prescribed_equations = int(np.count_nonzero(prescribed))
+
+        free_dofs = np.flatnonzero(free)
+        table.equation_number[free_dofs] = np.arange(
+            1, self.number_of_equations + 1)
+        table.equation_number[prescribed] = -np.arange(
+            1, self.number_of_prescribed_equations + 1)
+
+        if self.renumbering == "rcm":
+            bandwidth, profile = self.give_bandwidth_and_profile()
+            order = give_rcm_node_order(self.element_blocks,
+                                        len(table.nodes))
+            node_rank = np.empty(len(order), dtype=np.int64)
+            node_rank[order] = np.arange(len(order))
+            # Keep the dofs in a node together.
+            free_dofs = free_dofs[np.lexsort(
+                (table.dof_id[free_dofs],
+                 node_rank[table.node_index[free_dofs]]))]
+            table.equation_number[free_dofs] = np.arange(
+                1, self.number_of_equations + 1)
+            new_bandwidth, new_profile = self.give_bandwidth_and_profile()
+            logger.info("Renumbered equations with reverse Cuthill-McKee, "
+                        "bandwidth %d -> %d, profile %d -> %d.",
+                        bandwidth, new_bandwidth, profile, new_profile)
+
+        # Maps from (prescribed) equation number - 1 to dof number.
+        self.eq_n_map = table.n[free_dofs]
+        self.pres_eq_n_map = table.n[prescribed]
+
+        # The equation numbers loaded or the prescribed
+        # equation numbers constrained by each boundary condition.
+        self.bc_equation_numbers = [table.equation_number[dofs]
+                                    for dofs in self.bc_dofs]
+
+        for block in self.element_blocks:
+            block.equation_numbers = table.equation_number[block.dofs]
+
+        if self.assembly != "element":
+            self.create_sparsity_pattern()
+
+    def give_bandwidth_and_profile(self):
+        """
+        Gives the bandwidth and the profile of the stiffness matrix
+        with the current equation numbers, see
+        `lolFem.core.renumbering.compute_bandwidth_and_profile`.
 
-        self.number_of_equations = 0
-        self.number_of_prescribed_equations = 0
-        prescribed_eq_number = 1
-        equation_number = 1
-
-        # Loop over dofs in nodes and check dof type,
-        # Give the dof an equation number according to this
-        # type.
-
-        # Create maps
-        # Todo: document this
-        eq_n_map = []
-        pres_eq_n_map = []
-
-        # Loop over dofs in nodes and check dof type,
-        # Give the dof an equation number according to this
-        # type.
-        for node_id, node in self.mesh.nodes.iteritems():
-            for dof in node.dofs:
-                if dof.dof_type == DT_master:
-                    dof.equation_number = equation_number
-                    equation_number += 1
-                    self.number_of_equations += 1
-                    eq_n_map.append(dof.n)
-                if dof.dof_type == DT_active:
-                    dof.equation_number = -prescribed_eq_number
-                    prescribed_eq_number += 1
-                    self.number_of_prescribed_equations += 1
-                    pres_eq_n_map.append(dof.n)
-
-        self.eq_n_map = eq_n_map
-        self.pres_eq_n_map = pres_eq_n_map
+        Returns
+        =======
+        list of ints
+            The bandwidth and the profile.
+        """
+        table = self.dof_table
+        return compute_bandwidth_and_profile(
+            [table.equation_number[block.dofs]
+             for block in self.element_blocks])
+
+    def create_sparsity_pattern(self):
+        """
+        Computes the sparsity pattern of the stiffness matrix.
+
+        The CSR-structure of the stiffness matrix is computed from the
+        equation numbers in the element blocks, see
+        `lolFem.core.sparsity.SparsityPattern`. The same is done for
+        the coupling matrix between the free and the prescribed dofs.
+        """
+        rows, cols, cols_p = [], [], []
+        for block in self.element_blocks:
+            eq = block.equation_numbers
+
+            # Prescribed dofs get a negative row and column and
+            # are thereby excluded from the pattern.
+            eq_f = np.where(eq > 0, eq - 1, -1)
+            eq_p = np.where(eq < 0, -eq - 1, -1)
+            rows.append(np.repeat(eq_f[:, :, np.newaxis], block.n_dofs, axis=2))
+            cols.append(np.repeat(eq_f[:, np.newaxis, :], block.n_dofs, axis=1))
+            cols_p.append(np.repeat(eq_p[:, np.newaxis, :], block.n_dofs,
+                                    axis=1))
+
+        self.sparsity_pattern = SparsityPattern(
+            rows, cols, (self.number_of_equations, self.number_of_equations))
+        self.coupling_pattern = SparsityPattern(
+            rows, cols_p, (self.number_of_equations,
+                           self.number_of_prescribed_equations))
 
     def compute_load_vector(self, t):
         """
         Computes external load from boundary conditions.
 
-        Loops over the dofs in the nodes and checks if a load
-        is applied to that dof. In that case add it to the
-        load list "f" at the position of its equation number.
+        Loops over the boundary conditions that are loads and
+        scatters their values to the load list "f" at the equation
+        numbers they load, which are computed in `set_dof_numbering`.
         Since loads can vary with time we send in the current time
         of the analysis in the method.
 
@@ -248,18 +604,56 @@ class Domain(object):
             equation number
         """
         f = np.zeros(self.number_of_equations, dtype=np.float64)
-        f_squared = np.zeros(self.number_of_equations, dtype=np.float64)
-        for node_id, node in self.mesh.nodes.iteritems():
-            for dof in node.dofs:
-                # Check if bc is applied to the dof and that is is a load.
-                bc = self.dof_bc[node.n].get(dof.dof_id, 0)
-                # TODO: Fix this for more general forces
-                if bc and isinstance(bc, PointLoad):
-                    f[dof.equation_number - 1] = bc.give_value(t, node)
-                    f_squared[dof.equation_number - 1] = bc.give_value(t, node) ** 2
-        return f, f_squared
-
-    def assemble_stiffness_matrix(self):
+        for k in self.load_bcs:
+            bc = self.boundary_conditions[k]
+            values = bc.give_values(t, self.bc_coordinates[k])
+            f[self.bc_equation_numbers[k] - 1] = values[self.bc_positions[k]]
+        return f, f ** 2
+
+    def compute_prescribed_vector(self, t):
+        """
+        Computes the values of the dofs with essential
+        boundary conditions.
+
+        Parameters
+        ==========
+        t : float
+            Current time in the analysis.
+
+        Returns
+        =======
+        numpy.ndarray
+            The values ordered according to their prescribed
+            equation number.
+        """
+        u_p = np.zeros(self.number_of_prescribed_equations, dtype=np.float64)
+        for k in self.essential_bcs:
+            bc = self.boundary_conditions[k]
+            values = bc.give_values(t, self.bc_coordinates[k])
+            u_p[-self.bc_equation_numbers[k] - 1] = values[self.bc_positions[k]]
+        return u_p
+
+    def compute_prescribed_increment(self, t):
+        """
+        Computes the change of the values of the dofs with essential
+        boundary conditions from the values they were last updated
+        to, see `update_dof_values`, to their values at a time.
+
+        Parameters
+        ==========
+        t : float
+            Current time in the analysis.
+
+        Returns
+        =======
+        numpy.ndarray
+            The increments ordered according to their prescribed
+            equation number.
+        """
+        u_p = self.dof_table.value[self.pres_eq_n_map - 1]
+        return self.compute_prescribed_vector(t) - u_p
+
+    def assemble_stiffness_matrix(self, coupling=False, reuse=False):
         """
         Assembles the global stiffness matrix.
 
@@ -269,14 +663,35 @@ class Domain(object):
         do not have essential boundary conditions
         prescribed are includes into the matrix.
 
+        The coupling between the free dofs and the dofs with
+        essential boundary conditions, K_fp, can be assembled from
+        the same element matrices. The change of the internal
+        forces in the free dofs from an increment of the prescribed
+        values is then -K_fp * du_p.
+
         The global stiffness matrix is first stored in COO-format[1]
         and is then converted to CSR-format [2] to enable
         numerical operations.
 
+        Parameters
+        ==========
+        coupling : bool
+            If the coupling matrix should also be assembled.
+        reuse : bool
+            If True, the batched assembly writes the values into the
+            arrays of the sparsity patterns instead of new ones, see
+            `lolFem.core.sparsity.SparsityPattern.assemble`. The
+            returned matrices are then overwritten by the next
+            assembly with `reuse`. This saves memory when the matrix
+            is only needed until the next assembly.
+
         Returns
         =======
         matrix in numpys CSR-format
-            The global stiffness matrix.
+            The global stiffness matrix. If `coupling` is True, a list
+            with the global stiffness matrix and the coupling matrix
+            with one row for each equation and one column for each
+            prescribed equation.
 
         References
         ==========
@@ -284,32 +699,62 @@ class Domain(object):
         .. [2] http://en.wikipedia.org/wiki/Sparse_matrix#Compressed_row_Storage_.28CRS_or_CSR.29
         """
 
+        if self.assembly == "batched":
+            return self._assemble_stiffness_matrix_batched(coupling, reuse)
+
         I, J, V = [], [], []
+        I_p, J_p, V_p = [], [], []
         # Loop elements and get their element stiffness matrix Ke.
         for element in self.mesh.elements.values():
             Ke = element.compute_stiffness_matrix(self.mesh)
-            dofs = []
-            # Extract all dofs from the element
-            for el_vert in element.vertices:
-                node = self.mesh.nodes[el_vert]
-                for dof in node.dofs:
-                    dofs.append(dof)
+            # Extract the equation numbers of all dofs in the element
+            eq = element.block.equation_numbers[element.block_index]
 
             # Loop over the dofs, check if they are included in the
             # reduced equation system, and in that case, add the
             # stiffness element to the correct place in the global
             # stiffness matrix
-            for i, dof_1 in enumerate(dofs):
-                for j, dof_2 in enumerate(dofs):
-                    if dof_1.equation_number > 0 and dof_2.equation_number > 0:
-                        I.append(dof_1.equation_number - 1)
-                        J.append(dof_2.equation_number - 1)
+            for i, eq_1 in enumerate(eq):
+                for j, eq_2 in enumerate(eq):
+                    if eq_1 > 0 and eq_2 > 0:
+                        I.append(eq_1 - 1)
+                        J.append(eq_2 - 1)
                         V.append(Ke[i, j])
+                    elif eq_1 > 0 and eq_2 < 0 and coupling:
+                        I_p.append(eq_1 - 1)
+                        J_p.append(-eq_2 - 1)
+                        V_p.append(Ke[i, j])
 
         # Create COO-format matrix and convert to CSR.
         K = sparse.coo_matrix((V, (I, J)), shape=(
             self.number_of_equations, self.number_of_equations)).tocsr()
-        return K
+        if not coupling:
+            return K
+        K_fp = sparse.coo_matrix((V_p, (I_p, J_p)), shape=(
+            self.number_of_equations,
+            self.number_of_prescribed_equations)).tocsr()
+        return [K, K_fp]
+
+    def _assemble_stiffness_matrix_batched(self, coupling=False, reuse=False):
+        """
+        Assembles the global stiffness matrix block by block.
+
+        The element stiffness matrices for each element block are
+        computed as one stacked array and are summed into
+        the precomputed sparsity pattern.
+        """
+        if self.parallel_assembler is not None:
+            return self.parallel_assembler.assemble_stiffness_matrix(
+                coupling, reuse)
+        if self.element_blocks is None:
+            self.create_element_blocks()
+        coordinates = self._give_coordinates()
+        Kes = [block.compute_stiffness_matrices(coordinates)
+               for block in self.element_blocks]
+        K = self.sparsity_pattern.assemble(Kes, reuse)
+        if not coupling:
+            return K
+        return [K, self.coupling_pattern.assemble(Kes, reuse)]
 
     def get_all_dof_values(self):
         """
@@ -320,19 +765,11 @@ class Domain(object):
         list of floats
             values of the unknown according to their number
         """
-        u = np.zeros(
-            self.number_of_equations +
-            self.number_of_prescribed_equations,
-            dtype=np.float64)
-        for node_id, node in self.mesh.nodes.iteritems():
-            for dof in node.dofs:
-                u[dof.n - 1] = dof.value
-        return u
+        return self.dof_table.value.copy()
 
     def assemble_internal_forces(self, t):
         f_int, f_int_squared = self.get_internal_forces(t)
-        # TODO: Fix this explicit conversion
-        eq_vec = np.array(self.eq_n_map)
+        eq_vec = self.eq_n_map
         return f_int[eq_vec - 1], f_int_squared[eq_vec - 1]
 
     def get_internal_forces(self, t):
@@ -344,9 +781,12 @@ class Domain(object):
         vector.
 
         This is done by calling each element to return their
-        element internal force vector and the forces from each
-        degree of freedom is added up. Only dofs without
-        essential boundary conditions are assembled.
+        element internal force vector, or for the batched assembly
+        by computing the internal forces for all elements in a block
+        at once. The forces of all elements in a block are then
+        added up to the dofs in one scatter. If parallel assembly is
+        started, see `start_parallel_assembly`, the blocks are
+        split over the worker processes.
 
         Parameters
         ==========
@@ -358,56 +798,231 @@ class Domain(object):
         list of floats
             Internal forces for each dof
         """
-        f_int = np.zeros(self.number_of_equations +
-                          self.number_of_prescribed_equations,
-                         dtype=np.float64)
-        f_int_squared = np.zeros(self.number_of_equations +
-                          self.number_of_prescribed_equations,
-                         dtype=np.float64)
-        for element_id, element in self.mesh.elements.iteritems():
-            # Get the internal force for that element
-            f_int_ele = element.compute_internal_forces(t)
-            i = 0
-            for el_vert in element.vertices:
-                node = self.mesh.nodes[el_vert]
-                for dof in node.dofs:
-                    f_int[dof.n - 1] += f_int_ele[i]
-                    f_int_squared[dof.n - 1] += f_int_ele[i] ** 2
-                    i += 1
-        #self.f = f_int
-        #self.f_squared = f_int_squared
+        if self.parallel_assembler is not None:
+            f_int, f_int_squared = \
+                self.parallel_assembler.assemble_internal_forces(
+                    self.give_unknowns(t))
+            self.internal_forces = f_int
+            return f_int, f_int_squared
+
+        if self.element_blocks is None:
+            self.create_element_blocks()
+
+        n_dofs = len(self.dof_table)
+        f_int = np.zeros(n_dofs, dtype=np.float64)
+        f_int_squared = np.zeros(n_dofs, dtype=np.float64)
+        if self.assembly == "batched":
+            coordinates = self._give_coordinates()
+            u = self.give_unknowns(t)
+
+        for block in self.element_blocks:
+            # Get the internal force for the elements
+            if self.assembly == "batched":
+                f_int_ele = block.compute_internal_forces(coordinates, u)
+            else:
+                f_int_ele = np.array([element.compute_internal_forces(t)
+                                      for element in block.elements])
+            dofs = block.dofs.ravel()
+            f_int += np.bincount(dofs, weights=f_int_ele.ravel(),
+                                 minlength=n_dofs)
+            f_int_squared += np.bincount(dofs, weights=f_int_ele.ravel() ** 2,
+                                         minlength=n_dofs)
+        self.internal_forces = f_int
         return f_int, f_int_squared
 
-    def recover_fields_in_nodes(self):
+    def give_node_set_nodes(self, node_set):
+        """
+        Gives the indices of the nodes in a node set.
+
+        The indices are computed once per node set and are
+        then reused.
+
+        Parameters
+        ==========
+        node_set : `lolFem.core.node_set.NodeSet`, string or None
+            The node set or the name of a node set in the mesh.
+            If None, all nodes in the mesh.
+
+        Returns
+        =======
+        numpy.ndarray
+            The indices of the nodes in the order of the set.
+            Should not be modified.
+        """
+        if node_set is None:
+            nodes = self._node_set_nodes.get(None)
+            if nodes is None:
+                nodes = np.arange(len(self.mesh.nodes), dtype=np.int64)
+                self._node_set_nodes[None] = nodes
+            return nodes
+        if isinstance(node_set, basestring):
+            node_set = self.mesh.node_sets[node_set]
+        nodes = self._node_set_nodes.get(node_set)
+        if nodes is None:
+            if self._node_index is None:
+                self._node_index = self.mesh.give_node_index()
+            nodes = np.array([self._node_index[node_id] for node_id
+                              in node_set.give_node_ids()], dtype=np.int64)
+            self._node_set_nodes[node_set] = nodes
+        return nodes
+
+    def _give_node_set_values(self, values, node_set, dof_ids):
         """
-        Recover fields in nodes by assigning them the field from the
-        closest gauss points.
+        Gives the values of the dofs in the nodes of a node set,
+        zero for dofs that do not exist.
+        """
+        if dof_ids is None:
+            dof_ids = [D_u, D_v]
+        dofs = self.dof_table.give_dof_indices(
+            self.give_node_set_nodes(node_set), dof_ids)
+        return np.where(dofs >= 0, values[dofs], 0.0)
 
-        # TODO: Fix this for n_gps != n_vertices in element
+    def give_displacements(self, node_set=None, dof_ids=None):
         """
-        for element in self.mesh.elements.values():
-            element.recover_fields_in_nodes(self.mesh)
+        Gives the displacements of the nodes in a node set.
 
-        # Average the fields from all contribution,
-        # TODO: Maybe least square instead?
-        for node in self.mesh.nodes.values():
-            # print "node_stress_vec"
-            # print node.stress_vec
-            node.stress = np.mean(node.stress_vec, axis=0)
-            # print "node.stress"
-            # print node.stress
-            node.strain = np.mean(node.strain_vec, axis=0)
+        Parameters
+        ==========
+        node_set : `lolFem.core.node_set.NodeSet`, string or None
+            The node set or the name of a node set in the mesh.
+            If None, all nodes in the order of the node dictionary
+            of the mesh.
+        dof_ids : list of ints, optional
+            The dof ids to give, defaults to [D_u, D_v].
+
+        Returns
+        =======
+        numpy.ndarray
+            n_nodes x n_dof_ids array.
+        """
+        return self._give_node_set_values(self.dof_table.value,
+                                          node_set, dof_ids)
+
+    def give_reactions(self, node_set, dof_ids=None):
+        """
+        Gives the reaction forces in the nodes of a node set.
+
+        The reactions are taken from the internal forces of the
+        last assembly, which for a converged time step are the
+        support forces in the dofs with essential boundary
+        conditions and the applied loads in the other dofs.
+
+        Parameters
+        ==========
+        node_set : `lolFem.core.node_set.NodeSet` or string
+            The node set or the name of a node set in the mesh.
+        dof_ids : list of ints, optional
+            The dof ids to give, defaults to [D_u, D_v].
+
+        Returns
+        =======
+        numpy.ndarray
+            n_nodes x n_dof_ids array.
+
+        Raises
+        ======
+        ResultsError
+            If the internal forces have not been assembled.
+        """
+        if self.internal_forces is None:
+            raise ResultsError("The internal forces have not been assembled.")
+        return self._give_node_set_values(self.internal_forces,
+                                          node_set, dof_ids)
+
+    def give_reaction_sum(self, node_set, dof_ids=None):
+        """
+        Gives the sum of the reaction forces in a node set,
+        see `give_reactions`.
+
+        Returns
+        =======
+        numpy.ndarray
+            The sum for each dof id.
+        """
+        return np.sum(self.give_reactions(node_set, dof_ids), axis=0)
+
+    def recover_fields_in_nodes(self, volume_weighted=False,
+                                method="average"):
+        """
+        Recovers the stress and the strain in the nodes.
+
+        The results are stored in `nodal_stress` and `nodal_strain`
+        as n_nodes x 4 arrays in Voigt format with the rows ordered
+        as the node dictionary of the mesh.
+
+        Parameters
+        ==========
+        volume_weighted : bool
+            If the contribution of each element to the average in a
+            node is weighted with the volume of the element. Only used
+            by the "average" method.
+        method : {"average", "spr"}
+            With "average" the committed values in the gauss points
+            are extrapolated to the vertices of the elements and
+            averaged, see `lolFem.core.recovery.NodalRecovery`. With
+            "spr" superconvergent patch recovery is used,
+            see `lolFem.core.recovery.PatchRecovery`.
+
+        Raises
+        ======
+        RecoveryError
+            If the recovery method given is not supported.
+        """
+        if method == "spr":
+            if self.patch_recovery is None:
+                self.patch_recovery = PatchRecovery(
+                    self.element_blocks, self.mesh.give_coordinates())
+            recovery = self.patch_recovery
+        elif method == "average":
+            if (self.nodal_recovery is None or
+                    self.nodal_recovery.volume_weighted != volume_weighted):
+                coordinates = None
+                if volume_weighted:
+                    coordinates = self.mesh.give_coordinates()
+                self.nodal_recovery = NodalRecovery(self.element_blocks,
+                                                    len(self.mesh.nodes),
+                                                    coordinates)
+            recovery = self.nodal_recovery
+        else:
+            raise RecoveryError(
+                "Recovery method: {} not supported".format(method))
+        self.nodal_stress = recovery.recover("stress")
+        self.nodal_strain = recovery.recover("strain")
+
+    def estimate_error(self):
+        """
+        Estimates the error of the committed solution with the
+        Zienkiewicz-Zhu error estimator, see
+        `lolFem.core.error_estimator.ErrorEstimator`.
+
+        The estimator holds the error of each element and
+        gives the elements to refine.
+
+        Returns
+        =======
+        `lolFem.core.error_estimator.ErrorEstimator`
+        """
+        if self.error_estimator is None:
+            self.error_estimator = ErrorEstimator(
+                self.element_blocks, self.mesh.give_coordinates())
+        self.error_estimator.estimate()
+        return self.error_estimator
 
     def update(self):
         """
         Propagates the update command to all nodes
-        and elements.
+        and commits the material state in all element blocks.
         """
         for node in self.mesh.nodes.values():
             node.update()
 
-        for element in self.mesh.elements.values():
-            element.update()
+        if self.element_blocks is None:
+            for element in self.mesh.elements.values():
+                element.update()
+            return
+
+        for block in self.element_blocks:
+            block.commit_material_state()
 
 
 class DomainTypeError(Exception):
@@ -417,3 +1032,39 @@ class DomainTypeError(Exception):
     type is given to the domain initiator.
     """
     pass
+
+
+class AssemblyTypeError(Exception):
+
+    """
+    Exception to raise when an unknown assembly
+    type is given to the domain initiator.
+    """
+    pass
+
+
+class RenumberingError(Exception):
+
+    """
+    Exception to raise when an unknown renumbering
+    is given to the domain initiator.
+    """
+    pass
+
+
+class ResultsError(Exception):
+
+    """
+    Exception to raise when results are asked for
+    before they are computed.
+    """
+    pass
+
+
+class RecoveryError(Exception):
+
+    """
+    Exception to raise when a recovery method that is not
+    supported is given.
+    """
+    pass
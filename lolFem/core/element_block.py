@@ -0,0 +1,380 @@
+"""
+File to hold the ElementBlock class.
+"""
+
+from collections import OrderedDict
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ElementBlock(object):
+
+    """
+    A block is a group of elements of the same type
+    that share the same section.
+
+    Since all elements in a block have the same interpolator,
+    gauss points, material and thickness, quantities such as
+    B-matrices and element stiffness matrices can be computed
+    for the whole block at once as stacked numpy arrays
+    instead of element by element.
+    """
+
+    def __init__(self, elements, node_index, vertices=None):
+        """
+        Initiates an element block.
+
+        Parameters
+        ==========
+        elements : list of `lolFem.elements.element.Element`
+            The elements in the block. They should all be of the same
+            type and have the same section.
+        node_index : dict
+            Mapping between node identifiers and their position in
+            the mesh, see `lolFem.core.mesh.Mesh.give_node_index`.
+        vertices : numpy.ndarray, optional
+            n_elements x n_vertices array with the node indices of
+            the vertices of the elements. Looked up in `node_index`
+            if not given.
+        """
+        self.prototype = elements[0]
+        self.section = self.prototype.section
+        self.n_dofs = self.prototype.n_dofs
+        self.n_gausspoints = self.prototype.n_gausspoints
+
+        #: n_elements x n_vertices array with the node indices
+        #: of the vertices of the elements.
+        if vertices is None:
+            vertices = np.array([[node_index[vert] for vert in element.vertices]
+                                 for element in elements], dtype=np.int64)
+        self.vertices = vertices
+
+        #: n_elements x n_dofs array with the indices in the
+        #: `lolFem.core.dof.DofTable` of the dofs in the elements.
+        #: Set by the domain when the dofs are created.
+        self.dofs = None
+
+        #: n_elements x n_dofs array with the equation numbers of
+        #: the dofs in the elements. Set by the domain when the dofs
+        #: are numbered.
+        self.equation_numbers = None
+
+        #: The material state of all gauss points in the block,
+        #: see `create_material_state`.
+        self.material_state = None
+
+        #: Cached B-matrices and volumes for all gauss points,
+        #: see `cache_geometry`.
+        self.B = None
+        self.dV = None
+
+        #: Offsets of the colors in the elements if the block is
+        #: colored, see `color_elements`.
+        self.color_offsets = None
+
+        #: The gauss points of all elements, element by element.
+        self._set_elements(elements)
+
+    def _set_elements(self, elements):
+        self.elements = elements
+        self.gausspoints = [gp for element in elements
+                            for gp in element.integrator.gausspoints]
+
+        for i, element in enumerate(elements):
+            element.block = self
+            element.block_index = i
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __str__(self):
+        return "Element block of type {} containing {} elements.".format(
+            self.prototype.element_name, len(self))
+
+    def color_elements(self):
+        """
+        Colors the elements so that no two elements of the same
+        color share a node, see `color_elements`, and orders the
+        elements by their color.
+
+        The elements of a color are then a contiguous range of the
+        block, given by `color_offsets`, and their contributions can
+        be assembled in parallel without two workers writing to
+        the same entry. This needs to be done before the dofs
+        and the material state are created.
+        """
+        colors = color_elements(self.vertices)
+        order = np.argsort(colors, kind="mergesort")
+        self.vertices = self.vertices[order]
+        self._set_elements([self.elements[i] for i in order])
+        self.color_offsets = np.zeros(colors.max() + 2, dtype=np.int64)
+        np.cumsum(np.bincount(colors), out=self.color_offsets[1:])
+        logger.debug("Colored %s with %d colors.", self,
+                     len(self.color_offsets) - 1)
+
+    def create_material_state(self):
+        """
+        Creates the material state for all gauss points in the
+        block. The state is stored in contiguous arrays,
+        see `lolFem.materials.material_state.MaterialState`.
+        """
+        self.material_state = self.section.material.create_material_state(
+            self.gausspoints)
+
+    def commit_material_state(self):
+        """
+        Commits the temporary material state in all
+        gauss points in the block.
+        """
+        if self.material_state is not None:
+            self.material_state.commit()
+        else:
+            for element in self.elements:
+                element.update()
+
+    def cache_geometry(self, coordinates):
+        """
+        Computes and stores the B-matrices and the volumes around
+        all the gauss points in the block.
+
+        For small strains these only depend on the reference
+        geometry so they can be reused in every assembly
+        until the coordinates of the nodes change.
+
+        Parameters
+        ==========
+        coordinates : numpy.ndarray
+            n_nodes x 2 array with the coordinates of the nodes.
+        """
+        self.clear_geometry_cache()
+        self.B, self.dV = self.compute_B(coordinates)
+
+    def clear_geometry_cache(self):
+        """
+        Removes the cached B-matrices and volumes.
+        """
+        self.B = None
+        self.dV = None
+
+    def give_geometry_cache_nbytes(self):
+        """
+        Gives the memory used by the geometry cache.
+
+        Returns
+        =======
+        int
+            The number of bytes.
+        """
+        if self.B is None:
+            return 0
+        return self.B.nbytes + self.dV.nbytes
+
+    def compute_B(self, coordinates, start=0, stop=None):
+        """
+        Computes the B-matrices and the volumes around all
+        the gauss points in the block.
+
+        If the geometry is cached the cached arrays are returned.
+
+        Parameters
+        ==========
+        coordinates : numpy.ndarray or None
+            n_nodes x 2 array with the coordinates of the nodes,
+            see `lolFem.core.mesh.Mesh.give_coordinates`. Not used
+            if the geometry is cached.
+        start, stop : int, optional
+            Only compute for the range of elements from
+            `start` to `stop`.
+
+        Returns
+        =======
+        list
+            The first item is a n_elements x n_gausspoints x 4 x n_dofs
+            array with the B-matrices, the second item is a
+            n_elements x n_gausspoints array with the volumes.
+        """
+        if self.B is not None:
+            return [self.B[start:stop], self.dV[start:stop]]
+
+        coords = coordinates[self.vertices[start:stop]]
+        h = self.section.thickness
+
+        B = np.zeros((len(coords), self.n_gausspoints, 4, self.n_dofs),
+                     dtype=np.float64)
+        dV = np.zeros((len(coords), self.n_gausspoints), dtype=np.float64)
+        for i, gp in enumerate(self.prototype.integrator.gausspoints):
+            dNdx, det_J = self.prototype.interpolator.eval_dNdx_stack(
+                gp.local_coords, coords)
+            B[:, i] = self.prototype.compute_B_stack(dNdx)
+            dV[:, i] = np.abs(det_J) * gp.weight * h
+        return [B, dV]
+
+    def compute_constitutive_matrices(self, start=0, stop=None):
+        """
+        Computes the constitutive matrices in all gauss points
+        in the block.
+
+        The tangents are computed by the material for the whole
+        block, see
+        `lolFem.materials.material.Material.compute_tangents`.
+
+        Parameters
+        ==========
+        start, stop : int, optional
+            Only compute for the range of elements from
+            `start` to `stop`.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_elements x n_gausspoints x 4 x 4 array.
+        """
+        state = self._give_material_state(start, stop)
+        D = self.section.material.compute_tangents(state)
+        return D.reshape(-1, self.n_gausspoints, 4, 4)
+
+    def _give_material_state(self, start, stop):
+        """
+        Gives the material state of a range of elements.
+        """
+        if start == 0 and stop is None:
+            return self.material_state
+        if stop is None:
+            stop = len(self)
+        return self.material_state.give_slice(start * self.n_gausspoints,
+                                              stop * self.n_gausspoints)
+
+    def compute_stiffness_matrices(self, coordinates, start=0, stop=None):
+        """
+        Computes the element stiffness matrices for all
+        elements in the block.
+
+        .. math:: \mathbf{K}_e = \sum_{i} \mathbf{B}^T \mathbf{D} \mathbf{B} w_i
+
+        Parameters
+        ==========
+        coordinates : numpy.ndarray
+            n_nodes x 2 array with the coordinates of the nodes.
+        start, stop : int, optional
+            Only compute for the range of elements from
+            `start` to `stop`.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_elements x n_dofs x n_dofs array.
+        """
+        B, dV = self.compute_B(coordinates, start, stop)
+        D = self.compute_constitutive_matrices(start, stop)
+        DB = np.einsum("egkl,eglj->egkj", D, B)
+        return np.einsum("egki,egkj,eg->eij", B, DB, dV)
+
+    def compute_internal_forces(self, coordinates, u, start=0, stop=None):
+        """
+        Computes the element internal force vectors for all
+        elements in the block.
+
+        The strains in all gauss points are computed at once and
+        the stresses are computed by the material for the whole block,
+        see `lolFem.materials.material.Material.compute_stresses`.
+
+        .. math:: \mathbf{f}_e = \sum_{i} \mathbf{B}^T \sigma w_i
+
+        Parameters
+        ==========
+        coordinates : numpy.ndarray
+            n_nodes x 2 array with the coordinates of the nodes.
+        u : numpy.ndarray
+            The values of all dofs in the domain.
+        start, stop : int, optional
+            Only compute for the range of elements from
+            `start` to `stop`.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_elements x n_dofs array.
+        """
+        B, dV = self.compute_B(coordinates, start, stop)
+        u_e = np.take(u, self.dofs[start:stop])
+        strain = np.einsum("egij,ej->egi", B, u_e)
+
+        # This will also set stress + strain in temp variables
+        # in the gauss points material statuses
+        stress = self.section.material.compute_stresses(
+            strain.reshape(-1, 4), self._give_material_state(start, stop))
+        stress = stress.reshape(strain.shape)
+
+        return np.einsum("egij,egi,eg->ej", B, stress, dV)
+
+
+def create_element_blocks(mesh):
+    """
+    Groups the elements in a mesh into blocks.
+
+    Elements are grouped by their type and their section
+    and the blocks are ordered by the first appearance
+    of the element in the mesh.
+
+    Parameters
+    ==========
+    mesh : lolFem.core.mesh.Mesh
+        The mesh. All elements need to have a section assigned.
+
+    Returns
+    =======
+    list of `ElementBlock`
+    """
+    groups = OrderedDict()
+    for i, element in enumerate(mesh.elements.values()):
+        key = (type(element), id(element.section))
+        elements, positions = groups.setdefault(key, ([], []))
+        elements.append(element)
+        positions.append(i)
+
+    # The connectivity stored in the mesh is used if available,
+    # see `lolFem.core.mesh.Mesh.give_vertices`.
+    node_index = mesh.give_node_index()
+    blocks = [ElementBlock(elements, node_index,
+                           mesh.give_vertices(np.array(positions)))
+              for elements, positions in groups.values()]
+    logger.debug("Created %d element blocks.", len(blocks))
+    return blocks
+
+
+def color_elements(vertices):
+    """
+    Colors elements so that no two elements of the same
+    color share a node.
+
+    The elements are colored greedily in order, each element
+    gets the lowest color not used by any element sharing
+    one of its nodes. The coloring is therefore deterministic.
+
+    Parameters
+    ==========
+    vertices : numpy.ndarray
+        n_elements x n_vertices array with the node indices of the
+        vertices of the elements.
+
+    Returns
+    =======
+    numpy.ndarray
+        The color of each element, numbered from zero.
+    """
+    colors = np.empty(len(vertices), dtype=np.int64)
+    # Bit c is set if an element with color c uses the node.
+    used = [0] * (int(vertices.max()) + 1 if len(vertices) else 0)
+    for i, element_vertices in enumerate(vertices.tolist()):
+        mask = 0
+        for vert in element_vertices:
+            mask |= used[vert]
+        # The lowest unset bit in the mask.
+        bit = ~mask & (mask + 1)
+        colors[i] = bit.bit_length() - 1
+        for vert in element_vertices:
+            used[vert] |= bit
+    return colors
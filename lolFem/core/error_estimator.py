@@ -0,0 +1,147 @@
+"""
+File for estimating the discretization error of a solution.
+"""
+
+import logging
+
+import numpy as np
+
+from lolFem.core.recovery import PatchRecovery
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorEstimator(object):
+
+    """
+    Zienkiewicz-Zhu error estimator [1].
+
+    The error of the stress in an element is estimated as the
+    difference between the stress recovered with superconvergent patch
+    recovery, see `lolFem.core.recovery.PatchRecovery`, and the stress
+    in the gauss points, measured in the energy norm
+
+    .. math:: \|e\|_e^2 = \int_{\Omega_e} (\sigma^* - \sigma)^T
+              \mathbf{D}^{-1} (\sigma^* - \sigma) d\Omega
+
+    where :math:`\mathbf{D}` is the elastic stiffness of the material.
+    The errors are used to decide which elements to refine,
+    see `give_elements_to_refine`.
+
+    .. [1] O. C. Zienkiewicz and J. Z. Zhu, A simple error estimator
+       and adaptive procedure for practical engineering analysis,
+       Int. J. Numer. Meth. Engng. 24, 337-357 (1987).
+    """
+
+    def __init__(self, element_blocks, coordinates):
+        """
+        Parameters
+        ==========
+        element_blocks : list of `lolFem.core.element_block.ElementBlock`
+            The element blocks with their material state created.
+        coordinates : numpy.ndarray
+            n_nodes x 2 array with the coordinates of the nodes.
+        """
+        self.element_blocks = element_blocks
+        self.recovery = PatchRecovery(element_blocks, coordinates)
+
+        #: The volumes around the gauss points and the inverse of
+        #: the elastic stiffness of each block.
+        self.volumes = [block.compute_B(coordinates)[1]
+                        for block in element_blocks]
+        self.compliances = [
+            np.linalg.inv(block.section.material
+                          .give_elastic_stiffness_matrix_plane_strain())
+            for block in element_blocks]
+
+        #: The estimated error in the energy norm of each element
+        #: and the energy norm of the solution in each element,
+        #: one array per element block. Set by `estimate`.
+        self.element_errors = None
+        self.element_energies = None
+
+    def estimate(self):
+        """
+        Estimates the error in all elements from the
+        committed stresses.
+
+        Returns
+        =======
+        float
+            The relative error, see `give_relative_error`.
+        """
+        recovered = self.recovery.recover_in_gausspoints("stress")
+        self.element_errors = []
+        self.element_energies = []
+        for block, stress_star, dV, C in zip(self.element_blocks, recovered,
+                                             self.volumes, self.compliances):
+            stress = block.material_state.committed["stress"].reshape(
+                stress_star.shape)
+            error = stress_star - stress
+            self.element_errors.append(np.sqrt(np.einsum(
+                "egi,egi,eg->e", error.dot(C), error, dV)))
+            self.element_energies.append(np.sqrt(np.einsum(
+                "egi,egi,eg->e", stress.dot(C), stress, dV)))
+        relative_error = self.give_relative_error()
+        logger.info("Estimated relative error: %g.", relative_error)
+        return relative_error
+
+    def give_error_norm(self):
+        """
+        Gives the estimated error in the energy norm
+        over the whole domain.
+        """
+        return np.sqrt(sum(np.sum(e ** 2) for e in self.element_errors))
+
+    def give_energy_norm(self):
+        """
+        Gives the energy norm of the solution over the whole domain.
+        """
+        return np.sqrt(sum(np.sum(u ** 2) for u in self.element_energies))
+
+    def give_relative_error(self):
+        """
+        Gives the estimated relative error
+
+        .. math:: \eta = \sqrt{\\frac{\|e\|^2}{\|u\|^2 + \|e\|^2}}
+
+        Returns
+        =======
+        float
+        """
+        error_squared = self.give_error_norm() ** 2
+        total = self.give_energy_norm() ** 2 + error_squared
+        if total == 0.0:
+            return 0.0
+        return np.sqrt(error_squared / total)
+
+    def give_elements_to_refine(self, target_error):
+        """
+        Gives the elements that should be refined for the
+        relative error to reach a target.
+
+        The error is distributed equally over the elements, so an
+        element is refined if its error is larger than
+
+        .. math:: \eta_{target} \sqrt{\\frac{\|u\|^2 + \|e\|^2}{n}}
+
+        where n is the number of elements.
+
+        Parameters
+        ==========
+        target_error : float
+            The target relative error.
+
+        Returns
+        =======
+        list of ints
+            The identifiers of the elements to refine.
+        """
+        n_elements = sum(len(block) for block in self.element_blocks)
+        total = self.give_energy_norm() ** 2 + self.give_error_norm() ** 2
+        limit = target_error * np.sqrt(total / n_elements)
+        element_ids = []
+        for block, errors in zip(self.element_blocks, self.element_errors):
+            element_ids.extend(block.elements[i].n
+                               for i in np.flatnonzero(errors > limit))
+        return element_ids
@@ -3,6 +3,8 @@
 from collections import OrderedDict
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -59,17 +61,44 @@ class Mesh(object):
             node_sets = OrderedDict()
         self.node_sets = node_sets
 
+        #: n_nodes x n_dim array with the coordinates of the nodes,
+        #: ordered as the node dictionary, or None. Set when the mesh
+        #: is loaded from a cache, see `lolFem.core.mesh_cache`, and
+        #: then memory mapped. Reset by `invalidate_arrays`.
+        self.coordinates = None
+
+        #: The connectivity of the elements in runs of elements of
+        #: the same type, or None. A list of (offset, vertices) where
+        #: offset is the position in the element dictionary of the
+        #: first element in the run and vertices is a n_elements x
+        #: n_vertices array with the node indices of the vertices.
+        #: Set together with `coordinates`.
+        self.vertex_runs = None
+
     def add_node(self, node):
         """
         Adds a node to the mesh.
         """
         self.nodes[node.n] = node
+        self.invalidate_arrays()
 
     def add_element(self, element):
         """
         Adds an element to the mesh.
         """
         self.elements[element.n] = element
+        self.vertex_runs = None
+
+    def invalidate_arrays(self):
+        """
+        Drops `coordinates` and `vertex_runs` so that the
+        coordinates and the connectivity are read from the nodes
+        and the elements again. This needs to be called if the
+        coordinates of the nodes are changed, see also
+        `lolFem.core.domain.Domain.invalidate_geometry_cache`.
+        """
+        self.coordinates = None
+        self.vertex_runs = None
 
     def add_element_set(self, element_set):
         """
@@ -82,3 +111,64 @@ class Mesh(object):
         Adds a node set to the mesh.
         """
         self.node_sets[node_set.name] = node_set
+
+    def give_node_index(self):
+        """
+        Gives the position of each node in the node dictionary.
+
+        Returns
+        =======
+        dict
+            Mapping {node identifier (int) : index (int)}
+        """
+        return dict((node_id, i) for i, node_id in enumerate(self.nodes))
+
+    def give_coordinates(self):
+        """
+        Gives the in-plane coordinates of all nodes.
+
+        If `coordinates` is set, this is a read only view of it.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_nodes x 2 array where the rows are ordered
+            as the node dictionary.
+        """
+        if self.coordinates is not None:
+            return self.coordinates[:, 0:2]
+
+        coords = np.zeros((len(self.nodes), 2), dtype=np.float64)
+        for i, node in enumerate(self.nodes.values()):
+            coords[i, :] = node.coordinates[0:2]
+        return coords
+
+    def give_vertices(self, positions):
+        """
+        Gives the node indices of the vertices of elements
+        from `vertex_runs`.
+
+        Parameters
+        ==========
+        positions : numpy.ndarray
+            The increasing positions of the elements in the
+            element dictionary. The elements should have the
+            same type.
+
+        Returns
+        =======
+        numpy.ndarray or None
+            n_elements x n_vertices array, a view of the run if the
+            elements are a contiguous range of it. None if the
+            connectivity is not stored or the elements are in
+            more than one run.
+        """
+        if self.vertex_runs is None or not len(positions):
+            return None
+        for offset, vertices in self.vertex_runs:
+            if offset <= positions[0] and positions[-1] < offset + len(vertices):
+                local = positions - offset
+                if local[-1] - local[0] + 1 == len(local):
+                    return vertices[local[0]:local[-1] + 1]
+                return vertices[local]
+        return None
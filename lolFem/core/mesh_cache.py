@@ -0,0 +1,283 @@
+"""
+File for the binary mesh cache.
+
+A mesh is stored as a directory of .npy files with the node
+coordinates, the connectivity for each run of elements of the same
+type and the node and element sets. A small json file holds the names
+of the element types and sets and the key of the file the mesh was
+read from. Reading a cached mesh loads the arrays as they are stored,
+so no text is parsed.
+
+The coordinates and the connectivity are memory mapped and kept on
+the mesh, see `lolFem.core.mesh.Mesh.coordinates` and
+`lolFem.core.mesh.Mesh.vertex_runs`. The analysis uses them without
+copying them, so processes loading the same mesh share their pages.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from lolFem import elements
+from .element_set import ElementSet
+from lolFem.core.mesh import Mesh
+from lolFem.core.node import Node
+from .node_set import NodeSet
+
+logger = logging.getLogger(__name__)
+
+#: Version of the cache format, caches with another version are rebuilt.
+CACHE_VERSION = 2
+
+META_FILE = "mesh.json"
+
+
+def give_file_key(filename, hash_file=True):
+    """
+    Gives the key used to check if a cache is up to date
+    with the file the mesh was read from.
+
+    Parameters
+    ==========
+    filename : string
+        The name of the file.
+    hash_file : bool
+        If the sha1 hash of the file content should be computed.
+
+    Returns
+    =======
+    dict
+        With the modification time, the size and the hash
+        (None if not computed) of the file.
+    """
+    stat = os.stat(filename)
+    key = {"mtime": stat.st_mtime, "size": stat.st_size, "sha1": None}
+    if hash_file:
+        sha1 = hashlib.sha1()
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha1.update(chunk)
+        key["sha1"] = sha1.hexdigest()
+    return key
+
+
+def give_cache_directory(filename):
+    """
+    Gives the default cache directory for a mesh file, which
+    is the file name with ".cache" appended.
+    """
+    return filename + ".cache"
+
+
+def save_mesh(mesh, directory, key=None):
+    """
+    Saves a mesh to a cache directory.
+
+    The files are first written to a temporary directory which is
+    then moved in place, so a reader never sees a half written cache.
+
+    Parameters
+    ==========
+    mesh : `lolFem.core.mesh.Mesh`
+        The mesh to save.
+    directory : string
+        The cache directory. An existing cache is replaced.
+    key : dict, optional
+        The key of the file the mesh was read from,
+        see `give_file_key`.
+    """
+    nodes = mesh.nodes.values()
+    node_ids = np.array([node.n for node in nodes], dtype=np.int64)
+    coordinates = np.array([node.coordinates for node in nodes],
+                           dtype=np.float64)
+    node_index = mesh.give_node_index()
+
+    # Split the elements into runs of the same type so the order of
+    # the elements is kept. The vertices are stored as node indices.
+    runs = []
+    for element in mesh.elements.values():
+        element_type = type(element).__name__
+        if not runs or runs[-1][0] != element_type:
+            runs.append((element_type, [], []))
+        runs[-1][1].append(element.n)
+        runs[-1][2].append([node_index[vert] for vert in element.vertices])
+
+    meta = {"version": CACHE_VERSION,
+            "key": key,
+            "element_types": [run[0] for run in runs],
+            "node_sets": mesh.node_sets.keys(),
+            "element_sets": mesh.element_sets.keys()}
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    tmp_directory = tempfile.mkdtemp(dir=parent)
+    try:
+        np.save(os.path.join(tmp_directory, "node_ids.npy"), node_ids)
+        np.save(os.path.join(tmp_directory, "coordinates.npy"), coordinates)
+        for i, (element_type, ids, vertices) in enumerate(runs):
+            np.save(os.path.join(tmp_directory, "element_ids_%d.npy" % i),
+                    np.array(ids, dtype=np.int64))
+            np.save(os.path.join(tmp_directory, "vertices_%d.npy" % i),
+                    np.array(vertices, dtype=np.int64))
+        for i, node_set in enumerate(mesh.node_sets.values()):
+            np.save(os.path.join(tmp_directory, "node_set_%d.npy" % i),
+                    np.array(node_set.ids, dtype=np.int64))
+        for i, element_set in enumerate(mesh.element_sets.values()):
+            np.save(os.path.join(tmp_directory, "element_set_%d.npy" % i),
+                    np.array(element_set.ids, dtype=np.int64))
+        _write_meta(tmp_directory, meta)
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.rename(tmp_directory, directory)
+    except Exception:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        raise
+    logger.debug("Saved mesh cache to %s.", directory)
+
+
+def _write_meta(directory, meta):
+    """
+    Writes the meta data of a cache directory. The file is written
+    next to the old one and then moved in place.
+    """
+    filename = os.path.join(directory, META_FILE)
+    with open(filename + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.rename(filename + ".tmp", filename)
+
+
+def give_cache_meta(directory):
+    """
+    Gives the meta data of a cache directory.
+
+    Returns
+    =======
+    dict or None
+        The meta data, or None if there is no valid cache
+        in the directory.
+    """
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def is_cache_valid(directory, filename):
+    """
+    Checks if a cache directory is up to date with a mesh file.
+
+    The modification time and size of the file are compared first.
+    If they differ the file is hashed, so a file that is touched
+    or copied but not changed still uses the cache. The new
+    modification time is then stored in the cache so the file
+    is not hashed again the next time.
+
+    Parameters
+    ==========
+    directory : string
+        The cache directory.
+    filename : string
+        The mesh file.
+
+    Returns
+    =======
+    bool
+    """
+    meta = give_cache_meta(directory)
+    if meta is None or meta["key"] is None:
+        return False
+    cached_key = meta["key"]
+    key = give_file_key(filename, hash_file=False)
+    if (key["mtime"] == cached_key["mtime"] and
+            key["size"] == cached_key["size"]):
+        return True
+    if key["size"] != cached_key["size"]:
+        return False
+    key = give_file_key(filename)
+    if key["sha1"] != cached_key["sha1"]:
+        return False
+    meta["key"] = key
+    try:
+        _write_meta(directory, meta)
+    except (IOError, OSError) as e:
+        logger.warning("Could not update mesh cache %s: %s", directory, e)
+    return True
+
+
+def load_mesh(directory, mmap_mode="r"):
+    """
+    Loads a mesh from a cache directory.
+
+    Parameters
+    ==========
+    directory : string
+        The cache directory.
+    mmap_mode : {"r", None}
+        Passed on to `numpy.load`. With "r" the arrays are
+        memory mapped read only.
+
+    Returns
+    =======
+    `lolFem.core.mesh.Mesh`
+        The mesh, with the coordinates and the connectivity in
+        `lolFem.core.mesh.Mesh.coordinates` and
+        `lolFem.core.mesh.Mesh.vertex_runs`.
+
+    Raises
+    ======
+    MeshCacheError
+        If there is no valid cache in the directory.
+    """
+    meta = give_cache_meta(directory)
+    if meta is None:
+        raise MeshCacheError("No valid mesh cache in {}.".format(directory))
+
+    def load(name):
+        return np.load(os.path.join(directory, name + ".npy"),
+                       mmap_mode=mmap_mode)
+
+    mesh = Mesh()
+    node_ids = load("node_ids")
+    coordinates = load("coordinates")
+    for node_id, coords in zip(node_ids.tolist(), coordinates.tolist()):
+        mesh.add_node(Node(node_id, coords))
+
+    vertex_runs = []
+    for i, element_type in enumerate(meta["element_types"]):
+        element_class = getattr(elements, str(element_type))
+        vertices = load("vertices_%d" % i)
+        vertex_runs.append((len(mesh.elements), vertices))
+        for element_id, vertex_ids in zip(load("element_ids_%d" % i).tolist(),
+                                          node_ids[vertices].tolist()):
+            mesh.add_element(element_class(element_id, vertex_ids))
+
+    for i, name in enumerate(meta["node_sets"]):
+        mesh.add_node_set(
+            NodeSet(str(name), load("node_set_%d" % i).tolist()))
+    for i, name in enumerate(meta["element_sets"]):
+        mesh.add_element_set(
+            ElementSet(str(name), load("element_set_%d" % i).tolist()))
+
+    # Set last since adding nodes and elements resets them.
+    mesh.coordinates = coordinates
+    mesh.vertex_runs = vertex_runs
+
+    logger.debug("Loaded mesh cache from %s.", directory)
+    return mesh
+
+
+class MeshCacheError(Exception):
+
+    """
+    Exception to raise when a mesh cache can not be read.
+    """
+    pass
@@ -15,8 +15,13 @@ class LinearStatic(Model):
     Model assuming static conditions and linearity in stress vs strain.
     """
 
-    def __init__(self, solver, domain, timer, vtk_name):
-        super(LinearStatic, self).__init__(solver, domain, timer, vtk_name)
+    def __init__(self, solver, domain, timer, vtk_name, n_workers=1,
+                 parallel="processes", compress_output=False,
+                 output_format="vtu", async_output=False):
+        super(LinearStatic, self).__init__(solver, domain, timer, vtk_name,
+                                           n_workers, parallel,
+                                           compress_output, output_format,
+                                           async_output)
 
     def solve(self, model):
         """
@@ -36,7 +41,6 @@ class LinearStatic(Model):
             # Update components.
             self.update()
 
-            if not (self.vtk_file_name is None):
-                self.export_to_vtk(self.vtk_file_name + "_" + str(i))
+            self.write_output(t)
 
         print "LinearStatic model completed in {}!".format(time.strftime('%H:%M:%S', time.gmtime(time.time() - start_t)))
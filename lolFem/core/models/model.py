@@ -3,17 +3,25 @@ File to hold the Model base class.
 """
 
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
 import logging
 
 import numpy as np
 
+from lolFem.visualization.async_writer import AsyncWriter
+from lolFem.visualization.vtu_writer import (VTUTimeSeriesWriter,
+                                             voigt_to_tensor)
+from lolFem.visualization.xdmf_writer import XDMFTimeSeriesWriter
+
 logger = logging.getLogger(__name__)
 
 
 class Model(object):
     __metaclass__ = ABCMeta
 
-    def __init__(self, solver, domain, timer, vtk_file_name=None):
+    def __init__(self, solver, domain, timer, vtk_file_name=None,
+                 n_workers=1, parallel="processes", compress_output=False,
+                 output_format="vtu", async_output=False):
         """
         Initiates a model class instance.
 
@@ -26,9 +34,41 @@ class Model(object):
         time : list of floats
             The times to run the analysis over.
         vtk_file_name : string, optional
-            File name to export results to in each time step.
-            If not given, no data is exported.
+            File name to export results to in each time step,
+            see `write_output`. If not given, no data is exported.
+        n_workers : int, optional
+            The number of worker processes used to assemble the
+            stiffness matrix and the internal forces, see
+            `lolFem.core.parallel_assembly`. Requires the batched
+            assembly if larger than one.
+        parallel : {"processes", "threads"}, optional
+            If the workers are processes or threads. Threads do not
+            need to copy the domain and run concurrently in the numpy
+            operations that release the global interpreter lock.
+        compress_output : bool, optional
+            If the exported data is compressed with zlib. Only
+            supported for the "vtu" output format.
+        output_format : {"vtu", "xdmf"}, optional
+            The format of the exported data, see `write_output`.
+        async_output : bool, optional
+            If the exported data is written in a background thread
+            while the analysis continues, see
+            `lolFem.visualization.async_writer.AsyncWriter`.
+
+        Raises
+        ======
+        OutputFormatError
+            If the output format given is not supported or
+            can not be compressed.
         """
+        if output_format not in ["vtu", "xdmf"]:
+            raise OutputFormatError(
+                "Output format: {} not supported".format(output_format))
+        if compress_output and output_format != "vtu":
+            raise OutputFormatError(
+                "Output format: {} can not be compressed".format(
+                    output_format))
+
         self.domain = domain
         self.solver = solver
         self.number_of_prescribed_equations = 0
@@ -39,21 +79,43 @@ class Model(object):
         self.domain.model = self
         self.timer = timer
         self.vtk_file_name = vtk_file_name
+        self.n_workers = n_workers
+        self.parallel = parallel
+        self.output_format = output_format
+        self.compress_output = compress_output
+        self.async_output = async_output
+        self.output_writer = None
         self. f = None
 
     def go(self):
         """
         Startes the analysis.
 
-        This is done by first creating the dofs, then assigning
+        This is done by first grouping the elements into blocks,
+        and coloring them if the assembly is parallel,
+        then caching the geometry if the domain requests it,
+        then creating the dofs, then assigning
         the dofs their numbers, then creating the needed
         material statuses, and then starts the solver.
+        All exported data is written when the analysis returns.
         """
         self.check()
+        self.domain.create_element_blocks()
+        if self.n_workers > 1:
+            self.domain.color_element_blocks()
+        if self.domain.cache_geometry:
+            self.domain.create_geometry_cache()
         self.domain.create_dofs()
         self.domain.set_dof_numbering()
         self.domain.create_material_statuses()
-        self.solve(self)
+        if self.n_workers > 1:
+            self.domain.start_parallel_assembly(self.n_workers,
+                                                self.parallel)
+        try:
+            self.solve(self)
+        finally:
+            self.domain.stop_parallel_assembly()
+            self.close_output()
 
         # loop time steps, for now only 1 step
 
@@ -90,18 +152,93 @@ class Model(object):
         """
         self.domain.update()
 
+    def write_output(self, t):
+        """
+        Writes the displacements and the recovered stress and strain
+        in the nodes for a time step.
+
+        With the "vtu" output format the time steps are written to
+        vtk_file_name_<step>.vtu and are listed in vtk_file_name.pvd,
+        see `lolFem.visualization.vtu_writer.VTUTimeSeriesWriter`.
+        With the "xdmf" output format they are described in
+        vtk_file_name.xdmf with the data in raw binary files, see
+        `lolFem.visualization.xdmf_writer.XDMFTimeSeriesWriter`.
+        The mesh is written once, the first time output is written.
+
+        If the output is asynchronous, the fields are recovered and
+        copied here and the time step is written in the background.
+
+        Parameters
+        ==========
+        t : float
+            The time of the time step.
+        """
+        if self.vtk_file_name is None:
+            return
+        if self.output_writer is None:
+            coordinates = self.domain.mesh.give_coordinates()
+            cells = self._give_output_cells()
+            if self.output_format == "xdmf":
+                self.output_writer = XDMFTimeSeriesWriter(
+                    self.vtk_file_name, coordinates, cells)
+            else:
+                self.output_writer = VTUTimeSeriesWriter(
+                    self.vtk_file_name, coordinates, cells,
+                    self.compress_output)
+            if self.async_output:
+                self.output_writer = AsyncWriter(self.output_writer)
+        self.output_writer.write(t, self._give_output_data())
+
+    def close_output(self):
+        """
+        Waits until all exported data is written and closes the
+        writer. Output written after this starts from the first
+        time step again.
+        """
+        writer, self.output_writer = self.output_writer, None
+        if isinstance(writer, AsyncWriter):
+            writer.close()
+
+    def _give_output_cells(self):
+        """
+        Gives the vertices and the VTK cell type of the
+        elements in each element block.
+        """
+        return [(block.vertices, block.prototype.vtk_cell_type)
+                for block in self.domain.element_blocks]
+
+    def _give_output_data(self):
+        """
+        Recovers the stress and the strain in the nodes and gives
+        them as tensors together with the displacements. The arrays
+        are new copies that are not changed by the analysis.
+        """
+        domain = self.domain
+        domain.recover_fields_in_nodes()
+        displacement = np.zeros((len(domain.mesh.nodes), 3),
+                                dtype=np.float64)
+        displacement[:, 0:2] = domain.give_displacements()
+        return OrderedDict([
+            ("Stress", voigt_to_tensor(domain.nodal_stress)),
+            ("Strain", voigt_to_tensor(domain.nodal_strain)),
+            ("Displacement", displacement)])
+
     def export_to_vtk(self, filename):
         """
+        Exports the displacements and the recovered stress and strain
+        in the nodes to a .vtu file.
 
         Parameters
         =========
         filename : string
             The filename of the file to export
-            data to.
+            data to, without extension.
         """
-        from lolFem.visualization import vtk_tools
-        self.domain.recover_fields_in_nodes()
-        vtk_tools.write_vtk_file(self.domain.mesh, filename)
+        writer = VTUTimeSeriesWriter(filename,
+                                     self.domain.mesh.give_coordinates(),
+                                     self._give_output_cells(),
+                                     self.compress_output)
+        writer.write_piece(filename + ".vtu", self._give_output_data())
 
 
 class NoSectionError(Exception):
@@ -111,3 +248,11 @@ class NoSectionError(Exception):
     a section assigned to it.
     """
     pass
+
+
+class OutputFormatError(Exception):
+
+    """
+    Raised if an output format that is not supported is given.
+    """
+    pass
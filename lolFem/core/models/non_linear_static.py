@@ -13,13 +13,20 @@ import pylab as pl
 
 class NonLinearStatic(Model):
 
-    def __init__(self, solver, domain, timer, vtk_file_name=None):
+    def __init__(self, solver, domain, timer, vtk_file_name=None,
+                 n_workers=1, parallel="processes", compress_output=False,
+                 output_format="vtu", async_output=False):
         super(
             NonLinearStatic,
             self).__init__(solver,
                            domain,
                            timer,
-                           vtk_file_name)
+                           vtk_file_name,
+                           n_workers,
+                           parallel,
+                           compress_output,
+                           output_format,
+                           async_output)
 
     def solve(self, model):
         print "Starting solver for NonLinearStatic model..."
@@ -32,7 +39,6 @@ class NonLinearStatic(Model):
             # Update components
             self.update()
 
-            if not (self.vtk_file_name is None):
-                self.export_to_vtk(self.vtk_file_name + "_" + str(i))
+            self.write_output(t)
 
         print "NonLinearStatic model completed in {}!".format(time.strftime('%H:%M:%S', time.gmtime(time.time() - start_t)))
@@ -39,3 +39,45 @@ def inv_2x2(A):
     """
     det = determinant_2x2(A)
     return 1.0 / det * np.array([[A[1, 1], -A[0, 1]], [-A[1, 0], A[0, 0]]])
+
+
+def determinant_2x2_stack(A):
+    """
+    Calculates the determinants for a stack of 2x2 matrices
+    by explicit formula.
+
+    Parameters
+    =========
+    A : numpy.ndarray
+        n x 2 x 2 array of matrices
+
+    Returns
+    ======
+    numpy.ndarray
+        The n determinants.
+    """
+    return A[:, 0, 0] * A[:, 1, 1] - A[:, 0, 1] * A[:, 1, 0]
+
+
+def inv_2x2_stack(A):
+    """
+    Calculates the inverses for a stack of 2x2 matrices
+    by explicit formula.
+
+    Parameters
+    =========
+    A : numpy.ndarray
+        n x 2 x 2 array of matrices
+
+    Returns
+    ======
+    numpy.ndarray
+        n x 2 x 2 array of the inverses.
+    """
+    det_inv = 1.0 / determinant_2x2_stack(A)
+    A_inv = np.empty_like(A)
+    A_inv[:, 0, 0] = det_inv * A[:, 1, 1]
+    A_inv[:, 0, 1] = det_inv * -A[:, 0, 1]
+    A_inv[:, 1, 0] = det_inv * -A[:, 1, 0]
+    A_inv[:, 1, 1] = det_inv * A[:, 0, 0]
+    return A_inv
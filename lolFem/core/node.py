@@ -27,17 +27,34 @@ class Node(object):
         """
         self.coordinates = coordinates
         self.n = n
+
+        # Set by the domain when the dofs are stored in a
+        # `lolFem.core.dof.DofTable`.
+        self.dof_table = None
+        self.dof_index = None
+
         if dofs is None:
             dofs = []
         self.dofs = dofs
         self.displacements = 0
 
-        # TODO: Fix hardcoding for fields
-        self.stress_vec = []
-        self.strain_vec = []
+    @property
+    def dofs(self):
+        """
+        The dofs in the node.
+
+        If the dofs are stored in a dof table this is
+        a list of `lolFem.core.dof.DofView` to the dofs in the table.
+        """
+        if self.dof_table is None:
+            return self._dofs
+        return self.dof_table.give_node_dofs(self.dof_index)
 
-        self.strain = None
-        self.stress = None
+    @dofs.setter
+    def dofs(self, dofs):
+        self.dof_table = None
+        self.dof_index = None
+        self._dofs = dofs
 
     def give_coordinate(self, i):
         """
@@ -58,9 +75,9 @@ class Node(object):
     def update(self):
         """
         Propagate the update command
-        to all dofs.
+        to all dofs that are not stored in a dof table.
         """
-        for dof in self.dofs:
+        for dof in self._dofs:
             dof.update()
 
     def __str__(self):
@@ -0,0 +1,296 @@
+"""
+File for assembling the global matrices with a pool of workers.
+
+The elements in every element block are colored so that no two
+elements of the same color share a node, see
+`lolFem.core.element_block.ElementBlock.color_elements`. The elements
+of one color are split into one chunk per worker and the workers
+compute the contributions of their chunks and add them directly into
+the values of the stiffness matrix and the internal force vector,
+which are shared by all workers. Since elements of the same color
+do not share any dofs, no two workers write to the same entry. The
+colors are assembled one after the other, so every entry gets its
+contributions summed in the same order regardless of the number of
+workers and the results are reproducible bit for bit.
+
+The workers are either processes, see `ProcessAssembler`, or threads,
+see `ThreadAssembler`.
+"""
+
+from abc import ABCMeta, abstractmethod
+import ctypes
+import logging
+import multiprocessing
+from multiprocessing import sharedctypes
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The assembler in a worker process, set when the worker is started.
+_assembler = None
+
+
+def shared_zeros(shape):
+    """
+    Creates an array of zeros in shared memory.
+
+    Parameters
+    ==========
+    shape : tuple of ints or int
+        The shape of the array.
+
+    Returns
+    =======
+    numpy.ndarray
+        A float64 array whose memory is shared with
+        processes forked after it was created.
+    """
+    size = int(np.prod(shape))
+    buffer = sharedctypes.RawArray(ctypes.c_double, max(size, 1))
+    return np.frombuffer(buffer, dtype=np.float64, count=size).reshape(shape)
+
+
+class ParallelAssembler(object):
+
+    """
+    Base class for assembling the stiffness matrix and the internal
+    forces of a domain with a pool of workers.
+
+    Subclasses start the pool in `start` and run the
+    assembly of the chunks in `_map`.
+    """
+    __metaclass__ = ABCMeta
+
+    def __init__(self, domain, n_workers):
+        """
+        Parameters
+        ==========
+        domain : `lolFem.core.domain.Domain`
+            The domain to assemble. It should use the batched
+            assembly, have colored element blocks and have its dofs
+            numbered and material state created.
+        n_workers : int
+            The number of workers.
+
+        Raises
+        ======
+        ParallelAssemblyError
+            If the domain is not set up for parallel assembly.
+        """
+        if domain.assembly != "batched":
+            raise ParallelAssemblyError(
+                "Parallel assembly requires the batched assembly, "
+                "got {}.".format(domain.assembly))
+        if any(block.color_offsets is None for block in domain.element_blocks):
+            raise ParallelAssemblyError(
+                "The element blocks need to be colored for "
+                "parallel assembly.")
+
+        self.domain = domain
+        self.n_workers = n_workers
+        self.pool = None
+        self.coordinates = None
+
+        #: For each color in each block, the chunks of elements
+        #: as (block index, start, stop).
+        self.tasks = []
+        for i, block in enumerate(domain.element_blocks):
+            offsets = block.color_offsets
+            for start, stop in zip(offsets[:-1], offsets[1:]):
+                bounds = np.linspace(start, stop, n_workers + 1).astype(int)
+                self.tasks.append([(i, a, b) for a, b in
+                                   zip(bounds[:-1], bounds[1:]) if b > a])
+
+        n_dofs = len(domain.dof_table)
+        self.u = np.zeros(n_dofs, dtype=np.float64)
+        self.f_int = np.zeros(n_dofs, dtype=np.float64)
+        self.f_int_squared = np.zeros(n_dofs, dtype=np.float64)
+
+    @abstractmethod
+    def start(self):
+        """
+        Starts the workers.
+        """
+        pass
+
+    def stop(self):
+        """
+        Stops the workers.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    @abstractmethod
+    def _map(self, name, tasks):
+        """
+        Calls the method `name` of the assembler for every
+        task in the workers and waits for all of them.
+        """
+        pass
+
+    def assemble_stiffness_matrix(self, coupling=False, reuse=False):
+        """
+        Assembles the global stiffness matrix.
+
+        The workers add their values into the arrays of the sparsity
+        patterns, see `lolFem.core.sparsity.SparsityPattern.add`.
+
+        Parameters
+        ==========
+        coupling : bool
+            If the coupling matrix between the free and the prescribed
+            dofs should also be assembled.
+        reuse : bool
+            If True, the returned matrices share their values with
+            the sparsity patterns and are overwritten by the next
+            assembly. Otherwise the values are copied.
+
+        Returns
+        =======
+        scipy.sparse.csr_matrix
+            The global stiffness matrix. If `coupling` is True, a list
+            with the stiffness matrix and the coupling matrix.
+        """
+        pattern = self.domain.sparsity_pattern
+        coupling_pattern = self.domain.coupling_pattern
+        pattern.data[:] = 0.0
+        coupling_pattern.data[:] = 0.0
+        for tasks in self.tasks:
+            self._map("_add_stiffness_matrices",
+                      [task + (coupling,) for task in tasks])
+        patterns = [pattern, coupling_pattern] if coupling else [pattern]
+        matrices = [p.give_matrix(None if reuse else p.data.copy())
+                    for p in patterns]
+        if not coupling:
+            return matrices[0]
+        return matrices
+
+    def assemble_internal_forces(self, u):
+        """
+        Assembles the internal forces.
+
+        Parameters
+        ==========
+        u : numpy.ndarray
+            The values of all dofs.
+
+        Returns
+        =======
+        list of numpy.ndarray
+            The internal forces and the sum of the squares of the
+            element contributions for each dof.
+        """
+        self.u[:] = u
+        self.f_int[:] = 0.0
+        self.f_int_squared[:] = 0.0
+        for tasks in self.tasks:
+            self._map("_add_internal_forces", tasks)
+        return [self.f_int.copy(), self.f_int_squared.copy()]
+
+    def _add_stiffness_matrices(self, block_index, start, stop, coupling):
+        block = self.domain.element_blocks[block_index]
+        Ke = block.compute_stiffness_matrices(self.coordinates, start, stop)
+        self.domain.sparsity_pattern.add(block_index, start, Ke)
+        if coupling:
+            self.domain.coupling_pattern.add(block_index, start, Ke)
+
+    def _add_internal_forces(self, block_index, start, stop):
+        block = self.domain.element_blocks[block_index]
+        f_e = block.compute_internal_forces(self.coordinates, self.u,
+                                            start, stop).ravel()
+        dofs = block.dofs[start:stop].ravel()
+        self.f_int[dofs] += f_e
+        self.f_int_squared[dofs] += f_e ** 2
+
+
+class ProcessAssembler(ParallelAssembler):
+
+    """
+    Assembles with a pool of worker processes.
+
+    The workers are forked when the assembly is started and get a copy
+    of the domain. The values of the stiffness matrix, the internal
+    forces and the material state are moved to shared memory so that
+    the values computed by the workers are seen by the main process,
+    but the geometry and the sections of the elements should not be
+    changed while the workers are running.
+    """
+
+    def start(self):
+        """
+        Moves the stiffness matrix values, the internal forces
+        and the material state to shared memory and starts
+        the worker processes.
+        """
+        for pattern in [self.domain.sparsity_pattern,
+                        self.domain.coupling_pattern]:
+            pattern.data = shared_zeros(pattern.nnz)
+        for block in self.domain.element_blocks:
+            block.material_state.share_memory()
+        n_dofs = len(self.domain.dof_table)
+        self.u = shared_zeros(n_dofs)
+        self.f_int = shared_zeros(n_dofs)
+        self.f_int_squared = shared_zeros(n_dofs)
+
+        self.pool = multiprocessing.Pool(self.n_workers,
+                                         initializer=_init_worker,
+                                         initargs=(self,))
+        logger.info("Started parallel assembly with %d processes and "
+                    "%d colors.", self.n_workers, len(self.tasks))
+
+    def _map(self, name, tasks):
+        self.pool.map(_call_worker, [(name,) + task for task in tasks],
+                      chunksize=1)
+
+
+class ThreadAssembler(ParallelAssembler):
+
+    """
+    Assembles with a pool of worker threads.
+
+    The threads share the domain with the main thread so nothing is
+    copied or pickled. Most of the work is done in large numpy
+    operations, such as the products of the B-matrices and the
+    constitutive matrices, which release the global interpreter
+    lock, so the threads run concurrently on several cores.
+    """
+
+    def start(self):
+        """
+        Starts the worker threads.
+        """
+        self.coordinates = self.domain._give_coordinates()
+        self.pool = ThreadPool(self.n_workers)
+        logger.info("Started parallel assembly with %d threads and "
+                    "%d colors.", self.n_workers, len(self.tasks))
+
+    def _map(self, name, tasks):
+        method = getattr(self, name)
+        self.pool.map(lambda task: method(*task), tasks, chunksize=1)
+
+
+#: The kinds of parallel assembly.
+assemblers = {"processes": ProcessAssembler,
+              "threads": ThreadAssembler}
+
+
+def _init_worker(assembler):
+    global _assembler
+    _assembler = assembler
+    assembler.coordinates = assembler.domain._give_coordinates()
+
+
+def _call_worker(task):
+    getattr(_assembler, task[0])(*task[1:])
+
+
+class ParallelAssemblyError(Exception):
+
+    """
+    Exception to raise when a domain can not be assembled in parallel.
+    """
+    pass
@@ -20,7 +20,31 @@ class GaussPoint(object):
         self.local_coords = local_coords
         self.weight = weight
 
-        self.material_status = None
+        # Set when the material state of the gauss point is stored
+        # in a `lolFem.materials.material_state.MaterialState`.
+        self.material_state = None
+        self.material_state_index = None
+
+        self._material_status = None
+
+    @property
+    def material_status(self):
+        """
+        The material status of the gauss point.
+
+        If the state is stored in a material state this is a
+        view of the row for this gauss point.
+        """
+        if self.material_state is not None:
+            return self.material_state.give_material_status(
+                self.material_state_index)
+        return self._material_status
+
+    @material_status.setter
+    def material_status(self, material_status):
+        self.material_state = None
+        self.material_state_index = None
+        self._material_status = material_status
 
     def update(self):
         """
@@ -5,9 +5,12 @@ File for the read_abaqus_mesh function.
 import re
 import logging
 
+import numpy as np
+
 from lolFem import elements
 from .element_set import ElementSet
 from lolFem.core.mesh import Mesh
+from lolFem.core import mesh_cache
 from lolFem.core.node import Node
 from .node_set import NodeSet
 
@@ -18,16 +21,32 @@ logger = logging.getLogger(__name__)
 element_translation = {"CPS3": "TrigPlaneStrain",
                        "CPS4R": "QuadPlaneStrain"}
 
+# Matches all keyword and comment lines.
+re_keyword_line = re.compile(r"^\*.*$", re.MULTILINE)
+
 
-def read_abaqus_mesh(filename, verbose=0):
+def read_abaqus_mesh(filename, verbose=0, cache=False):
     """
     Reads a .inp file generated by Abaqus and stores it into a
     `Mesh` class object.
 
+    The whole file is read at once and split into keyword
+    blocks. The data lines of each block are then converted
+    to numbers in one go with numpy instead of line by line.
+
+    With a cache, the mesh is saved in a binary format the first
+    time the file is read and later reads load the binary
+    arrays instead, see `lolFem.core.mesh_cache`. The cache is
+    rebuilt if the file has changed.
+
     filename : stromg
         The name of the file from where to read the mesh from.
     verbose: {0, 1, 2}
         Determines what level of print out to the console.
+    cache : bool or string
+        If True, the cache is stored in the directory given by
+        `lolFem.core.mesh_cache.give_cache_directory`. A string
+        is used as the cache directory.
 
     Returns
     =======
@@ -40,42 +59,135 @@ def read_abaqus_mesh(filename, verbose=0):
         If specific syntax errors are found.
     """
 
-    with open(filename, "rU") as f:
+    if cache:
+        if cache is True:
+            cache = mesh_cache.give_cache_directory(filename)
+        if mesh_cache.is_cache_valid(cache, filename):
+            logger.debug("Reading mesh from cache %s.", cache)
+            return mesh_cache.load_mesh(cache)
+        key = mesh_cache.give_file_key(filename)
 
-        # Read mesh objects
-        num_elems = 0
-        while True:
-            start_of_line = f.tell()
-            keyword = f.readline().strip().split(",")[0]
-            f.seek(start_of_line)
-
-            if keyword == "*Part":
-                mesh = _read_part(f, verbose)
-            elif keyword == "*Node":
-                _read_nodes(f, mesh, verbose)
+    with open(filename, "rU") as f:
+        text = f.read()
+
+    mesh = None
+    for line, data in _split_keyword_blocks(text):
+        keyword = line.split(",")[0]
+
+        if keyword == "*Part":
+            mesh = _read_part(line, verbose)
+        elif keyword == "*End Part":
+            break
+        elif keyword in ("*Node", "*Element", "*Elset", "*Nset"):
+            if mesh is None:
+                raise ReadInpFileError("Error parsing file. Found '" + line +
+                                       "' before '*Part, name=XXX'.")
+            if keyword == "*Node":
+                _read_nodes(line, data, mesh, verbose)
             elif keyword == "*Element":
-                num_elems += _read_elements(f, mesh, num_elems, verbose)
+                _read_elements(line, data, mesh, verbose)
             elif keyword == "*Elset":
-                _read_element_set(f, mesh, verbose)
-            elif keyword == "*Nset":
-                _read_node_set(f, mesh, verbose)
-            elif keyword == "*End Part":
-                break
+                _read_element_set(line, data, mesh, verbose)
             else:
-                f.readline()
-                continue
+                _read_node_set(line, data, mesh, verbose)
+
+    if cache and mesh is not None:
+        try:
+            mesh_cache.save_mesh(mesh, cache, key)
+        except (IOError, OSError) as e:
+            logger.warning("Could not write mesh cache %s: %s", cache, e)
+
+    return mesh
+
+
+def _split_keyword_blocks(text):
+    """
+    Splits the text of a file into keyword blocks.
+
+    Comment lines, starting with "**", end the data of
+    the previous keyword but are otherwise skipped.
+
+    Yields
+    ======
+    tuple of strings
+        The keyword line and the data lines following it.
+    """
+    matches = list(re_keyword_line.finditer(text))
+    for i, match in enumerate(matches):
+        line = match.group().strip()
+        if line.startswith("**"):
+            continue
+        if i + 1 < len(matches):
+            data = text[match.end():matches[i + 1].start()]
+        else:
+            data = text[match.end():]
+        yield line, data
+
+
+def _parse_numbers(data, n_columns=None):
+    """
+    Converts comma separated data lines to numbers.
+
+    Parameters
+    ==========
+    data : string
+        The data lines.
+    n_columns : int, optional
+        If given, the numbers are returned as a n_rows x n_columns
+        array.
+
+    Returns
+    =======
+    numpy.ndarray
+        The numbers as floats.
+
+    Raises
+    ======
+    ReadInpFileError
+        If the data is not made up of numbers or the number of
+        values does not fit in the columns.
+    """
+    # Empty fields make numpy stop parsing, so remove blank
+    # lines and trailing commas before joining the lines. White
+    # space is removed since numpy can misread a field that starts
+    # with white space followed by something that is not a number.
+    lines = [line.strip().rstrip(",") for line in data.splitlines()]
+    joined = "".join(",".join(line for line in lines if line).split())
+    if not joined:
+        values = np.zeros(0, dtype=np.float64)
+    else:
+        values = np.fromstring(joined, dtype=np.float64, sep=",")
+        if len(values) != joined.count(",") + 1:
+            raise ReadInpFileError("Error parsing file. Could not convert "
+                                   "the data '" + data[:80] + "...' "
+                                   "to numbers.")
+
+    if n_columns is None:
+        return values
+    if len(values) % n_columns != 0:
+        raise ReadInpFileError("Error parsing file. Expected {} values per "
+                               "row in '{}...'.".format(n_columns, data[:80]))
+    return values.reshape(-1, n_columns)
+
 
-        f.close()
-        return mesh
+def _count_columns(data):
+    """
+    Gives the number of comma separated values in the first
+    non empty data line.
+    """
+    for line in data.splitlines():
+        line = line.strip().rstrip(",")
+        if line:
+            return line.count(",") + 1
+    return 1
 
 
-def _read_part(f, verbose):
+def _read_part(line, verbose):
     """
     Reads the part name and creates a mesh.
     """
 
     re_part = re.compile("\*Part, name=(.*)")
-    line = f.readline()
     match = re_part.match(line)
     if not match:
         raise ReadInpFileError("Error parsing file. Expected '*Part, "
@@ -84,84 +196,90 @@ def _read_part(f, verbose):
     return Mesh()
 
 
-def _read_nodes(f, mesh, verbose):
+def _read_nodes(line, data, mesh, verbose):
     """
     Reads nodes from the file.
     """
-    line = f.readline()
-    if not (line == "*Node\n"):
+    if not (line == "*Node"):
         raise ReadInpFileError("\nError parsing file. Expected '*Node',"
                                " read '" + line + "'.")
 
-    num_nodes = 0
-    while True:
-        start_of_line = f.tell()
-        line = f.readline()
-        if line.strip() == '':
-            continue
-        if line[0] == '*':
-            f.seek(start_of_line)
-            return
-        num_nodes += 1
-        if verbose == 1:
-            print ("\rReading nodes, %d nodes read" % num_nodes),
-        node_numbers = [to_number(x) for x in line.strip().split(',')]
-        node = Node(node_numbers[0], node_numbers[1:])
+    values = _parse_numbers(data, _count_columns(data))
+    node_ids = values[:, 0].astype(np.int64).tolist()
+    coordinates = values[:, 1:].tolist()
+    if verbose == 1:
+        print ("\rReading nodes, %d nodes read" % len(node_ids)),
+
+    for node_id, coords in zip(node_ids, coordinates):
+        node = Node(node_id, coords)
         mesh.add_node(node)
         if verbose == 2:
             print ("Read {0}.\n".format(node))
 
 
-def _read_elements(f, mesh, num_elems, verbose):
+def _read_elements(line, data, mesh, verbose):
     """
     Reads elements from the file.
     """
-    line = f.readline()
     re_element = re.compile("\*Element, type=(.*)")
     match = re_element.match(line)
     if not match:
         raise ReadInpFileError("\nError parsing file. Expected '*Element, \
         type=XXX', got '" + line + "'.")
 
-    element_name = re_element.match(line).group(1)
-    while True:
-        start_of_line = f.tell()
-        line = f.readline()
-        if line.strip() == '':
-            continue
-        if line[0] == '*':
-            f.seek(start_of_line)
-            return num_elems
-        num_elems += 1
-        if verbose == 1:
-            print ("\rReading element %s, with id %d."
-                   % (element_name, num_elems)),
+    element_name = match.group(1)
+    values = _parse_numbers(data, _count_columns(data)).astype(np.int64)
+    if verbose == 1:
+        print ("\rReading %d elements of type %s."
+               % (len(values), element_name)),
 
-        element_numbers = map(to_number, line.strip().split(','))
+    try:
+        element_name_lolfem = element_translation[element_name]
+    except KeyError:
+        print ("ERROR: Unknown element: " + element_name + ", ignoring...")
+        return
 
-        try:
-            element_name_lolfem = element_translation[element_name]
-        except KeyError:
-            print ("ERROR: Unknown element: " + element_name + ", ignoring...")
-        else:
-            element_class = getattr(elements, element_name_lolfem)
-            # Section number
-            element = element_class(element_numbers[0], element_numbers[1:])
-            mesh.add_element(element)
+    element_class = getattr(elements, element_name_lolfem)
+    element_ids = values[:, 0].tolist()
+    vertices = values[:, 1:].tolist()
+    for element_id, element_vertices in zip(element_ids, vertices):
+        element = element_class(element_id, element_vertices)
+        mesh.add_element(element)
 
 
-def _read_element_set(f, mesh, verbose=0):
+def _read_ids(set_name, data):
+    """
+    Reads the identifiers in a set, expanding them if the
+    set is given with the generate option.
+
+    Returns
+    =======
+    list
+        The first item is the name of the set without
+        the generate option, the second item is a list
+        of the identifiers.
+    """
+    if set_name.endswith("generate"):
+        generate_info = _parse_numbers(data).astype(np.int64)
+        if len(generate_info) < 3:
+            raise ReadInpFileError("Error parsing file. Expected 'start, "
+                                   "stop, step' for set '" + set_name + "'.")
+        start, stop, step = generate_info[0:3]
+        return [set_name[0:-10], range(start, stop + 1, step)]
+    return [set_name, _parse_numbers(data).astype(np.int64).tolist()]
+
+
+def _read_element_set(line, data, mesh, verbose=0):
     """
     Reads element sets from the file.
     """
-    line = f.readline()
     re_element_set = re.compile("\*Elset, elset=(.*)")
     match = re_element_set.match(line)
     if not match:
         raise ReadInpFileError("Error parsing file. Expected '*Elset, "
                                "elset=X', got '" + line + "'.")
 
-    element_set_name = re_element_set.match(line).group(1)
+    element_set_name = match.group(1)
 
     if element_set_name.startswith("face"):
         dim = 2
@@ -172,76 +290,29 @@ def _read_element_set(f, mesh, verbose=0):
     if verbose == 1 or verbose == 2:
         print ("\rReading element set {0:s}.".format(element_set_name)),
 
-    full_str = ""
-    if element_set_name.endswith("generate"):
-        element_set_name = element_set_name[0:-10]
-        element_set = ElementSet(element_set_name, dim)
-        line = f.readline().strip()
-        generate_info = map(to_number, line.split(','))
-        start, stop, step = generate_info[
-            0], generate_info[1], generate_info[2]
-        element_set.ids = range(start, stop + 1, step)
-        mesh.element_sets[element_set_name] = element_set
-        return
-    else:
-        element_set = ElementSet(element_set_name, dim)
-        while True:
-            start_of_line = f.tell()
-            line = f.readline()
-            if line.strip() == '':
-                continue
-            if line[0] == '*':
-                element_list = full_str.split(',')
-                element_list = [item for item in element_list if item]
-                element_set.ids = map(to_number, element_list)
-                mesh.element_sets[element_set_name] = element_set
-                f.seek(start_of_line)
-                return
-                # Read element ids until empty line
-            full_str += line.strip() + ","
-
-
-def _read_node_set(f, mesh, verbose=0):
+    element_set_name, ids = _read_ids(element_set_name, data)
+    element_set = ElementSet(element_set_name, dim)
+    element_set.ids = ids
+    mesh.element_sets[element_set_name] = element_set
+
+
+def _read_node_set(line, data, mesh, verbose=0):
     """
     Reads node sets from the file.
     """
-    line = f.readline()
     re_node_set = re.compile("\*Nset, nset=(.*)")
     match = re_node_set.match(line)
     if not match:
         raise ReadInpFileError("Error parsing file. Expected '*Nset, "
                                "nset=X', got '" + line + "'.")
-    node_set_name = re_node_set.match(line).group(1)
+    node_set_name = match.group(1)
     if verbose == 1 or verbose == 2:
         print ("\rReading node set {0:s}.".format(node_set_name)),
-    full_str = ""
-    if node_set_name.endswith("generate"):
-        node_set_name = node_set_name[0:-10]
-        node_set = NodeSet(node_set_name)
-        line = f.readline().strip()
-        generate_info = map(to_number, line.split(','))
-        start, stop, step = generate_info[
-            0], generate_info[1], generate_info[2]
-        node_set.ids = range(start, stop + 1, step)
-        mesh.node_sets[node_set_name] = node_set
-        return
-    else:
-        node_set = NodeSet(node_set_name)
-        while True:
-            start_of_line = f.tell()
-            line = f.readline()
-            if line.strip() == '':
-                continue
-            if line[0] == '*':
-                # Remove empty strings
-                node_list = full_str.split(',')
-                # Remove empty strings
-                node_list = [item for item in node_list if item]
-                node_set.ids = map(to_number, node_list)
-                mesh.node_sets[node_set_name] = node_set
-                f.seek(start_of_line)
-                return
-            full_str += line.strip() + ","
+
+    node_set_name, ids = _read_ids(node_set_name, data)
+    node_set = NodeSet(node_set_name)
+    node_set.ids = ids
+    mesh.node_sets[node_set_name] = node_set
 
 
 class ReadInpFileError(Exception):
@@ -250,24 +321,3 @@ class ReadInpFileError(Exception):
     Exception to raise on reading errors.
     """
     pass
-
-
-def to_number(number):
-    """
-    Converts a string to a int if possible, else a float.
-
-    Parameters
-    ==========
-    number: string
-        The string to convert to a number
-
-    Returns
-    =======
-    int or float
-        Depending on the format of the string.
-
-    """
-    try:
-        return int(number)
-    except ValueError:
-        return float(number)
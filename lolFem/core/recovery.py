@@ -0,0 +1,427 @@
+"""
+File for recovering fields in the gauss points, such as the stress
+and the strain, in the nodes.
+"""
+
+from collections import OrderedDict
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def give_interpolation_matrix(element):
+    """
+    Gives the values of the shape functions of an element
+    in its gauss points.
+
+    Parameters
+    ==========
+    element : `lolFem.elements.element.Element`
+        An element of the type to interpolate for.
+
+    Returns
+    =======
+    numpy.ndarray
+        n_gausspoints x n_vertices array.
+    """
+    return np.array([element.interpolator.eval_N(gp.local_coords)
+                     for gp in element.integrator.gausspoints],
+                    dtype=np.float64)
+
+
+def give_extrapolation_matrix(element):
+    """
+    Gives the matrix that extrapolates values in the gauss points
+    of an element to its vertices.
+
+    The values in the gauss points are seen as interpolated from
+    values in the vertices with the shape functions of the element,
+    :math:`\mathbf{v}_{gp} = \mathbf{N} \mathbf{v}_{node}`, and the
+    values in the vertices are the least squares solution to this
+    system. If there are as many gauss points as vertices this is the
+    usual extrapolation with the inverse of :math:`\mathbf{N}` and for
+    an element with one gauss point the value is constant over
+    the element.
+
+    Parameters
+    ==========
+    element : `lolFem.elements.element.Element`
+        An element of the type to extrapolate for.
+
+    Returns
+    =======
+    numpy.ndarray
+        n_vertices x n_gausspoints array.
+    """
+    return np.linalg.pinv(give_interpolation_matrix(element))
+
+
+def sum_into_nodes(nodes, values, n_nodes):
+    """
+    Sums values into the nodes they belong to.
+
+    All components are summed with a single `numpy.bincount`
+    by giving every component of every node its own bin.
+
+    Parameters
+    ==========
+    nodes : numpy.ndarray
+        The node index of each value.
+    values : numpy.ndarray
+        Array where the first axis has the same length as `nodes`.
+    n_nodes : int
+        The number of nodes.
+
+    Returns
+    =======
+    numpy.ndarray
+        Array with `n_nodes` as first axis and the
+        rest of the axes of `values`.
+    """
+    shape = values.shape[1:]
+    n_components = int(np.prod(shape))
+    bins = (nodes[:, np.newaxis] * n_components +
+            np.arange(n_components)).ravel()
+    sums = np.bincount(bins, weights=values.ravel(),
+                       minlength=n_nodes * n_components)
+    return sums.reshape((n_nodes,) + shape)
+
+
+class NodalRecovery(object):
+
+    """
+    Recovers fields in the nodes by extrapolating the values in the
+    gauss points to the vertices of each element and averaging the
+    contributions from all elements sharing a node.
+
+    The extrapolation matrices are computed once for each
+    element type and the averages for all element blocks are
+    computed with a single `numpy.bincount` over the vertices of
+    the elements.
+    """
+
+    def __init__(self, element_blocks, n_nodes, coordinates=None):
+        """
+        Parameters
+        ==========
+        element_blocks : list of `lolFem.core.element_block.ElementBlock`
+            The element blocks with their material state created.
+        n_nodes : int
+            The number of nodes in the mesh.
+        coordinates : numpy.ndarray, optional
+            n_nodes x 2 array with the coordinates of the nodes. If
+            given, the contribution of each element is weighted with
+            its volume, otherwise all elements have the same weight.
+        """
+        self.element_blocks = element_blocks
+        self.n_nodes = n_nodes
+        self.volume_weighted = coordinates is not None
+
+        #: The extrapolation matrix for each element type,
+        #: see `give_extrapolation_matrix`.
+        self.extrapolation_matrices = {}
+        for block in element_blocks:
+            element_type = type(block.prototype)
+            if element_type not in self.extrapolation_matrices:
+                self.extrapolation_matrices[element_type] = \
+                    give_extrapolation_matrix(block.prototype)
+
+        weights = []
+        for block in element_blocks:
+            if coordinates is None:
+                w = np.ones(len(block), dtype=np.float64)
+            else:
+                w = np.sum(block.compute_B(coordinates)[1], axis=1)
+            weights.append(np.repeat(w, block.vertices.shape[1]))
+        vertices = np.concatenate([block.vertices.ravel()
+                                   for block in element_blocks])
+        weights = np.concatenate(weights)
+
+        #: The weight of each contribution, element by element
+        #: and vertex by vertex.
+        self.weights = weights
+        self.vertices = vertices
+        self.weight_sums = np.bincount(vertices, weights=weights,
+                                       minlength=n_nodes)
+
+    def recover(self, name, n_components=4):
+        """
+        Recovers a field of the committed material state in the nodes.
+
+        Parameters
+        ==========
+        name : str
+            The name of the field in the material state,
+            for example "stress" or "strain".
+        n_components : int
+            The number of components of the field.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_nodes x n_components array. Nodes without any
+            elements get zeros.
+        """
+        values = []
+        for block in self.element_blocks:
+            E = self.extrapolation_matrices[type(block.prototype)]
+            gp_values = block.material_state.committed[name].reshape(
+                len(block), block.n_gausspoints, n_components)
+            node_values = np.einsum("vg,egc->evc", E, gp_values)
+            values.append(node_values.reshape(-1, n_components))
+        values = np.concatenate(values) * self.weights[:, np.newaxis]
+        sums = sum_into_nodes(self.vertices, values, self.n_nodes)
+
+        used = self.weight_sums > 0.0
+        sums[used] /= self.weight_sums[used, np.newaxis]
+        return sums
+
+
+class PatchRecovery(object):
+
+    """
+    Superconvergent patch recovery (SPR) of fields in the gauss
+    points, as described by Zienkiewicz and Zhu [1].
+
+    For every node a linear polynomial in the coordinates is fitted
+    in the least squares sense to the values in the gauss points of
+    the elements around the node, the patch of the node. The fitted
+    polynomial is evaluated in the vertices of the elements in the
+    patch and the values in a node are the average from all patches
+    it is in. This also gives values in the nodes on the boundary,
+    where the patches often have too few gauss points for a fit.
+
+    The fields are in general discontinuous between different
+    materials, so the elements are grouped by their section and
+    each group is recovered separately, see `recover_groups`. Nodes
+    that are not in any patch with enough gauss points get the
+    average of the values extrapolated from the elements,
+    see `NodalRecovery`.
+
+    The least squares matrices only depend on the geometry so they
+    are computed once and the recovery for all patches is done
+    with stacked numpy arrays.
+
+    .. [1] O. C. Zienkiewicz and J. Z. Zhu, The superconvergent patch
+       recovery and a posteriori error estimates. Part 1: The recovery
+       technique, Int. J. Numer. Meth. Engng. 33, 1331-1364 (1992).
+    """
+
+    #: Patches with a least squares matrix with a smaller ratio
+    #: between its smallest and largest eigenvalue are not used.
+    min_eigenvalue_ratio = 1e-8
+
+    def __init__(self, element_blocks, coordinates):
+        """
+        Parameters
+        ==========
+        element_blocks : list of `lolFem.core.element_block.ElementBlock`
+            The element blocks with their material state created.
+        coordinates : numpy.ndarray
+            n_nodes x 2 array with the coordinates of the nodes.
+        """
+        self.element_blocks = element_blocks
+        self.n_nodes = len(coordinates)
+
+        #: The interpolation matrix of each block,
+        #: see `give_interpolation_matrix`.
+        self.interpolation_matrices = [
+            give_interpolation_matrix(block.prototype)
+            for block in element_blocks]
+
+        groups = OrderedDict()
+        for i, block in enumerate(element_blocks):
+            groups.setdefault(id(block.section), []).append(i)
+
+        #: The indices of the blocks in each group.
+        self.groups = groups.values()
+        self._patches = [self._create_patches(group, coordinates)
+                         for group in self.groups]
+
+    def _create_patches(self, group, coordinates):
+        """
+        Computes the least squares matrices of the patches of all
+        nodes in a group of blocks.
+
+        The polynomial of a patch is expressed in the coordinates
+        relative to the node of the patch scaled by the size of the
+        patch, so that the matrices are well conditioned.
+        """
+        n_nodes = self.n_nodes
+        dx_gps, dx_vertices = [], []
+        for i in group:
+            block = self.element_blocks[i]
+            coords = coordinates[block.vertices]
+            gp_coords = np.einsum("gv,evk->egk",
+                                  self.interpolation_matrices[i], coords)
+            # The coordinates of the gauss points and the vertices
+            # relative to each vertex, n_elements x n_vertices x
+            # n_gausspoints (n_vertices) x 2.
+            dx_gps.append(gp_coords[:, np.newaxis] - coords[:, :, np.newaxis])
+            dx_vertices.append(coords[:, np.newaxis] -
+                               coords[:, :, np.newaxis])
+
+        size = np.zeros(n_nodes, dtype=np.float64)
+        for i, dx in zip(group, dx_vertices):
+            vertices = self.element_blocks[i].vertices
+            np.maximum.at(size, vertices.ravel(),
+                          np.abs(dx).max(axis=(2, 3)).ravel())
+        size[size == 0.0] = 1.0
+
+        A = np.zeros((n_nodes, 3, 3), dtype=np.float64)
+        n_points = np.zeros(n_nodes, dtype=np.int64)
+        P, Q = [], []
+        for i, dx_gp, dx_vertex in zip(group, dx_gps, dx_vertices):
+            vertices = self.element_blocks[i].vertices
+            scale = size[vertices][:, :, np.newaxis, np.newaxis]
+            P.append(_linear_polynomial(dx_gp / scale))
+            Q.append(_linear_polynomial(dx_vertex / scale))
+            A += sum_into_nodes(vertices.ravel(),
+                                np.einsum("evgi,evgj->evij",
+                                          P[-1], P[-1]).reshape(-1, 3, 3),
+                                n_nodes)
+            n_points += np.bincount(vertices.ravel(), minlength=n_nodes) * \
+                self.element_blocks[i].n_gausspoints
+
+        valid = n_points >= 3
+        eigenvalues = np.linalg.eigvalsh(A[valid])
+        valid[valid] = (eigenvalues[:, 0] >
+                        self.min_eigenvalue_ratio * eigenvalues[:, -1])
+
+        fallback = NodalRecovery([self.element_blocks[i] for i in group],
+                                 n_nodes)
+        return {"A": A[valid], "valid": valid, "P": P, "Q": Q,
+                "fallback": fallback}
+
+    def recover_groups(self, name, n_components=4):
+        """
+        Recovers a field of the committed material state in the nodes
+        for each group of blocks with the same section.
+
+        Parameters
+        ==========
+        name : str
+            The name of the field in the material state,
+            for example "stress".
+        n_components : int
+            The number of components of the field.
+
+        Returns
+        =======
+        list of numpy.ndarray
+            For each group in `groups`, a n_nodes x n_components array
+            with the values in the nodes. Nodes without any
+            elements in the group get zeros.
+        """
+        values = []
+        for group, patches in zip(self.groups, self._patches):
+            n_nodes = self.n_nodes
+            gp_values = [self.element_blocks[i].material_state.committed[name]
+                         .reshape(len(self.element_blocks[i]), -1,
+                                  n_components) for i in group]
+
+            # Fit the polynomials.
+            b = np.zeros((n_nodes, 3, n_components), dtype=np.float64)
+            for i, P, gp_value in zip(group, patches["P"], gp_values):
+                Pb = np.matmul(P.swapaxes(2, 3), gp_value[:, np.newaxis])
+                b += sum_into_nodes(self.element_blocks[i].vertices.ravel(),
+                                    Pb.reshape(-1, 3, n_components), n_nodes)
+            valid = patches["valid"]
+            a = np.zeros((n_nodes, 3, n_components), dtype=np.float64)
+            a[valid] = np.linalg.solve(patches["A"], b[valid])
+
+            # Evaluate them in the vertices of the elements in the patches.
+            sums = np.zeros((n_nodes, n_components), dtype=np.float64)
+            counts = np.zeros(n_nodes, dtype=np.float64)
+            for i, Q in zip(group, patches["Q"]):
+                vertices = self.element_blocks[i].vertices
+                in_patch = valid[vertices].astype(np.float64)
+                node_values = np.matmul(Q, a[vertices])
+                node_values *= in_patch[:, :, np.newaxis, np.newaxis]
+                node_values = node_values.sum(axis=1)
+                sums += sum_into_nodes(vertices.ravel(),
+                                       node_values.reshape(-1, n_components),
+                                       n_nodes)
+                n_patches = np.broadcast_to(
+                    in_patch.sum(axis=1)[:, np.newaxis], vertices.shape)
+                counts += np.bincount(vertices.ravel(),
+                                      weights=n_patches.ravel(),
+                                      minlength=n_nodes)
+
+            group_values = patches["fallback"].recover(name, n_components)
+            fitted = counts > 0.0
+            group_values[fitted] = sums[fitted] / counts[fitted, np.newaxis]
+            values.append(group_values)
+        return values
+
+    def recover(self, name, n_components=4):
+        """
+        Recovers a field of the committed material state in the nodes.
+
+        Nodes in elements with different sections get the average of
+        the values from each section, see `recover_groups`.
+
+        Parameters
+        ==========
+        name : str
+            The name of the field in the material state.
+        n_components : int
+            The number of components of the field.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_nodes x n_components array.
+        """
+        sums = np.zeros((self.n_nodes, n_components), dtype=np.float64)
+        counts = np.zeros(self.n_nodes, dtype=np.float64)
+        for patches, values in zip(self._patches,
+                                   self.recover_groups(name, n_components)):
+            in_group = patches["fallback"].weight_sums > 0.0
+            sums[in_group] += values[in_group]
+            counts += in_group
+        used = counts > 0.0
+        sums[used] /= counts[used, np.newaxis]
+        return sums
+
+    def recover_in_gausspoints(self, name, n_components=4):
+        """
+        Gives the recovered field in the gauss points, interpolated
+        with the shape functions from the values in the nodes
+        recovered for the section of each element.
+
+        Parameters
+        ==========
+        name : str
+            The name of the field in the material state.
+        n_components : int
+            The number of components of the field.
+
+        Returns
+        =======
+        list of numpy.ndarray
+            For each element block, a n_elements x n_gausspoints x
+            n_components array.
+        """
+        values = [None] * len(self.element_blocks)
+        for group, group_values in zip(self.groups,
+                                       self.recover_groups(name,
+                                                           n_components)):
+            for i in group:
+                vertices = self.element_blocks[i].vertices
+                values[i] = np.einsum("gv,evc->egc",
+                                      self.interpolation_matrices[i],
+                                      group_values[vertices])
+        return values
+
+
+def _linear_polynomial(dx):
+    """
+    Gives the terms [1, x, y] of a linear polynomial
+    in the coordinates in the last axis of `dx`.
+    """
+    P = np.ones(dx.shape[:-1] + (3,), dtype=np.float64)
+    P[..., 1:] = dx
+    return P
@@ -0,0 +1,109 @@
+"""
+File for renumbering the equations to reduce the bandwidth
+and the profile of the stiffness matrix.
+"""
+
+import logging
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+logger = logging.getLogger(__name__)
+
+
+def give_node_graph(element_blocks, n_nodes):
+    """
+    Gives the graph of the nodes where two nodes are
+    connected if they are in the same element.
+
+    Parameters
+    ==========
+    element_blocks : list of `lolFem.core.element_block.ElementBlock`
+        The element blocks.
+    n_nodes : int
+        The number of nodes in the mesh.
+
+    Returns
+    =======
+    scipy.sparse.csr_matrix
+        n_nodes x n_nodes symmetric adjacency matrix.
+    """
+    rows, cols = [], []
+    for block in element_blocks:
+        n_vertices = block.vertices.shape[1]
+        rows.append(np.repeat(block.vertices, n_vertices, axis=1).ravel())
+        cols.append(np.tile(block.vertices, (1, n_vertices)).ravel())
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    graph = sparse.coo_matrix((np.ones(len(rows), dtype=np.int8),
+                               (rows, cols)), shape=(n_nodes, n_nodes))
+    return graph.tocsr()
+
+
+def give_rcm_node_order(element_blocks, n_nodes):
+    """
+    Gives the reverse Cuthill-McKee ordering [1] of the nodes,
+    computed from the connectivity of the elements.
+
+    .. [1] http://en.wikipedia.org/wiki/Cuthill%E2%80%93McKee_algorithm
+
+    Parameters
+    ==========
+    element_blocks : list of `lolFem.core.element_block.ElementBlock`
+        The element blocks.
+    n_nodes : int
+        The number of nodes in the mesh.
+
+    Returns
+    =======
+    numpy.ndarray
+        The node indices in the new order.
+    """
+    graph = give_node_graph(element_blocks, n_nodes)
+    return reverse_cuthill_mckee(graph, symmetric_mode=True).astype(np.int64)
+
+
+def compute_bandwidth_and_profile(equation_numbers):
+    """
+    Computes the bandwidth and the profile of the stiffness matrix
+    from the equation numbers of the elements.
+
+    The bandwidth is the largest distance from the diagonal of a
+    non zero entry. The profile is the number of entries in the lower
+    triangle between the first non zero entry of each row and the
+    diagonal.
+
+    Parameters
+    ==========
+    equation_numbers : list of numpy.ndarray
+        One n_elements x n_dofs array for each element block with
+        the equation numbers of the dofs in the elements. Dofs with
+        non positive equation numbers are not included.
+
+    Returns
+    =======
+    list of ints
+        The bandwidth and the profile.
+    """
+    eqs, row_mins = [], []
+    bandwidth = 0
+    for eq in equation_numbers:
+        free = eq > 0
+        eq_max = np.where(free, eq, 0).max(axis=1)
+        eq_min = np.where(free, eq, np.iinfo(eq.dtype).max).min(axis=1)
+        has_free = np.any(free, axis=1)
+        if np.any(has_free):
+            bandwidth = max(bandwidth,
+                            int(np.max(eq_max[has_free] - eq_min[has_free])))
+        eqs.append(eq[free])
+        row_mins.append(np.broadcast_to(eq_min[:, np.newaxis], eq.shape)[free])
+    eqs = np.concatenate(eqs)
+    row_mins = np.concatenate(row_mins)
+
+    # The smallest column in each row is the first entry for the row
+    # when sorted by row and then by column.
+    order = np.lexsort((row_mins, eqs))
+    rows, first = np.unique(eqs[order], return_index=True)
+    profile = int(np.sum(rows - row_mins[order][first]))
+    return [bandwidth, profile]
@@ -0,0 +1,310 @@
+"""
+File for the linear solvers used to solve the equation
+systems Ku = f in the nonlinear solvers.
+"""
+
+from abc import ABCMeta, abstractmethod
+import logging
+import time
+
+from scipy.sparse.linalg import splu, cg, minres, gmres
+
+from .preconditioners import preconditioners
+
+logger = logging.getLogger(__name__)
+
+
+class LinearSolver(object):
+
+    """
+    Base class for linear solvers.
+
+    After each call to `solve_eq` the number of iterations and the
+    time spent is stored in `n_iterations` and `solve_time`. The
+    totals over all calls are stored in `total_iterations`,
+    `total_solve_time` and `n_solves`.
+    """
+    __metaclass__ = ABCMeta
+
+    def __init__(self):
+        self.n_equations = 0
+        self.n_iterations = 0
+        self.solve_time = 0.0
+        self.total_iterations = 0
+        self.total_solve_time = 0.0
+        self.n_solves = 0
+
+    def solve_eq(self, K, f):
+        """
+        Solves the equation system Ku = f.
+
+        Parameters
+        ==========
+        K : scipy.sparse.csr_matrix
+            The matrix.
+        f : numpy.ndarray
+            The right hand side.
+
+        Returns
+        =======
+        numpy.ndarray
+            The solution u.
+        """
+        start_t = time.time()
+        u, n_iterations = self._solve(K, f)
+        self._record(n_iterations, time.time() - start_t)
+        return u
+
+    @abstractmethod
+    def _solve(self, K, f):
+        """
+        Solves the equation system and returns a list with the
+        solution and the number of iterations used.
+        """
+        pass
+
+    def _record(self, n_iterations, solve_time):
+        self.n_iterations = n_iterations
+        self.solve_time = solve_time
+        self.total_iterations += n_iterations
+        self.total_solve_time += solve_time
+        self.n_solves += 1
+        logger.debug("%s solved %d equations in %d iterations and %f s.",
+                     type(self).__name__, self.n_equations, n_iterations,
+                     solve_time)
+
+    def __str__(self):
+        return ("{} with {} solves, {} iterations and {:.3f} s in "
+                "total.".format(type(self).__name__, self.n_solves,
+                                self.total_iterations,
+                                self.total_solve_time))
+
+
+class DirectSolver(LinearSolver):
+
+    """
+    Sparse LU factorization with SuperLU.
+    """
+
+    def __init__(self, permc_spec="COLAMD"):
+        """
+        Parameters
+        ==========
+        permc_spec : {"COLAMD", "MMD_AT_PLUS_A", "MMD_ATA", "NATURAL"}
+            The column ordering used to reduce fill in.
+            For symmetric matrices "MMD_AT_PLUS_A" is often the best.
+        """
+        super(DirectSolver, self).__init__()
+        self.permc_spec = permc_spec
+
+    def factorize(self, K):
+        """
+        Computes the LU factorization of a matrix.
+
+        Parameters
+        ==========
+        K : scipy.sparse.csr_matrix
+            The matrix.
+
+        Returns
+        =======
+        scipy.sparse.linalg.SuperLU
+            The factorization, call its `solve` method to solve
+            equation systems.
+        """
+        return splu(K.tocsc(), permc_spec=self.permc_spec)
+
+    def _solve(self, K, f):
+        self.n_equations = K.shape[0]
+        return [self.factorize(K).solve(f), 1]
+
+
+class IterativeSolver(LinearSolver):
+
+    """
+    Base class for the preconditioned Krylov solvers.
+    """
+
+    def __init__(self, preconditioner=None, tol=1e-10, maxiter=None):
+        """
+        Parameters
+        ==========
+        preconditioner : str or
+                         `lolFem.core.solvers.preconditioners.Preconditioner`,
+                         optional
+            The preconditioner or the name of one in
+            `lolFem.core.solvers.preconditioners.preconditioners`.
+        tol : float
+            Relative tolerance of the residual.
+        maxiter : int, optional
+            Max number of iterations.
+        """
+        super(IterativeSolver, self).__init__()
+        if isinstance(preconditioner, basestring):
+            preconditioner = give_preconditioner(preconditioner)
+        self.preconditioner = preconditioner
+        self.tol = tol
+        self.maxiter = maxiter
+
+    def _solve(self, K, f):
+        self.n_equations = K.shape[0]
+        M = None
+        if self.preconditioner is not None:
+            M = self.preconditioner.create(K)
+
+        iterations = [0]
+
+        def callback(xk):
+            iterations[0] += 1
+
+        u, info = self._iterate(K, f, M, callback)
+        if info > 0:
+            logger.warning("%s did not converge in %d iterations.",
+                           type(self).__name__, info)
+        elif info < 0:
+            raise LinearSolverError(
+                "{} failed with illegal input or breakdown, "
+                "info = {}".format(type(self).__name__, info))
+        return [u, iterations[0]]
+
+    @abstractmethod
+    def _iterate(self, K, f, M, callback):
+        """
+        Runs the Krylov method and returns a list with the
+        solution and the convergence info from scipy.
+        """
+        pass
+
+
+class CGSolver(IterativeSolver):
+
+    """
+    Preconditioned conjugate gradient method. Requires the matrix
+    and the preconditioner to be symmetric positive definite.
+    """
+
+    def _iterate(self, K, f, M, callback):
+        return cg(K, f, tol=self.tol, maxiter=self.maxiter, M=M,
+                  callback=callback, atol=0.0)
+
+
+class MINRESSolver(IterativeSolver):
+
+    """
+    Preconditioned minimum residual method. Requires the matrix to be
+    symmetric and the preconditioner to be symmetric positive definite.
+    """
+
+    def _iterate(self, K, f, M, callback):
+        return minres(K, f, tol=self.tol, maxiter=self.maxiter, M=M,
+                      callback=callback)
+
+
+class GMRESSolver(IterativeSolver):
+
+    """
+    Restarted preconditioned generalized minimum residual method.
+    Works for non symmetric matrices.
+    """
+
+    def __init__(self, preconditioner=None, tol=1e-10, maxiter=None,
+                 restart=50):
+        """
+        Parameters
+        ==========
+        restart : int
+            Number of iterations between restarts.
+
+        See `IterativeSolver` for the other parameters.
+        """
+        super(GMRESSolver, self).__init__(preconditioner, tol, maxiter)
+        self.restart = restart
+
+    def _iterate(self, K, f, M, callback):
+        # The callback is called with the residual norm
+        # every inner iteration.
+        return gmres(K, f, tol=self.tol, restart=self.restart,
+                     maxiter=self.maxiter, M=M, callback=callback, atol=0.0)
+
+
+class LinearSolverError(Exception):
+
+    """
+    Exception to raise when a linear solver fails.
+    """
+    pass
+
+
+class UnknownLinearSolverError(Exception):
+
+    """
+    Exception to raise when an unknown linear solver or
+    preconditioner is asked for.
+    """
+    pass
+
+
+#: The available linear solvers
+linear_solvers = {"direct": DirectSolver,
+                  "cg": CGSolver,
+                  "minres": MINRESSolver,
+                  "gmres": GMRESSolver}
+
+
+def give_linear_solver(name, **kwargs):
+    """
+    Creates a linear solver from its name.
+
+    Parameters
+    ==========
+    name : {"direct", "cg", "minres", "gmres"}
+        The name of the linear solver.
+    kwargs :
+        Passed on to the linear solver, for example
+        `preconditioner="jacobi"`.
+
+    Returns
+    =======
+    `LinearSolver`
+
+    Raises
+    ======
+    UnknownLinearSolverError
+        If there is no linear solver with the name.
+    """
+    try:
+        solver_class = linear_solvers[name]
+    except KeyError:
+        raise UnknownLinearSolverError(
+            "Unknown linear solver: {}, available are {}".format(
+                name, sorted(linear_solvers)))
+    return solver_class(**kwargs)
+
+
+def give_preconditioner(name, **kwargs):
+    """
+    Creates a preconditioner from its name.
+
+    Parameters
+    ==========
+    name : {"jacobi", "ilu", "amg"}
+        The name of the preconditioner.
+    kwargs :
+        Passed on to the preconditioner.
+
+    Returns
+    =======
+    `lolFem.core.solvers.preconditioners.Preconditioner`
+
+    Raises
+    ======
+    UnknownLinearSolverError
+        If there is no preconditioner with the name.
+    """
+    try:
+        preconditioner_class = preconditioners[name]
+    except KeyError:
+        raise UnknownLinearSolverError(
+            "Unknown preconditioner: {}, available are {}".format(
+                name, sorted(preconditioners)))
+    return preconditioner_class(**kwargs)
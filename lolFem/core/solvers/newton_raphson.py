@@ -4,6 +4,7 @@ import numpy as np
 
 from lolFem.core.solvers.solver import Solver
 from .numpy_linalg_sp_solve import NumpyLinalgSpSolve
+from .linear_solvers import give_linear_solver, DirectSolver
 from lolFem import logger
 
 logger = logging.getLogger(__name__)
@@ -12,10 +13,37 @@ logger = logging.getLogger(__name__)
 class Newton(Solver):
 
     """
-    Implements a full Newton-Raphson solver. No line searching is done.
+    Implements a Newton-Raphson solver. No line searching is done.
+
+    Apart from the full Newton method, where the stiffness matrix is
+    assembled and factorized in every iteration, there are modes
+    that reuse a factorization of the stiffness matrix:
+
+    - "modified": The factorization is reused over iterations and time
+      steps and is only recomputed when the convergence slows down.
+    - "initial": The factorization of the initial stiffness matrix is
+      used for the whole analysis.
+    - "bfgs": Like "modified" but the inverse of the factorized matrix
+      is improved with BFGS updates [1] in the iterations of a time step.
+
+    With `predictor`, each time step starts with a predictor where the
+    change of the prescribed values is applied through the coupling
+    matrix K_fp at the state of the last time step:
+
+    .. math:: \mathbf{K}_{ff} \Delta \mathbf{u}_f = \mathbf{f}_{ext} -
+              \mathbf{f}_{int} - \mathbf{K}_{fp} \Delta \mathbf{u}_p
+
+    For a linear problem this gives the solution in one solve, and
+    for a nonlinear problem the iterations start from a displacement
+    field that is smooth also close to the prescribed dofs.
+
+    .. [1] H. Matthies and G. Strang, The solution of nonlinear finite
+           element equations, IJNME 14 (1979) 1613-1626.
     """
 
-    def __init__(self, rel_tol, miter, f_to_break=10e-4):
+    def __init__(self, rel_tol, miter, f_to_break=10e-4, linear_solver=None,
+                 mode="full", refactor_ratio=0.5, max_bfgs_updates=20,
+                 predictor=False):
         """
         Initiates a `Newton` solver class
 
@@ -30,12 +58,64 @@ class Newton(Solver):
             we might be in a rigid body motion case.
             In that case, do one newton iteration and exit.
             This value determines the limit for this scenario.
+        linear_solver: str or `lolFem.core.solvers.linear_solvers.LinearSolver`
+            The solver for the linear equation system in each iteration,
+            or the name of one in
+            `lolFem.core.solvers.linear_solvers.linear_solvers`.
+            Defaults to `NumpyLinalgSpSolve`. The modes that reuse
+            a factorization use the `factorize` method of the linear
+            solver if it has one, else a
+            `lolFem.core.solvers.linear_solvers.DirectSolver`.
+        mode: {"full", "modified", "initial", "bfgs"}
+            How the stiffness matrix is updated, see `Newton`.
+        refactor_ratio: float
+            For the "modified" and "bfgs" modes, the stiffness matrix is
+            refactorized if the ratio between two consecutive residuals
+            is larger than this.
+        max_bfgs_updates: int
+            Max number of BFGS updates stored in a time step.
+        predictor: bool
+            If the time steps start with a predictor for
+            the change of the prescribed values, see `Newton`.
+            Off by default, so that the iterations are the
+            same as without it.
+
+        Raises
+        ======
+        NewtonModeError
+            If the mode given is not supported.
         """
-        self.linear_solver = NumpyLinalgSpSolve()
+        if linear_solver is None:
+            linear_solver = NumpyLinalgSpSolve()
+        elif isinstance(linear_solver, basestring):
+            linear_solver = give_linear_solver(linear_solver)
+        self.linear_solver = linear_solver
         self.tol = rel_tol
         self.miter = miter
         self.f_to_break = f_to_break
 
+        if mode not in ["full", "modified", "initial", "bfgs"]:
+            raise NewtonModeError(
+                "Newton mode: {} not supported".format(mode))
+        self.mode = mode
+        self.refactor_ratio = refactor_ratio
+        self.max_bfgs_updates = max_bfgs_updates
+        self.predictor = predictor
+
+        self.n_factorizations = 0
+        self._factorization = None
+        self._factorization_model = None
+        self._bfgs_updates = []
+
+    def reset(self):
+        """
+        Removes the stored factorization, it is recomputed
+        in the next iteration.
+        """
+        self._factorization = None
+        self._factorization_model = None
+        self._bfgs_updates = []
+
     def solve(self, model, t):
         """
         Attempts to solve the force equilibrium equations
@@ -51,9 +131,19 @@ class Newton(Solver):
 
         print t
 
+        # A factorization from another model can not be reused.
+        if self._factorization_model is not model:
+            self.reset()
+        self._bfgs_updates = []
+
         # Compute applied loads, this should be independent of deformation
         load, load_squared = model.domain.compute_load_vector(t)
+        if self.predictor:
+            self._predict(model, t, load)
+
         iteration = 0
+        prev_residual = None
+        refactor = False
         while True:
             if iteration > self.miter:
                 print "Max iterations achived, exiting"
@@ -83,11 +173,29 @@ class Newton(Solver):
                 print "\t\tSmall external forces: {}, assuming equilibrium.".format(sum(np.abs(load)))
                 break
 
-            # Full Newton, update stiffness matrix
-            K = model.domain.assemble_stiffness_matrix()
+            if self.mode == "full":
+                # Full Newton, update stiffness matrix. It is only used
+                # for this solve so its values can be overwritten.
+                K = model.domain.assemble_stiffness_matrix(reuse=True)
+
+                # Solve for unknowns
+                du = self.linear_solver.solve_eq(K, f_tot)
+            else:
+                # Convergence is too slow with the old stiffness matrix.
+                if (self.mode != "initial" and prev_residual is not None and
+                        residual > self.refactor_ratio * prev_residual):
+                    refactor = True
 
-            # Solve for unknowns
-            du = self.linear_solver.solve_eq(K, f_tot)
+                if self._factorization is None or refactor:
+                    self._factorize(model)
+                    refactor = False
+                elif self.mode == "bfgs" and iteration > 0:
+                    self._add_bfgs_update(du, prev_f_tot - f_tot)
+
+                if self.mode == "bfgs":
+                    du = self._solve_bfgs(f_tot)
+                else:
+                    du = self._factorization.solve(f_tot)
 
             print "du"
             print du
@@ -95,7 +203,115 @@ class Newton(Solver):
             # Propagate new unknowns back to dofs.
             model.domain.update_dof_values(du, t)
 
+            prev_residual = residual
+            prev_f_tot = f_tot
             iteration += 1
 
 
         model.f = internal_forces
+
+    def _predict(self, model, t, load):
+        """
+        Applies the change of the prescribed values from the last
+        time step, see `Newton`.
+
+        Parameters
+        ==========
+        model : lolFem.core.models.Model
+            The model to solve equations for.
+        t : float
+            The current time in the analysis.
+        load : numpy.ndarray
+            The external forces at the time `t`.
+        """
+        du_p = model.domain.compute_prescribed_increment(t)
+        if not np.any(du_p):
+            return
+
+        # The state of the last time step, with the prescribed
+        # dofs at their old values.
+        internal_forces, _ = model.domain.assemble_internal_forces(None)
+        K, K_fp = model.domain.assemble_stiffness_matrix(coupling=True)
+        f = load - internal_forces - K_fp.dot(du_p)
+
+        if self.mode == "full":
+            du = self.linear_solver.solve_eq(K, f)
+        else:
+            if self._factorization is None:
+                self._factorize(model, K)
+            du = self._factorization.solve(f)
+        logger.debug("Predictor for a prescribed increment with norm %g.",
+                     np.linalg.norm(du_p))
+        model.domain.update_dof_values(du, t)
+
+    def _factorize(self, model, K=None):
+        """
+        Assembles and factorizes the stiffness matrix.
+
+        Parameters
+        ==========
+        model : lolFem.core.models.Model
+            The model to solve equations for.
+        K : scipy.sparse matrix, optional
+            The stiffness matrix, assembled if not given.
+        """
+        if K is None:
+            K = model.domain.assemble_stiffness_matrix()
+        factorize = getattr(self.linear_solver, "factorize", None)
+        if factorize is None:
+            factorize = DirectSolver().factorize
+        self._factorization = factorize(K)
+        self._factorization_model = model
+        self._bfgs_updates = []
+        self.n_factorizations += 1
+        logger.debug("Factorized stiffness matrix, %d factorizations in "
+                     "total.", self.n_factorizations)
+
+    def _add_bfgs_update(self, s, y):
+        """
+        Stores a BFGS update pair.
+
+        Parameters
+        ==========
+        s : numpy.ndarray
+            The last increment of the unknowns.
+        y : numpy.ndarray
+            The change in the gradient, that is, the change
+            in the internal minus external forces.
+        """
+        sy = s.dot(y)
+        # Skip updates that would make the inverse indefinite.
+        if sy <= 1e-12 * np.sqrt(s.dot(s) * y.dot(y)):
+            logger.debug("Skipped BFGS update with s.y = %s.", sy)
+            return
+        self._bfgs_updates.append((s, y, 1.0 / sy))
+        if len(self._bfgs_updates) > self.max_bfgs_updates:
+            self._bfgs_updates.pop(0)
+
+    def _solve_bfgs(self, f):
+        """
+        Applies the BFGS updated inverse stiffness to a vector
+        with the two loop recursion, using the factorized stiffness
+        matrix as the initial inverse.
+        """
+        q = f.copy()
+        alphas = []
+        for s, y, rho in reversed(self._bfgs_updates):
+            alpha = rho * s.dot(q)
+            q -= alpha * y
+            alphas.append(alpha)
+
+        r = self._factorization.solve(q)
+        for (s, y, rho), alpha in zip(self._bfgs_updates, reversed(alphas)):
+            beta = rho * y.dot(r)
+            r += (alpha - beta) * s
+        return r
+
+
+class NewtonModeError(Exception):
+
+    """
+    Exception to raise when an unknown Newton
+    mode is given to the solver initiator.
+    """
+    pass
@@ -0,0 +1,127 @@
+"""
+File for the preconditioners used by the iterative linear solvers.
+"""
+
+from abc import ABCMeta, abstractmethod
+import logging
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator, spilu
+
+logger = logging.getLogger(__name__)
+
+
+class Preconditioner(object):
+
+    """
+    Base class for preconditioners.
+
+    A preconditioner is set up for a matrix with `create`, which
+    returns something that approximates the inverse of the matrix
+    and can be given as `M` to the iterative solvers in
+    `scipy.sparse.linalg`.
+    """
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def create(self, K):
+        """
+        Creates the preconditioner for a matrix.
+
+        Parameters
+        ==========
+        K : scipy.sparse.csr_matrix
+            The matrix.
+
+        Returns
+        =======
+        scipy.sparse.linalg.LinearOperator
+        """
+        pass
+
+
+class JacobiPreconditioner(Preconditioner):
+
+    """
+    Scales with the inverse of the diagonal of the matrix.
+    """
+
+    def create(self, K):
+        inv_diag = 1.0 / K.diagonal()
+        return LinearOperator(K.shape, matvec=lambda x: inv_diag * x.ravel(),
+                              dtype=np.float64)
+
+
+class ILUPreconditioner(Preconditioner):
+
+    """
+    Incomplete LU factorization from SuperLU.
+
+    With the default symmetric ordering and no pivoting, the
+    factorization of a symmetric positive definite matrix is close
+    to symmetric, so this also works as an incomplete Cholesky
+    preconditioner for the conjugate gradient method.
+    """
+
+    def __init__(self, drop_tol=1e-5, fill_factor=10, drop_rule="basic",
+                 permc_spec="MMD_AT_PLUS_A", diag_pivot_thresh=0.0):
+        """
+        Parameters
+        ==========
+        drop_tol : float
+            Drop tolerance for the entries in the factors.
+        fill_factor : float
+            Upper bound of the fill in relative to the matrix.
+        drop_rule : str
+            Comma separated SuperLU drop rules.
+        permc_spec : {"NATURAL", "MMD_ATA", "MMD_AT_PLUS_A", "COLAMD"}
+            Column ordering used in the factorization.
+        diag_pivot_thresh : float
+            Threshold for partial pivoting, 0.0 means no pivoting.
+        """
+        self.drop_tol = drop_tol
+        self.fill_factor = fill_factor
+        self.drop_rule = drop_rule
+        self.permc_spec = permc_spec
+        self.diag_pivot_thresh = diag_pivot_thresh
+
+    def create(self, K):
+        ilu = spilu(K.tocsc(), drop_tol=self.drop_tol,
+                    fill_factor=self.fill_factor,
+                    drop_rule=self.drop_rule,
+                    permc_spec=self.permc_spec,
+                    diag_pivot_thresh=self.diag_pivot_thresh)
+        return LinearOperator(K.shape, matvec=ilu.solve, dtype=np.float64)
+
+
+class AMGPreconditioner(Preconditioner):
+
+    """
+    Smoothed aggregation algebraic multigrid V-cycle.
+
+    This requires the pyamg python package.
+    """
+
+    def __init__(self, cycle="V", **kwargs):
+        """
+        Parameters
+        ==========
+        cycle : {"V", "W", "F"}
+            The multigrid cycle.
+        kwargs :
+            Passed on to `pyamg.smoothed_aggregation_solver`.
+        """
+        self.cycle = cycle
+        self.kwargs = kwargs
+
+    def create(self, K):
+        import pyamg
+        ml = pyamg.smoothed_aggregation_solver(K, **self.kwargs)
+        logger.debug("Created AMG hierarchy with %d levels.", len(ml.levels))
+        return ml.aspreconditioner(cycle=self.cycle)
+
+
+#: The available preconditioners
+preconditioners = {"jacobi": JacobiPreconditioner,
+                   "ilu": ILUPreconditioner,
+                   "amg": AMGPreconditioner}
@@ -0,0 +1,164 @@
+"""
+File to hold the SparsityPattern class.
+"""
+
+import logging
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+
+class SparsityPattern(object):
+
+    """
+    The structure of a sparse matrix assembled from element
+    matrices.
+
+    Since the connectivity of the mesh does not change during an
+    analysis, the CSR-structure [1] (`indptr` and `indices`) of the global
+    matrix and the position in the CSR `data` array of every
+    entry of every element matrix can be computed once. An assembly
+    then only needs to sum the element matrices into a preallocated
+    `data` array, without building COO-triplets and converting them.
+
+    .. [1] http://en.wikipedia.org/wiki/Sparse_matrix#Compressed_row_Storage_.28CRS_or_CSR.29
+    """
+
+    def __init__(self, rows, cols, shape):
+        """
+        Computes the sparsity pattern.
+
+        Parameters
+        ==========
+        rows : list of numpy.ndarray
+            One array for each element block with the
+            zero based row in the global matrix for each
+            entry in the element matrices. Entries with negative rows
+            are not included in the global matrix.
+        cols : list of numpy.ndarray
+            Same as `rows` but for the columns.
+        shape : tuple of ints
+            The shape of the global matrix.
+        """
+        self.shape = shape
+        n_rows, n_cols = shape
+
+        #: For each block, the positions in the flattened element
+        #: matrices that are included in the global matrix.
+        self.positions = []
+        keys = []
+        #: For each block, the offset of its entries in `targets`.
+        self.offsets = [0]
+        for block_rows, block_cols in zip(rows, cols):
+            block_rows = block_rows.ravel()
+            block_cols = block_cols.ravel()
+            positions = np.flatnonzero(np.logical_and(block_rows >= 0,
+                                                      block_cols >= 0))
+            self.positions.append(positions)
+            self.offsets.append(self.offsets[-1] + len(positions))
+            keys.append(block_rows[positions] * np.int64(n_cols) +
+                        block_cols[positions])
+
+        # The unique keys are sorted by row and then by column which
+        # is the order of the entries in a CSR matrix with sorted indices.
+        unique_keys, targets = np.unique(np.concatenate(keys),
+                                         return_inverse=True)
+        if len(unique_keys) > np.iinfo(np.int32).max:
+            index_dtype = np.int64
+        else:
+            index_dtype = np.int32
+        self.indices = (unique_keys % n_cols).astype(index_dtype)
+        row_count = np.bincount(unique_keys // n_cols, minlength=n_rows)
+        self.indptr = np.zeros(n_rows + 1, dtype=index_dtype)
+        np.cumsum(row_count, out=self.indptr[1:])
+
+        #: Position in the `data` array for every included element
+        #: matrix entry, for all blocks after each other.
+        self.targets = targets
+        self.nnz = len(unique_keys)
+        self.data = np.zeros(self.nnz, dtype=np.float64)
+
+        logger.debug("Created sparsity pattern with shape %s and %d "
+                     "non zeros.", shape, self.nnz)
+
+    def assemble(self, element_matrices, reuse=False):
+        """
+        Sums element matrices into the global matrix.
+
+        Parameters
+        ==========
+        element_matrices : list of numpy.ndarray
+            One n_elements x n_dofs x n_dofs array for each block
+            in the same order as the pattern was created with.
+        reuse : bool
+            If True, the values are written into the preallocated
+            `data` array instead of a new one. The returned matrix
+            then shares its values with all other matrices assembled
+            with `reuse` and is overwritten by the next such assembly.
+
+        Returns
+        =======
+        scipy.sparse.csr_matrix
+            The global matrix.
+        """
+        values = np.concatenate(
+            [Ke.ravel()[positions] for Ke, positions in
+             zip(element_matrices, self.positions)])
+        data = np.bincount(self.targets, weights=values, minlength=self.nnz)
+        if not reuse:
+            return self.give_matrix(data)
+        self.data[:] = data
+        return self.give_matrix()
+
+    def add(self, block_index, start, element_matrices):
+        """
+        Adds the element matrices of a range of elements in
+        a block to the values in `data`.
+
+        The values are added with a buffered fancy index add, so if
+        two entries have the same target only one of them is added
+        and the others are lost. The elements in the range may
+        therefore not share any dofs, see
+        `lolFem.core.element_block.ElementBlock.color_elements`.
+
+        Parameters
+        ==========
+        block_index : int
+            The index of the block.
+        start : int
+            The index in the block of the first element.
+        element_matrices : numpy.ndarray
+            n_elements x n_dofs x n_dofs array for the elements
+            from `start`.
+        """
+        positions = self.positions[block_index]
+        size = element_matrices[0].size
+        p0, p1 = np.searchsorted(
+            positions, [start * size, (start + len(element_matrices)) * size])
+        offset = self.offsets[block_index]
+        targets = self.targets[offset + p0:offset + p1]
+        self.data[targets] += (element_matrices.ravel()[positions[p0:p1] -
+                                                        start * size])
+
+    def give_matrix(self, data=None):
+        """
+        Gives the global matrix with the given values.
+
+        Parameters
+        ==========
+        data : numpy.ndarray, optional
+            The values of the non zeros. If not given, the matrix
+            uses the values in `data` without copying them.
+
+        Returns
+        =======
+        scipy.sparse.csr_matrix
+        """
+        if data is None:
+            data = self.data
+        M = sparse.csr_matrix((data, self.indices, self.indptr),
+                              shape=self.shape, copy=False)
+        M.has_sorted_indices = True
+        return M
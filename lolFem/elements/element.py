@@ -7,7 +7,6 @@ import logging
 
 import numpy as np
 
-from lolFem.core.dof import DT_master
 from lolFem.core.quadrature import GaussIntegration
 
 logger = logging.getLogger(__name__)
@@ -20,6 +19,10 @@ class Element(object):
     """
     __metaclass__ = ABCMeta
 
+    #: The VTK cell type of the element, used when writing results,
+    #: see `lolFem.visualization.vtu_writer`.
+    vtk_cell_type = None
+
     def __init__(
             self,
             n,
@@ -61,6 +64,11 @@ class Element(object):
         self.section = None
         self.model = None
 
+        # Set when the element is grouped into an
+        # `lolFem.core.element_block.ElementBlock`
+        self.block = None
+        self.block_index = None
+
         self.integrator = integrator
 
     def __str__(self):
@@ -84,6 +92,25 @@ class Element(object):
         """
         pass
 
+    @abstractmethod
+    def compute_B_stack(self, dNdx):
+        """
+        Computes the B-matrices for a stack of elements
+        of the same type as this element.
+
+        Parameters
+        ==========
+        dNdx : numpy.ndarray
+            n_elements x n_vertices x 2 array with the spatial
+            derivatives of the shape functions in a gauss point.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_elements x 4 x n_dofs array of B-matrices.
+        """
+        pass
+
     @abstractmethod
     def compute_volume_around(self, gp, nodes):
         """
@@ -114,12 +141,13 @@ class Element(object):
         """
         Creates the material statuses in the gauss points.
 
-        Loops over the gauss points and gives them all a
-        material status depending on what material is
-        defined for the section of the element.
+        The material state of all gauss points in the element is
+        stored together, and the gauss points get material statuses
+        that are views of it. The fields stored depend on what
+        material is defined for the section of the element.
         """
-        for gp in self.integrator.gausspoints:
-            gp.material_status = self.section.material.create_material_status()
+        self.section.material.create_material_state(
+            self.integrator.gausspoints)
 
     def compute_stiffness_matrix(self, mesh):
         """
@@ -135,17 +163,42 @@ class Element(object):
             (self.n_dofs,
              self.n_dofs),
             dtype=np.float64)
-        for gp in self.integrator.gausspoints:
+        for i, gp in enumerate(self.integrator.gausspoints):
 
-            Be = self.compute_B(gp, mesh)
+            Be, dV = self.give_B_and_volume(i, gp, mesh)
             De = self.compute_constitutive_matrix(gp)
-            dV = self.compute_volume_around(gp, mesh)
 
             # And this is why .dot is stupid dotdottelidottdott:
             # Ke = int B^t D B dv
             Ke += np.transpose(Be).dot(De.dot(Be)) * dV
         return Ke
 
+    def give_B_and_volume(self, i, gp, mesh):
+        """
+        Gives the B-matrix and the volume around a gauss point.
+
+        These are read from the geometry cache of the element block
+        if it exists, else they are computed.
+
+        Parameters
+        ==========
+        i : int
+            The index of the gauss point in the element.
+        gp : lolFem.core.quadrature.GaussPoint
+            The gauss point.
+        mesh : lolFem.core.mesh.Mesh
+            The mesh.
+
+        Returns
+        =======
+        list
+            The B-matrix and the volume.
+        """
+        if self.block is not None and self.block.B is not None:
+            return [self.block.B[self.block_index, i],
+                    self.block.dV[self.block_index, i]]
+        return [self.compute_B(gp, mesh), self.compute_volume_around(gp, mesh)]
+
     def compute_constitutive_matrix(self, gp):
         """
         Computes the consitutive matrix, 'D', for the element.
@@ -174,16 +227,10 @@ class Element(object):
             The values of all dofs in the element.
         """
 
-        u = []
-        for vert in self.vertices:
-            node = self.domain.mesh.nodes[vert]
-            for dof in node.dofs:
-                if dof.dof_type == DT_master:
-                    u.append(dof.value)
-                else:
-                    bc = self.domain.dof_bc[node.n].get(dof.dof_id)
-                    u.append(bc.give_value(t, node))
-        return u
+        # Dofs with essential boundary conditions take their
+        # value at the current time from the boundary condition.
+        return np.take(self.domain.give_unknowns(t),
+                       self.block.dofs[self.block_index])
 
     def compute_internal_forces(self, t):
         """
@@ -201,17 +248,14 @@ class Element(object):
         """
         f_int = np.zeros(self.n_dofs, dtype=np.float64)
         u = self.compute_unknown(t)
-        for gp in self.integrator.gausspoints:
-            B = self.compute_B(gp, self.domain.mesh)
+        for i, gp in enumerate(self.integrator.gausspoints):
+            B, dV = self.give_B_and_volume(i, gp, self.domain.mesh)
 
             strain = B.dot(u)
 
             # This will also set stress + strain in temp variables
             # in gp material status
             stress = self.section.material.compute_stress(strain, gp)
-
-            dV = self.compute_volume_around(gp,
-                                            self.domain.mesh)
             # f = B^t * sigma * dv
             f_int += B.transpose().dot(stress) * dV
 
@@ -240,32 +284,6 @@ class Element(object):
 
         return B.dot(u)
 
-    def recover_fields_in_nodes_2(self, mesh):
-        T = np.zeros((len(self.vertices),
-                      self.n_gausspoints),
-                     dtype=np.float64)
-        # TODO: Fix hardcoded 4
-        w_stress = np.zeros((self.n_gausspoints, 4), dtype=np.float64)
-        w_strain = np.zeros((self.n_gausspoints, 4), dtype=np.float64)
-        for i, gp in enumerate(self.integrator.gausspoints):
-            # For each gauss point add its reciprocal coordinate to list.
-            # This is the local coordinates for the node if we look at the
-            # gauss points as making up an element
-            prim_coords = np.reciprocal(gp.local_coords)
-            T[:, i] = self.interpolator.eval_N(prim_coords)
-            w_stress[i, :] = gp.material_status.stress
-            w_strain[i, :] = gp.material_status.strain
-
-        # This will be matrices with columns as the node index and row as the
-        # field component
-        stress_node = T.dot(w_stress)
-        strain_node = T.dot(w_strain)
-
-        for i, vert in enumerate(self.vertices):
-            node = mesh.nodes[vert]
-            node.stress_vec.append(stress_node[i, :])
-            node.strain_vec.append(strain_node[i, :])
-
     def update(self):
         """
         Propagates update to the integrator.
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 
 class QuadPlaneStrain(Element):
 
+    # VTK_QUAD
+    vtk_cell_type = 9
+
     def __init__(self, n, vertices):
         interpolator = LinQuadInterp()
         n_gausspoints = 4
@@ -44,6 +47,17 @@ class QuadPlaneStrain(Element):
 
         return B
 
+    def compute_B_stack(self, dNdx):
+        B = np.zeros((dNdx.shape[0], 4, 8), dtype=np.float64)
+
+        B[:, 0, 0::2] = dNdx[:, :, 0]
+        B[:, 1, 1::2] = dNdx[:, :, 1]
+
+        B[:, 3, 0::2] = dNdx[:, :, 1]
+        B[:, 3, 1::2] = dNdx[:, :, 0]
+
+        return B
+
     def compute_volume_around(self, gp, nodes):
 
         h = self.section.thickness
@@ -53,14 +67,6 @@ class QuadPlaneStrain(Element):
 
         return det_J * gp.weight * h
 
-    # TODO: This code sucks
-    def recover_fields_in_nodes(self, mesh):
-        for i, vert in enumerate(self.vertices):
-            node = mesh.nodes[vert]
-            gp = self.integrator.gausspoints[i]
-            node.stress_vec.append(gp.material_status.stress)
-            node.strain_vec.append(gp.material_status.strain)
-
     @property
     def vtk_class(self):
         import vtk
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 
 class TrigPlaneStrain(Element):
 
+    # VTK_TRIANGLE
+    vtk_cell_type = 5
+
     def __init__(self, n, vertices):
         interpolator = LinTrigInterp()
         n_gausspoints = 1
@@ -52,6 +55,17 @@ class TrigPlaneStrain(Element):
 
         return B
 
+    def compute_B_stack(self, dNdx):
+        B = np.zeros((dNdx.shape[0], 4, 6), dtype=np.float64)
+
+        B[:, 0, 0::2] = dNdx[:, :, 0]
+        B[:, 1, 1::2] = dNdx[:, :, 1]
+
+        B[:, 3, 0::2] = dNdx[:, :, 1]
+        B[:, 3, 1::2] = dNdx[:, :, 0]
+
+        return B
+
     def compute_volume_around(self, gp, nodes):
 
         h = self.section.thickness
@@ -63,14 +77,6 @@ class TrigPlaneStrain(Element):
 
         return det_J * gp.weight * h
 
-    # TODO: This code sucks
-    def recover_fields_in_nodes(self, mesh):
-        gp = self.integrator.gausspoints[0]
-        for vert in self.vertices:
-            node = mesh.nodes[vert]
-            node.stress_vec.append(gp.material_status.stress)
-            node.strain_vec.append(gp.material_status.strain)
-
     @property
     def vtk_class(self):
         import vtk
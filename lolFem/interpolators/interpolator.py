@@ -5,6 +5,10 @@ File to hold the `Interpolator` class
 from abc import ABCMeta, abstractmethod
 import logging
 
+import numpy as np
+
+from lolFem.core.mt_tools import determinant_2x2_stack, inv_2x2_stack
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,3 +36,50 @@ class Interpolator(object):
     @abstractmethod
     def give_J(self, local_coords, vertices, mesh):
         pass
+
+    def give_J_stack(self, local_coords, coords):
+        """
+        Computes the jacobian in the same local point for
+        a stack of elements.
+
+        Parameters
+        ==========
+        local_coords : numpy.ndarray
+            The local coordinates of the point.
+        coords : numpy.ndarray
+            n_elements x n_vertices x 2 array with the
+            coordinates of the vertices of the elements.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_elements x 2 x 2 array of jacobians.
+        """
+        dN = self.give_derivatives(local_coords)
+        return np.einsum("na,enb->eab", dN, coords)
+
+    def eval_dNdx_stack(self, local_coords, coords):
+        """
+        Evaluates the spatial derivatives of the shape functions
+        in the same local point for a stack of elements.
+
+        Parameters
+        ==========
+        local_coords : numpy.ndarray
+            The local coordinates of the point.
+        coords : numpy.ndarray
+            n_elements x n_vertices x 2 array with the
+            coordinates of the vertices of the elements.
+
+        Returns
+        =======
+        list
+            The first item is a n_elements x n_vertices x 2 array
+            with the derivatives, the second item is the
+            determinants of the jacobians.
+        """
+        dN = self.give_derivatives(local_coords)
+        J = self.give_J_stack(local_coords, coords)
+        J_inv = inv_2x2_stack(J)
+        dNdx = np.einsum("nb,eab->ena", dN, J_inv)
+        return [dNdx, determinant_2x2_stack(J)]
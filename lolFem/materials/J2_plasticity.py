@@ -2,33 +2,281 @@ import logging
 
 import numpy as np
 
-from material import Material
-from material_status import MaterialStatus
+from .material import Material
+from .material_status import MaterialStatus, field_property
 
 logger = logging.getLogger(__name__)
 
+# Symmetric tensors are stored as [xx, yy, zz, xy] while strains in
+# Voigt format use the engineering shear strain gamma_xy = 2 * xy.
+_ones = np.array([1.0, 1.0, 1.0, 0.0])
+_shear_scale = np.array([1.0, 1.0, 1.0, 0.5])
+
 
 class J2Plasticity(Material):
 
-    def __init__(self, sig_y, Y, linear_material):
+    """
+    Plane strain von Mises (J2) plasticity with linear isotropic
+    and kinematic hardening.
+
+    The stresses are computed with the radial return mapping
+    algorithm and the tangent is the algorithmic consistent
+    tangent [1], so a Newton solver converges quadratically.
+    All computations are done on arrays of gauss points.
+
+    The yield function is
+
+    .. math:: f = \\| \\mathbf{s} - \\boldsymbol{\\beta} \\| -
+              \\sqrt{2/3} (\\sigma_y + H_{iso} \\alpha)
+
+    where s is the stress deviator, beta the back stress and alpha
+    the equivalent plastic strain.
+
+    .. [1] J.C. Simo and T.J.R. Hughes, Computational Inelasticity,
+           Springer (1998), Box 3.2.
+    """
+
+    def __init__(self, sig_y, linear_material, H_iso=0.0, H_kin=0.0):
+        """
+        Parameters
+        ==========
+        sig_y : float
+            The initial uniaxial yield stress.
+        linear_material : `lolFem.materials.linear_isotropic.LinearIsotropic`
+            Gives the elastic properties.
+        H_iso : float
+            The isotropic hardening modulus.
+        H_kin : float
+            The kinematic hardening modulus.
+        """
         self.sig_y = sig_y
-        self.k = Y / np.sqrt(3.0)
         self.linear_material = linear_material
+        self.H_iso = H_iso
+        self.H_kin = H_kin
+
+    @property
+    def G(self):
+        return self.linear_material.G
+
+    @property
+    def K(self):
+        E = self.linear_material.E
+        nu = self.linear_material.nu
+        return E / (3.0 * (1.0 - 2.0 * nu))
 
     def create_material_status(self):
         return J2PlasticityMaterialStatus()
 
-    def compute_yield_func(self):
-        J_2 =
-        alt = "\sigma_v = \sqrt{\tfrac{1}{2}[(\sigma_{11} - \sigma_{22})^2 + (\sigma_{22} - \sigma_{33})^2 + (\sigma_{33} - \sigma_{11})^2 + 6(\sigma_{12}^2 + \sigma_{23}^2 + \sigma_{31}^2)]}"
+    def compute_yield_func(self, stress, back_stress, alpha):
+        """
+        Computes the yield function.
+
+        Parameters
+        ==========
+        stress : numpy.ndarray
+            n x 4 array with the stresses.
+        back_stress : numpy.ndarray
+            n x 4 array with the back stresses.
+        alpha : numpy.ndarray
+            The n equivalent plastic strains.
+
+        Returns
+        =======
+        numpy.ndarray
+            The n values of the yield function, positive
+            values are outside the yield surface.
+        """
+        xi = _deviator(stress) - back_stress
+        return (_norm(xi) -
+                np.sqrt(2.0 / 3.0) * (self.sig_y + self.H_iso * alpha))
+
+    def compute_stress_trial(self, strain, plastic_strain):
+        """
+        Computes the elastic trial stresses.
+
+        Parameters
+        ==========
+        strain : numpy.ndarray
+            n x 4 array with the total strains in Voigt format.
+        plastic_strain : numpy.ndarray
+            n x 4 array with the plastic strain tensors.
+
+        Returns
+        =======
+        numpy.ndarray
+            n x 4 array with the trial stresses.
+        """
+        elastic_strain = strain * _shear_scale - plastic_strain
+        volumetric = np.sum(elastic_strain[:, 0:3], axis=1)
+        return (self.K * volumetric[:, np.newaxis] * _ones +
+                2.0 * self.G * _deviator(elastic_strain))
+
+    def _return_map(self, strain, committed):
+        """
+        Performs the radial return mapping.
+
+        Parameters
+        ==========
+        strain : numpy.ndarray
+            n x 4 array with the total strains.
+        committed : dict
+            The committed plastic strains, equivalent plastic
+            strains and back stresses.
+
+        Returns
+        =======
+        dict
+            The new values of all fields in the material state.
+        """
+        G = self.G
+        H = self.H_iso + self.H_kin
+        stress = self.compute_stress_trial(strain,
+                                           committed["plastic_strain"])
+        alpha = committed["alpha"].copy()
+        back_stress = committed["back_stress"].copy()
+        plastic_strain = committed["plastic_strain"].copy()
+
+        xi = _deviator(stress) - back_stress
+        xi_norm = _norm(xi)
+        f = xi_norm - np.sqrt(2.0 / 3.0) * (self.sig_y + self.H_iso * alpha)
 
-    def compute_stress_trial(self, strain_increment, gp):
-        D = self.linear_material.give_stiffness_matrix_plane_strain(gp)
-        stress_trial = D.dot(strain_increment)
-        return stress_trial
+        delta_gamma = np.zeros(len(strain), dtype=np.float64)
+        normal = np.zeros(strain.shape, dtype=np.float64)
+        plastic = f > 0.0
+        if np.any(plastic):
+            n = xi[plastic] / xi_norm[plastic, np.newaxis]
+            dg = f[plastic] / (2.0 * G + 2.0 / 3.0 * H)
+            stress[plastic] -= 2.0 * G * dg[:, np.newaxis] * n
+            plastic_strain[plastic] += dg[:, np.newaxis] * n
+            back_stress[plastic] += 2.0 / 3.0 * self.H_kin * dg[:, np.newaxis] * n
+            alpha[plastic] += np.sqrt(2.0 / 3.0) * dg
+            delta_gamma[plastic] = dg
+            normal[plastic] = n
+
+        return {"stress": stress,
+                "strain": strain,
+                "plastic_strain": plastic_strain,
+                "alpha": alpha,
+                "back_stress": back_stress,
+                "delta_gamma": delta_gamma,
+                "trial_norm": xi_norm,
+                "normal": normal}
+
+    def _consistent_tangents(self, delta_gamma, trial_norm, normal):
+        """
+        Computes the algorithmic consistent tangents in Voigt format
+        from the results of the return mapping.
+        """
+        G = self.G
+        K = self.K
+        n_points = len(delta_gamma)
+
+        I_dev = np.diag([1.0, 1.0, 1.0, 0.5]) - np.outer(_ones, _ones) / 3.0
+        D_el = K * np.outer(_ones, _ones) + 2.0 * G * I_dev
+
+        tangents = np.empty((n_points, 4, 4), dtype=np.float64)
+        tangents[:] = D_el
+        plastic = delta_gamma > 0.0
+        if np.any(plastic):
+            theta = 1.0 - 2.0 * G * delta_gamma[plastic] / trial_norm[plastic]
+            theta_bar = (1.0 / (1.0 + (self.H_iso + self.H_kin) / (3.0 * G)) -
+                         (1.0 - theta))
+            n = normal[plastic]
+            tangents[plastic] = (
+                K * np.outer(_ones, _ones) +
+                2.0 * G * theta[:, np.newaxis, np.newaxis] * I_dev -
+                2.0 * G * theta_bar[:, np.newaxis, np.newaxis] *
+                np.einsum("ni,nj->nij", n, n))
+        return tangents
+
+    def compute_stresses(self, strains, state):
+        values = self._return_map(strains, state.committed)
+        for name, value in values.items():
+            state.temp[name][:] = value
+        return values["stress"]
+
+    def compute_tangents(self, state):
+        return self._consistent_tangents(state.temp["delta_gamma"],
+                                         state.temp["trial_norm"],
+                                         state.temp["normal"])
+
+    def compute_stresses_and_tangents(self, strains, state):
+        values = self._return_map(strains, state.committed)
+        for name, value in values.items():
+            state.temp[name][:] = value
+        tangents = self._consistent_tangents(values["delta_gamma"],
+                                             values["trial_norm"],
+                                             values["normal"])
+        return [values["stress"], tangents]
+
+    def compute_stress(self, strain, gp):
+        state = gp.material_status.state
+        i = gp.material_status.index
+        committed = dict((name, value[i:i + 1])
+                         for name, value in state.committed.items())
+        values = self._return_map(strain[np.newaxis], committed)
+        for name, value in values.items():
+            state.temp[name][i] = value[0]
+        return values["stress"][0]
+
+    def give_stiffness_matrix_plane_strain(self, gp):
+        """
+        Gives the consistent tangent in a gauss point from
+        the last computed stress.
+        """
+        state = gp.material_status.state
+        i = gp.material_status.index
+        return self._consistent_tangents(state.temp["delta_gamma"][i:i + 1],
+                                         state.temp["trial_norm"][i:i + 1],
+                                         state.temp["normal"][i:i + 1])[0]
+
+    def give_elastic_stiffness_matrix_plane_strain(self):
+        linear_material = self.linear_material
+        return linear_material.give_elastic_stiffness_matrix_plane_strain()
+
+
+def _deviator(tensors):
+    """
+    Gives the deviators of n x 4 arrays of symmetric tensors.
+    """
+    deviators = tensors.copy()
+    mean = np.sum(tensors[:, 0:3], axis=1) / 3.0
+    deviators[:, 0:3] -= mean[:, np.newaxis]
+    return deviators
+
+
+def _norm(tensors):
+    """
+    Gives the norms of n x 4 arrays of symmetric tensors.
+    """
+    return np.sqrt(np.sum(tensors[:, 0:3] ** 2, axis=1) +
+                   2.0 * tensors[:, 3] ** 2)
 
 
 class J2PlasticityMaterialStatus(MaterialStatus):
 
-    def __init__(self):
-        super(J2PlasticityMaterialStatus, self).__init__()
+    """
+    The state of a `J2Plasticity` material in a gauss point.
+
+    Apart from the stress and strain, the plastic strain tensor,
+    the equivalent plastic strain, alpha, and the back stress are
+    stored together with the results of the last return mapping
+    that are needed for the consistent tangent.
+    """
+
+    fields = MaterialStatus.fields + (("plastic_strain", (4,)),
+                                      ("alpha", ()),
+                                      ("back_stress", (4,)),
+                                      ("delta_gamma", ()),
+                                      ("trial_norm", ()),
+                                      ("normal", (4,)))
+
+    def __init__(self, state=None, index=0):
+        super(J2PlasticityMaterialStatus, self).__init__(state, index)
+
+    temp_plastic_strain = field_property("plastic_strain", True)
+    temp_alpha = field_property("alpha", True)
+    temp_back_stress = field_property("back_stress", True)
+    plastic_strain = field_property("plastic_strain", False)
+    alpha = field_property("alpha", False)
+    back_stress = field_property("back_stress", False)
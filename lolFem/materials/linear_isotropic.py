@@ -10,6 +10,13 @@ logger = logging.getLogger(__name__)
 
 class LinearIsotropic(Material):
 
+    """
+    Linear elastic isotropic material.
+
+    The plane strain stiffness matrix is constant, so it is
+    computed once and reused for all gauss points.
+    """
+
     def __init__(self, e, nu):
         # Modulus of elasticity
         self.E = e
@@ -20,6 +27,11 @@ class LinearIsotropic(Material):
         # Modulus of shear
         self.G = self.E / (2.0 * (1.0 + self.nu))
 
+        # The plane strain stiffness matrix and the (E, nu, G)
+        # it was computed for.
+        self._D = None
+        self._D_parameters = None
+
     def create_material_status(self):
         return LinearIsotropicMaterialStatus()
 
@@ -30,6 +42,28 @@ class LinearIsotropic(Material):
         return k
 
     def give_stiffness_matrix_plane_strain(self, gp):
+        """
+        Gives the plane strain stiffness matrix.
+
+        The matrix is computed the first time and then reused
+        as long as E, nu and G are not changed, so it should
+        not be modified.
+
+        Returns
+        =======
+        numpy.ndarray
+            The 4 x 4 stiffness matrix.
+        """
+        if self._D is None or self._D_parameters != (self.E, self.nu, self.G):
+            self._D = self._compute_stiffness_matrix_plane_strain()
+            self._D.flags.writeable = False
+            self._D_parameters = (self.E, self.nu, self.G)
+        return self._D
+
+    def give_elastic_stiffness_matrix_plane_strain(self):
+        return self.give_stiffness_matrix_plane_strain(None)
+
+    def _compute_stiffness_matrix_plane_strain(self):
         k = np.zeros((4, 4), dtype=np.float64)
 
         factor = self.E / ((1.0 + self.nu) * (1.0 - 2.0 * self.nu))
@@ -55,8 +89,19 @@ class LinearIsotropic(Material):
         gp.material_status.temp_strain = strain
         return stress
 
+    def compute_stresses(self, strains, state):
+        D = self.give_stiffness_matrix_plane_strain(None)
+        stresses = strains.dot(D.T)
+        state.temp["stress"][:] = stresses
+        state.temp["strain"][:] = strains
+        return stresses
+
+    def compute_tangents(self, state):
+        D = self.give_stiffness_matrix_plane_strain(None)
+        return np.broadcast_to(D, (len(state), 4, 4))
+
 
 class LinearIsotropicMaterialStatus(MaterialStatus):
 
-    def __init__(self):
-        super(LinearIsotropicMaterialStatus, self).__init__()
+    def __init__(self, state=None, index=0):
+        super(LinearIsotropicMaterialStatus, self).__init__(state, index)
@@ -1,8 +1,136 @@
+from abc import ABCMeta, abstractmethod
 import logging
 
+import numpy as np
+
+from .material_state import MaterialState
 
 logger = logging.getLogger(__name__)
 
 
 class Material(object):
-    pass
+
+    """
+    Base class for materials.
+
+    A material computes the stress in a gauss point with
+    `compute_stress` and the tangent stiffness with
+    `give_stiffness_matrix_plane_strain`. For the batched assembly
+    the same is done for many gauss points at once with
+    `compute_stresses` and `compute_tangents`, which by default loop
+    over the gauss points. Materials should override these with
+    vectorized versions that work directly on the arrays of a
+    `lolFem.materials.material_state.MaterialState`.
+    """
+    __metaclass__ = ABCMeta
+
+    def create_material_state(self, gausspoints):
+        """
+        Creates the storage of the material state for a batch of
+        gauss points.
+
+        The fields stored are given by the `fields` of the material
+        status class of the material.
+
+        Parameters
+        ==========
+        gausspoints : list of `lolFem.core.quadrature.GaussPoint`
+            The gauss points.
+
+        Returns
+        =======
+        `lolFem.materials.material_state.MaterialState`
+        """
+        status_class = type(self.create_material_status())
+        return MaterialState(status_class.fields, gausspoints=gausspoints,
+                             status_class=status_class)
+
+    def compute_stresses(self, strains, state):
+        """
+        Computes the stresses in a batch of gauss points and
+        stores them as temporary values in the material state.
+
+        The default implementation calls `compute_stress` for
+        each gauss point, materials can override this with
+        a vectorized version.
+
+        Parameters
+        ==========
+        strains : numpy.ndarray
+            n_gausspoints x 4 array with the strains in
+            Voigt format [e_xx, e_yy, e_zz, gamma_xy].
+        state : `lolFem.materials.material_state.MaterialState`
+            The material state of the gauss points, in the same
+            order as `strains`.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_gausspoints x 4 array with the stresses.
+        """
+        stresses = np.zeros(strains.shape, dtype=np.float64)
+        for i, gp in enumerate(state.gausspoints):
+            stresses[i] = self.compute_stress(strains[i], gp)
+        return stresses
+
+    def compute_tangents(self, state):
+        """
+        Computes the tangent stiffness matrices in a batch
+        of gauss points, using the state from the last
+        call to `compute_stresses`.
+
+        The default implementation calls
+        `give_stiffness_matrix_plane_strain` for each gauss point.
+
+        Parameters
+        ==========
+        state : `lolFem.materials.material_state.MaterialState`
+            The material state of the gauss points.
+
+        Returns
+        =======
+        numpy.ndarray
+            n_gausspoints x 4 x 4 array with the tangents. This
+            can be a read only view and should not be modified.
+        """
+        tangents = np.zeros((len(state), 4, 4), dtype=np.float64)
+        for i, gp in enumerate(state.gausspoints):
+            tangents[i] = self.give_stiffness_matrix_plane_strain(gp)
+        return tangents
+
+    def compute_stresses_and_tangents(self, strains, state):
+        """
+        Computes the stresses and the tangent stiffness
+        matrices in a batch of gauss points.
+
+        Parameters
+        ==========
+        strains : numpy.ndarray
+            n_gausspoints x 4 array with the strains.
+        state : `lolFem.materials.material_state.MaterialState`
+            The material state of the gauss points, in the same
+            order as `strains`.
+
+        Returns
+        =======
+        list
+            The first item is the n_gausspoints x 4 array with the
+            stresses, the second item is the n_gausspoints x 4 x 4
+            array with the tangents.
+        """
+        stresses = self.compute_stresses(strains, state)
+        return [stresses, self.compute_tangents(state)]
+
+    @abstractmethod
+    def give_elastic_stiffness_matrix_plane_strain(self):
+        """
+        Gives the elastic plane strain stiffness matrix, used to
+        measure stresses in the energy norm, see
+        `lolFem.core.error_estimator.ErrorEstimator`.
+
+        Returns
+        =======
+        numpy.ndarray
+            The 4 x 4 stiffness matrix.
+        """
+        pass
@@ -0,0 +1,171 @@
+"""
+File to hold the MaterialState class.
+"""
+
+from collections import OrderedDict
+import copy
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MaterialState(object):
+
+    """
+    Stores the state of a material in a batch of gauss points.
+
+    Each field, for example the stress, is stored in a contiguous
+    n_gausspoints x n_components array, instead of as attributes on
+    one object per gauss point. There is one array with the
+    temporary values, computed in the current iteration, and one
+    with the committed values from the last converged time step.
+
+    The material statuses of the gauss points are views of
+    one row in the arrays, see
+    `lolFem.materials.material_status.MaterialStatus`.
+    """
+
+    def __init__(self, fields, n_points=None, gausspoints=None,
+                 status_class=None):
+        """
+        Initiates a material state.
+
+        Parameters
+        ==========
+        fields : ordered dictionary
+            The fields to store in the format
+            {name (str) : shape of the field in a point (tuple)}.
+        n_points : int, optional
+            The number of points. Not needed if `gausspoints` is given.
+        gausspoints : list of `lolFem.core.quadrature.GaussPoint`, optional
+            The gauss points the state is stored for. They get a
+            reference to the state and their position in it.
+        status_class : class, optional
+            The class of the material status views given by
+            `give_material_status`. Defaults to
+            `lolFem.materials.material_status.MaterialStatus`.
+        """
+        if gausspoints is not None:
+            n_points = len(gausspoints)
+        self.n_points = n_points
+        self.gausspoints = gausspoints
+
+        if status_class is None:
+            from .material_status import MaterialStatus
+            status_class = MaterialStatus
+        self.status_class = status_class
+
+        self.fields = OrderedDict(fields)
+
+        #: The committed values of the fields.
+        self.committed = OrderedDict()
+        #: The temporary values of the fields.
+        self.temp = OrderedDict()
+        for name, shape in self.fields.items():
+            self.committed[name] = np.zeros((n_points,) + tuple(shape),
+                                            dtype=np.float64)
+            self.temp[name] = np.zeros((n_points,) + tuple(shape),
+                                       dtype=np.float64)
+
+        if gausspoints is not None:
+            for i, gp in enumerate(gausspoints):
+                gp.material_state = self
+                gp.material_state_index = i
+
+    def __len__(self):
+        return self.n_points
+
+    def commit(self):
+        """
+        Commits the temporary values of all fields. This is
+        done once per converged time step.
+        """
+        for name in self.fields:
+            np.copyto(self.committed[name], self.temp[name])
+
+    def commit_point(self, i):
+        """
+        Commits the temporary values of all fields in one point.
+
+        Parameters
+        ==========
+        i : int
+            The index of the point.
+        """
+        for name in self.fields:
+            self.committed[name][i] = self.temp[name][i]
+
+    def give_slice(self, start, stop):
+        """
+        Gives the state in a contiguous range of points.
+
+        The arrays of the returned state are views of the arrays
+        in this state, so values written to it are written
+        to this state.
+
+        Parameters
+        ==========
+        start : int
+            The index of the first point.
+        stop : int
+            The index after the last point.
+
+        Returns
+        =======
+        `MaterialState`
+        """
+        state = copy.copy(self)
+        state.n_points = stop - start
+        if self.gausspoints is not None:
+            state.gausspoints = self.gausspoints[start:stop]
+        state.committed = OrderedDict(
+            (name, values[start:stop]) for name, values in self.committed.items())
+        state.temp = OrderedDict(
+            (name, values[start:stop]) for name, values in self.temp.items())
+        return state
+
+    def share_memory(self):
+        """
+        Moves the arrays to shared memory so that processes
+        forked after this see the values written by each other,
+        see `lolFem.core.parallel_assembly`.
+        """
+        from lolFem.core.parallel_assembly import shared_zeros
+        for values in [self.committed, self.temp]:
+            for name, array in values.items():
+                shared = shared_zeros(array.shape)
+                shared[:] = array
+                values[name] = shared
+
+    def give_material_status(self, i):
+        """
+        Gives a view of the state in one point.
+
+        Parameters
+        ==========
+        i : int
+            The index of the point.
+
+        Returns
+        =======
+        `lolFem.materials.material_status.MaterialStatus`
+        """
+        return self.status_class(self, i)
+
+    def give_nbytes(self):
+        """
+        Gives the memory used by the arrays.
+
+        Returns
+        =======
+        int
+            The number of bytes.
+        """
+        return sum(array.nbytes for array in self.committed.values() +
+                   self.temp.values())
+
+    def __str__(self):
+        return "Material state with fields {} in {} points.".format(
+            self.fields.keys(), self.n_points)
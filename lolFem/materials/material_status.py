@@ -1,17 +1,68 @@
 import logging
 
+from .material_state import MaterialState
+
 logger = logging.getLogger(__name__)
 
 
+def field_property(name, temp):
+    """
+    Creates a property that reads and writes one field
+    of the material state of a `MaterialStatus`.
+
+    Parameters
+    ==========
+    name : str
+        The name of the field.
+    temp : bool
+        If the temporary or the committed value is used.
+    """
+    def give(self):
+        values = self.state.temp if temp else self.state.committed
+        return values[name][self.index].copy()
+
+    def set(self, value):
+        values = self.state.temp if temp else self.state.committed
+        values[name][self.index] = value
+
+    return property(give, set)
+
+
 class MaterialStatus(object):
 
-    def __init__(self):
-        self.temp_strain = None
-        self.temp_stress = None
+    """
+    The state of the material in one gauss point.
+
+    The values are stored in a row of a
+    `lolFem.materials.material_state.MaterialState` and this class
+    is a view of that row. Reading a field gives a copy of the row
+    and setting a field writes to the row.
+    """
+
+    #: The fields in the state and their shape in a point.
+    fields = (("stress", (4,)), ("strain", (4,)))
+
+    def __init__(self, state=None, index=0):
+        """
+        Parameters
+        ==========
+        state : `lolFem.materials.material_state.MaterialState`, optional
+            The state to view. If not given, a state with a single
+            point is created for this status.
+        index : int
+            The index of the point in the state.
+        """
+        if state is None:
+            state = MaterialState(self.fields, n_points=1,
+                                  status_class=type(self))
+            index = 0
+        self.state = state
+        self.index = index
 
-        self.strain = None
-        self.stress = None
+    temp_strain = field_property("strain", True)
+    temp_stress = field_property("stress", True)
+    strain = field_property("strain", False)
+    stress = field_property("stress", False)
 
     def update(self):
-        self.stress = self.temp_stress
-        self.strain = self.temp_strain
+        self.state.commit_point(self.index)
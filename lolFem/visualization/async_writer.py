@@ -0,0 +1,94 @@
+"""
+File for writing results in a background thread so that the analysis
+can continue with the next time step while the results of the
+previous ones are written.
+"""
+
+import logging
+import Queue
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWriter(object):
+
+    """
+    Writes time steps with another writer in a background thread.
+
+    The time steps are put in a queue of limited size. If the writing
+    falls behind so that the queue is full, `write` waits until there
+    is room, so the memory used by the pending time steps is bounded.
+    Errors raised while writing are raised again in the thread using
+    the writer at the next call to `write`, `flush` or `close`.
+    """
+
+    def __init__(self, writer, max_pending=2):
+        """
+        Parameters
+        ==========
+        writer : `lolFem.visualization.vtu_writer.VTUTimeSeriesWriter`
+            The writer to use in the background thread, or any object
+            with a ``write(time, point_data)`` method.
+        max_pending : int
+            The largest number of time steps waiting to be written.
+        """
+        self.writer = writer
+        self.queue = Queue.Queue(max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run,
+                                        name="lolFem output writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    self.writer.write(*item)
+            except Exception:
+                logger.exception("Writing time step %g failed.", item[0])
+                self._error = sys.exc_info()
+            finally:
+                self.queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error[0], error[1], error[2]
+
+    def write(self, time, point_data):
+        """
+        Queues a time step for writing.
+
+        Parameters
+        ==========
+        time : float
+            The time of the time step.
+        point_data : OrderedDict
+            Mapping {name (string) : n_points x n_components array}.
+            The arrays are written later, so they should not be
+            modified after they are queued.
+        """
+        self._raise_error()
+        self.queue.put((time, point_data))
+
+    def flush(self):
+        """
+        Waits until all queued time steps are written.
+        """
+        self.queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Writes all queued time steps and stops the background thread.
+        """
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+        self._raise_error()
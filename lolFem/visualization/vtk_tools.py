@@ -1,11 +1,29 @@
-import logging
+"""
+Tools for creating and showing results with the vtk package.
+
+The vtk package is only imported when these functions are called. To
+write results without vtk, see `lolFem.visualization.vtu_writer`.
+"""
 
-import vtk
+import logging
 
 logger = logging.getLogger(__name__)
 
 
-def create_vtk_object(mesh):
+def create_vtk_object(mesh, stress, strain):
+    """
+    Creates a polydata object with the mesh and the fields in the nodes.
+
+    Parameters
+    ==========
+    mesh : lolFem.core.mesh.Mesh
+        The mesh.
+    stress, strain : numpy.ndarray
+        n_nodes x 4 arrays with the stress and the strain in the
+        nodes in Voigt format, see
+        `lolFem.core.domain.Domain.recover_fields_in_nodes`.
+    """
+    import vtk
 
     n_nodes = len(mesh.nodes)
 
@@ -35,26 +53,21 @@ def create_vtk_object(mesh):
     strain_array.SetName("Strain")
     strain_array.SetNumberOfTuples(n_nodes)
 
-    for i, node in enumerate(mesh.nodes.values()):
+    for i in range(n_nodes):
         # TODO: Remove hardcoded 2d plain strain
 
-        stress = node.stress
-        stress_tuple = [stress[0], stress[3], 0,
-                        stress[3], stress[1], 0,
-                        0, 0, stress[2]]
+        s = stress[i]
+        stress_tuple = [s[0], s[3], 0,
+                        s[3], s[1], 0,
+                        0, 0, s[2]]
         stress_array.SetTuple9(i, *stress_tuple)
 
-        node.stress_vec = []
-
-        strain = node.strain
-
-        strain_tuple = [strain[0], strain[3], 0,
-                        strain[3], strain[1], 0,
-                        0, 0, strain[2]]
+        e = strain[i]
+        strain_tuple = [e[0], e[3], 0,
+                        e[3], e[1], 0,
+                        0, 0, e[2]]
         strain_array.SetTuple9(i, *strain_tuple)
 
-        node.strain_vec = []
-
     # Add displacements
     disp_array = vtk.vtkDoubleArray()
     disp_array.SetNumberOfComponents(3)
@@ -85,9 +98,10 @@ def create_vtk_object(mesh):
     return polydata
 
 
-def write_vtk_file(mesh, name):
+def write_vtk_file(mesh, name, stress, strain):
+    import vtk
 
-    polydata = create_vtk_object(mesh)
+    polydata = create_vtk_object(mesh, stress, strain)
 
     writer = vtk.vtkXMLPolyDataWriter()
     writer.SetFileName(name + str(".vtp"))
@@ -100,6 +114,7 @@ def write_vtk_file(mesh, name):
 
 
 def show_data(polydata):
+    import vtk
     # Setup actor and mapper
     mapper = vtk.vtkPolyDataMapper()
     if vtk.VTK_MAJOR_VERSION <= 5:
@@ -0,0 +1,258 @@
+"""
+File for writing results in time steps to VTK XML unstructured grid
+(.vtu) files with the data appended in binary, indexed by a ParaView
+collection (.pvd) file.
+
+The files are written directly from numpy arrays, the raw bytes of the
+arrays are written to the file without converting them value by value.
+The mesh does not change between the time steps, so the encoded points
+and cells are computed once and reused for every time step and only
+the point data is encoded in each step.
+"""
+
+from collections import OrderedDict
+import logging
+import os
+import sys
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+#: The VTK names of the numpy types that can be written.
+vtk_types = {np.dtype(np.float32): "Float32",
+             np.dtype(np.float64): "Float64",
+             np.dtype(np.int32): "Int32",
+             np.dtype(np.int64): "Int64",
+             np.dtype(np.uint8): "UInt8"}
+
+_byte_order = "LittleEndian" if sys.byteorder == "little" else "BigEndian"
+
+
+def voigt_to_tensor(values):
+    """
+    Converts plane strain fields in Voigt format to full tensors.
+
+    Parameters
+    ==========
+    values : numpy.ndarray
+        n x 4 array with the components [xx, yy, zz, xy].
+
+    Returns
+    =======
+    numpy.ndarray
+        n x 9 array with the tensors row by row.
+    """
+    tensors = np.zeros((len(values), 9), dtype=np.float64)
+    tensors[:, [0, 4, 8]] = values[:, [0, 1, 2]]
+    tensors[:, 1] = values[:, 3]
+    tensors[:, 3] = values[:, 3]
+    return tensors
+
+
+def encode_array(array, compress=False, block_size=32768):
+    """
+    Encodes an array as a block of appended binary VTK data.
+
+    Parameters
+    ==========
+    array : numpy.ndarray
+        The array to encode.
+    compress : bool
+        If the data is compressed with zlib.
+    block_size : int
+        The size in bytes of the blocks that compressed
+        data is split into.
+
+    Returns
+    =======
+    list
+        The parts of the block, strings or numpy arrays whose
+        bytes are written as is.
+    """
+    array = np.ascontiguousarray(array)
+    if not compress:
+        return [np.array([array.nbytes], dtype=np.uint64).tostring(), array]
+
+    data = array.tostring()
+    blocks = [zlib.compress(data[i:i + block_size])
+              for i in range(0, len(data), block_size)]
+    last_size = len(data) - (len(blocks) - 1) * block_size if blocks else 0
+    header = np.array([len(blocks), block_size, last_size] +
+                      [len(block) for block in blocks], dtype=np.uint64)
+    return [header.tostring()] + blocks
+
+
+def _give_nbytes(parts):
+    return sum(part.nbytes if isinstance(part, np.ndarray) else len(part)
+               for part in parts)
+
+
+def _write_parts(f, parts):
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part.tofile(f)
+        else:
+            f.write(part)
+
+
+class VTUTimeSeriesWriter(object):
+
+    """
+    Writes point data for a series of time steps.
+
+    Every call to `write` writes a .vtu file named after the time step
+    and updates the .pvd collection file that lists the time steps, so
+    the results can be opened in ParaView while the analysis runs.
+    """
+
+    def __init__(self, filename, coordinates, cells, compress=False):
+        """
+        Parameters
+        ==========
+        filename : string
+            The name of the collection without extension. The
+            time steps are written to filename_<step>.vtu and the
+            collection to filename.pvd.
+        coordinates : numpy.ndarray
+            n_points x 2 or n_points x 3 array with the coordinates
+            of the points.
+        cells : list
+            One item per group of cells of the same type with
+            a n_cells x n_vertices array of the point indices of
+            the vertices and the VTK cell type, see
+            `lolFem.elements.element.Element.vtk_cell_type`.
+        compress : bool
+            If the data is compressed with zlib.
+        """
+        self.filename = filename
+        self.compress = compress
+        self.n_points = len(coordinates)
+        self.n_cells = sum(len(vertices) for vertices, _ in cells)
+
+        #: The times and file names of the written time steps.
+        self.steps = []
+
+        points = np.zeros((self.n_points, 3), dtype=np.float64)
+        points[:, :coordinates.shape[1]] = coordinates
+        connectivity = np.concatenate([vertices.ravel()
+                                       for vertices, _ in cells])
+        offsets = np.cumsum(np.concatenate(
+            [np.full(len(vertices), vertices.shape[1], dtype=np.int64)
+             for vertices, _ in cells]))
+        types = np.concatenate([np.full(len(vertices), cell_type,
+                                        dtype=np.uint8)
+                                for vertices, cell_type in cells])
+
+        # The geometry is encoded once and reused in all time steps.
+        self._points = self._encode("Points", points)
+        self._cells = [self._encode("connectivity",
+                                    connectivity.astype(np.int64)),
+                       self._encode("offsets", offsets),
+                       self._encode("types", types)]
+
+    def _encode(self, name, array):
+        """
+        Encodes an array and gives the parts of the encoded data
+        together with the attributes of its DataArray element.
+        """
+        attributes = OrderedDict([
+            ("type", vtk_types[array.dtype]),
+            ("Name", name),
+            ("NumberOfComponents",
+             array.shape[1] if array.ndim > 1 else 1),
+            ("format", "appended")])
+        return [attributes, encode_array(array, self.compress)]
+
+    def write(self, time, point_data):
+        """
+        Writes the point data in a time step.
+
+        Parameters
+        ==========
+        time : float
+            The time of the time step.
+        point_data : OrderedDict
+            Mapping {name (string) : n_points x n_components array}.
+
+        Returns
+        =======
+        string
+            The name of the written .vtu file.
+        """
+        filename = "{}_{}.vtu".format(self.filename, len(self.steps))
+        self.write_piece(filename, point_data)
+        self.steps.append((time, filename))
+        self.write_collection()
+        logger.debug("Wrote time step %g to %s.", time, filename)
+        return filename
+
+    def write_piece(self, filename, point_data):
+        """
+        Writes the mesh and point data to a .vtu file
+        without adding it to the collection.
+
+        Parameters
+        ==========
+        filename : string
+            The name of the file.
+        point_data : OrderedDict
+            Mapping {name (string) : n_points x n_components array}.
+        """
+        arrays = [self._encode(name, np.asarray(values))
+                  for name, values in point_data.items()]
+
+        offset = [0]
+
+        def data_array(attributes, parts):
+            element = "<DataArray {} offset=\"{}\"/>\n".format(
+                " ".join("{}=\"{}\"".format(key, value)
+                         for key, value in attributes.items()),
+                offset[0])
+            offset[0] += _give_nbytes(parts)
+            return element
+
+        compressor = ""
+        if self.compress:
+            compressor = " compressor=\"vtkZLibDataCompressor\""
+        header = ["<?xml version=\"1.0\"?>\n",
+                  "<VTKFile type=\"UnstructuredGrid\" version=\"1.0\" "
+                  "byte_order=\"{}\" header_type=\"UInt64\"{}>\n".format(
+                      _byte_order, compressor),
+                  "<UnstructuredGrid>\n",
+                  "<Piece NumberOfPoints=\"{}\" NumberOfCells=\"{}\">\n"
+                  .format(self.n_points, self.n_cells),
+                  "<Points>\n", data_array(*self._points), "</Points>\n",
+                  "<Cells>\n"]
+        header.extend(data_array(*cell) for cell in self._cells)
+        header.extend(["</Cells>\n", "<PointData>\n"])
+        header.extend(data_array(*array) for array in arrays)
+        header.extend(["</PointData>\n", "</Piece>\n",
+                       "</UnstructuredGrid>\n",
+                       "<AppendedData encoding=\"raw\">\n_"])
+
+        with open(filename, "wb") as f:
+            f.write("".join(header))
+            for _, parts in [self._points] + self._cells + arrays:
+                _write_parts(f, parts)
+            f.write("\n</AppendedData>\n</VTKFile>\n")
+
+    def write_collection(self):
+        """
+        Writes the .pvd collection file with the written time steps.
+        """
+        filename = self.filename + ".pvd"
+        directory = os.path.dirname(filename)
+        lines = ["<?xml version=\"1.0\"?>\n",
+                 "<VTKFile type=\"Collection\" version=\"0.1\" "
+                 "byte_order=\"{}\">\n".format(_byte_order),
+                 "<Collection>\n"]
+        for time, step_filename in self.steps:
+            lines.append("<DataSet timestep=\"{!r}\" group=\"\" part=\"0\" "
+                         "file=\"{}\"/>\n".format(
+                             float(time),
+                             os.path.relpath(step_filename, directory or ".")))
+        lines.extend(["</Collection>\n", "</VTKFile>\n"])
+        with open(filename, "w") as f:
+            f.write("".join(lines))
@@ -0,0 +1,166 @@
+"""
+File for writing results in time steps to XDMF files with the heavy
+data in raw binary files.
+
+The .xdmf file is a small XML file that describes the mesh and the
+fields in each time step and points to where their values are in the
+binary files. The points and cells are written once to a mesh file
+and every time step writes its point data to its own file. The
+values are written as the raw bytes of the numpy arrays.
+"""
+
+import logging
+import os
+import sys
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+#: The XDMF cell types of the VTK cell types.
+xdmf_cell_types = {5: 4,   # Triangle
+                   9: 5}   # Quadrilateral
+
+#: The XDMF number types of the numpy types that can be written.
+xdmf_types = {np.dtype(np.float32): ("Float", 4),
+              np.dtype(np.float64): ("Float", 8),
+              np.dtype(np.int32): ("Int", 4)}
+
+_endian = "Little" if sys.byteorder == "little" else "Big"
+
+_attribute_types = {1: "Scalar", 3: "Vector", 9: "Tensor"}
+
+
+class XDMFTimeSeriesWriter(object):
+
+    """
+    Writes point data for a series of time steps.
+
+    Every call to `write` writes the data of the time step to a
+    binary file and rewrites the .xdmf file with all written time
+    steps, so the results can be opened in ParaView while the
+    analysis runs.
+    """
+
+    def __init__(self, filename, coordinates, cells):
+        """
+        Parameters
+        ==========
+        filename : string
+            The name of the results without extension. The
+            description is written to filename.xdmf, the mesh
+            to filename_mesh.bin and the time steps to
+            filename_<step>.bin.
+        coordinates : numpy.ndarray
+            n_points x 2 or n_points x 3 array with the coordinates
+            of the points.
+        cells : list
+            One item per group of cells of the same type with
+            a n_cells x n_vertices array of the point indices of
+            the vertices and the VTK cell type, see
+            `lolFem.elements.element.Element.vtk_cell_type`.
+        """
+        self.filename = filename
+        self.n_points = len(coordinates)
+        self.n_cells = sum(len(vertices) for vertices, _ in cells)
+
+        #: The times and the data items of the written time steps.
+        self.steps = []
+
+        points = np.zeros((self.n_points, 3), dtype=np.float64)
+        points[:, :coordinates.shape[1]] = coordinates
+
+        # Each cell is given by its type followed by its vertices.
+        topology = []
+        for vertices, cell_type in cells:
+            cell = np.empty((len(vertices), vertices.shape[1] + 1),
+                            dtype=np.int32)
+            cell[:, 0] = xdmf_cell_types[cell_type]
+            cell[:, 1:] = vertices
+            topology.append(cell.ravel())
+        topology = np.concatenate(topology)
+
+        mesh_filename = filename + "_mesh.bin"
+        self._topology, self._geometry = self._write_arrays(
+            mesh_filename, [topology, points])
+
+    def _write_arrays(self, filename, arrays):
+        """
+        Writes arrays one after the other to a binary file.
+
+        Returns
+        =======
+        list of strings
+            The data item elements of the arrays.
+        """
+        items = []
+        seek = 0
+        with open(filename, "wb") as f:
+            for array in arrays:
+                array = np.ascontiguousarray(array)
+                number_type, precision = xdmf_types[array.dtype]
+                items.append(
+                    "<DataItem Dimensions=\"{}\" NumberType=\"{}\" "
+                    "Precision=\"{}\" Format=\"Binary\" Endian=\"{}\" "
+                    "Seek=\"{}\">{}</DataItem>".format(
+                        " ".join(str(n) for n in array.shape), number_type,
+                        precision, _endian, seek, os.path.basename(filename)))
+                array.tofile(f)
+                seek += array.nbytes
+        return items
+
+    def write(self, time, point_data):
+        """
+        Writes the point data in a time step.
+
+        Parameters
+        ==========
+        time : float
+            The time of the time step.
+        point_data : OrderedDict
+            Mapping {name (string) : n_points x n_components array}.
+
+        Returns
+        =======
+        string
+            The name of the written binary file.
+        """
+        filename = "{}_{}.bin".format(self.filename, len(self.steps))
+        arrays = [np.asarray(values, dtype=np.float64)
+                  for values in point_data.values()]
+        items = self._write_arrays(filename, arrays)
+        attributes = [(name, array.shape[1] if array.ndim > 1 else 1, item)
+                      for name, array, item in zip(point_data, arrays, items)]
+        self.steps.append((time, attributes))
+        self.write_description()
+        logger.debug("Wrote time step %g to %s.", time, filename)
+        return filename
+
+    def write_description(self):
+        """
+        Writes the .xdmf file with the written time steps.
+        """
+        lines = ["<?xml version=\"1.0\" ?>\n",
+                 "<Xdmf Version=\"3.0\">\n",
+                 "<Domain>\n",
+                 "<Grid Name=\"TimeSeries\" GridType=\"Collection\" "
+                 "CollectionType=\"Temporal\">\n"]
+        for i, (time, attributes) in enumerate(self.steps):
+            lines.extend([
+                "<Grid Name=\"step_{}\" GridType=\"Uniform\">\n".format(i),
+                "<Time Value=\"{!r}\"/>\n".format(float(time)),
+                "<Topology TopologyType=\"Mixed\" "
+                "NumberOfElements=\"{}\">\n".format(self.n_cells),
+                self._topology, "\n</Topology>\n",
+                "<Geometry GeometryType=\"XYZ\">\n",
+                self._geometry, "\n</Geometry>\n"])
+            for name, n_components, item in attributes:
+                lines.extend([
+                    "<Attribute Name=\"{}\" AttributeType=\"{}\" "
+                    "Center=\"Node\">\n".format(
+                        name, _attribute_types.get(n_components, "Matrix")),
+                    item, "\n</Attribute>\n"])
+            lines.append("</Grid>\n")
+        lines.extend(["</Grid>\n", "</Domain>\n", "</Xdmf>\n"])
+        with open(self.filename + ".xdmf", "w") as f:
+            f.write("".join(lines))
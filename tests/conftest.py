@@ -0,0 +1,9 @@
+"""
+Makes the shared test helpers in this directory, see `helpers`,
+importable from the tests in the sub directories.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.expression import (Expression,
+                                                         ExpressionError)
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the boundary condition expressions."""
+
+    def setUp(self):
+        self.coordinates = np.array([[0.0, 1.0], [2.0, 3.0], [4.0, -5.0]])
+
+    def test_constant(self):
+        for value in [2, 2.0, "2.0", "sqrt(4.0)", "pi * 0 + 2"]:
+            expression = Expression(value)
+            self.assertEqual(expression.constant, 2.0)
+            self.assertFalse(expression.depends_on_time)
+            self.assertTrue(np.array_equal(
+                expression.evaluate(1.0, self.coordinates), [2.0] * 3))
+
+    def test_evaluate(self):
+        expression = Expression("x*t + sin(y) + z")
+        self.assertTrue(expression.depends_on_time)
+        self.assertTrue(expression.depends_on_space)
+        values = expression.evaluate(2.0, self.coordinates)
+        for (x, y), value in zip(self.coordinates, values):
+            self.assertAlmostEqual(value, x * 2.0 + np.sin(y))
+            self.assertAlmostEqual(value, expression(2.0, x, y, 0.0))
+
+    def test_conditional(self):
+        expression = Expression("t if y > 0 else -t")
+        values = expression.evaluate(3.0, self.coordinates)
+        self.assertTrue(np.array_equal(values, [3.0, 3.0, -3.0]))
+        self.assertEqual(expression(3.0, 0.0, -1.0, 0.0), -3.0)
+
+    def test_logical(self):
+        coordinates = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0],
+                                [0.4, 0.7]])
+        for value, expected in [
+                ("1 if x > 0.5 and y > 0.5 else 0", [0, 0, 1, 0]),
+                ("1 if x > 0.5 or y > 0.5 else 0", [0, 1, 1, 1]),
+                ("1 if not x > 0.5 else 0", [1, 0, 0, 1]),
+                ("1 if x > 0.5 and y > 0.5 or x < 0.1 else 0", [1, 0, 1, 0]),
+                ("0 < x < 1", [0, 0, 0, 1]),
+                ("1 if 0 <= y < x <= 1 else 2", [2, 1, 2, 2])]:
+            expression = Expression(value)
+            values = expression.evaluate(0.0, coordinates)
+            self.assertTrue(np.array_equal(values, expected), value)
+            for (x, y), value in zip(coordinates, values):
+                self.assertEqual(expression(0.0, x, y, 0.0), value)
+
+    def test_math_functions(self):
+        self.assertEqual(Expression("factorial(3)").constant, 6.0)
+        self.assertEqual(Expression("max(2, 5, 1)").constant, 5.0)
+        self.assertEqual(Expression("min(2, 5, 1)").constant, 1.0)
+        self.assertAlmostEqual(Expression("log(8, 2)").constant, 3.0)
+        self.assertAlmostEqual(Expression("erf(0.5)").constant,
+                               0.5204998778130465)
+
+        expression = Expression("max(x, y, 1) + factorial(t) + gamma(x + 1)")
+        values = expression.evaluate(3.0, self.coordinates)
+        self.assertTrue(np.allclose(values, [8.0, 11.0, 34.0]))
+        for (x, y), value in zip(self.coordinates, values):
+            self.assertAlmostEqual(expression(3.0, x, y, 0.0), value)
+
+    def test_invalid(self):
+        for value in ["x +", "__import__('os')", "x.real", "q * t",
+                      "sin(x=t)", "[x for x in y]", "lambda: 1"]:
+            self.assertRaises(ExpressionError, Expression, value)
+
+
+if __name__ == "__main__":
+    unittest.main()
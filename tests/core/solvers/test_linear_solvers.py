@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+from lolFem.core.solvers.linear_solvers import (
+    give_linear_solver, LinearSolver, IterativeSolver, DirectSolver, CGSolver,
+    UnknownLinearSolverError)
+from lolFem.core.solvers.preconditioners import Preconditioner
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the linear solvers."""
+
+    def setUp(self):
+        # 2D Laplacian, symmetric positive definite
+        n = 20
+        T = sparse.diags([-1.0, 2.0, -1.0], [-1, 0, 1], shape=(n, n))
+        I = sparse.identity(n)
+        self.K = (sparse.kron(T, I) + sparse.kron(I, T)).tocsr()
+        self.f = np.linspace(1.0, 2.0, n * n)
+        self.u = sparse.linalg.spsolve(self.K, self.f)
+
+    def check(self, solver):
+        u = solver.solve_eq(self.K, self.f)
+        self.assertTrue(np.allclose(u, self.u, rtol=1e-7, atol=0.0))
+        self.assertEqual(solver.n_solves, 1)
+        self.assertTrue(solver.n_iterations > 0)
+
+    def test_direct(self):
+        for permc_spec in ["COLAMD", "MMD_AT_PLUS_A", "NATURAL"]:
+            self.check(DirectSolver(permc_spec))
+
+    def test_iterative(self):
+        for name in ["cg", "minres", "gmres"]:
+            for preconditioner in [None, "jacobi", "ilu"]:
+                self.check(give_linear_solver(
+                    name, preconditioner=preconditioner, tol=1e-12))
+
+    def test_preconditioner_reduces_iterations(self):
+        plain = CGSolver(tol=1e-12)
+        ilu = CGSolver(preconditioner="ilu", tol=1e-12)
+        plain.solve_eq(self.K, self.f)
+        ilu.solve_eq(self.K, self.f)
+        self.assertTrue(ilu.n_iterations < plain.n_iterations)
+
+    def test_unknown(self):
+        self.assertRaises(UnknownLinearSolverError,
+                          give_linear_solver, "magic")
+        self.assertRaises(UnknownLinearSolverError,
+                          give_linear_solver, "cg", preconditioner="magic")
+
+    def test_abstract(self):
+        class NoSolve(LinearSolver):
+            pass
+
+        class NoIterate(IterativeSolver):
+            pass
+
+        class NoCreate(Preconditioner):
+            pass
+
+        for cls in [LinearSolver, IterativeSolver, Preconditioner,
+                    NoSolve, NoIterate, NoCreate]:
+            self.assertRaises(TypeError, cls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.boundary_conditions.point_load import PointLoad
+from lolFem.core.dof import D_u, D_v
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.core.solvers.newton_raphson import Newton, NewtonModeError
+from lolFem.core.solvers.numpy_linalg_sp_solve import NumpyLinalgSpSolve
+from lolFem.materials.linear_isotropic import LinearIsotropic
+
+import helpers
+
+
+def solve(mode):
+    """Solves a linear problem with the given Newton mode."""
+    bcs = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+           (Dirichlet, "x*t", [D_v], "y1"),
+           (PointLoad, "1e6*t", [D_u], "x1")]
+    domain = helpers.create_domain(bcs)
+    solver = Newton(1e-8, 10, mode=mode)
+    NonLinearStatic(solver, domain, [0.0, 0.5, 1.0]).go()
+    return domain.get_all_dof_values(), solver
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the modes of the Newton solver."""
+
+    def test_modes(self):
+        u_full, _ = solve("full")
+        for mode in ["modified", "initial", "bfgs"]:
+            u, solver = solve(mode)
+            self.assertTrue(np.allclose(u, u_full, rtol=1e-8, atol=1e-12))
+            # Linear material, one factorization for all time steps.
+            self.assertEqual(solver.n_factorizations, 1)
+
+    def test_predictor(self):
+        class PredictingNewton(Newton):
+            predicting = False
+
+            def _predict(self, model, t, load):
+                self.predicting = True
+                try:
+                    super(PredictingNewton, self)._predict(model, t, load)
+                finally:
+                    self.predicting = False
+
+        class CountingSolver(NumpyLinalgSpSolve):
+            def solve_eq(self, K, f):
+                solves.append("predictor" if newton.predicting else "loop")
+                return super(CountingSolver, self).solve_eq(K, f)
+
+        u = {}
+        for predictor in [True, False]:
+            solves = []
+            bcs = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+                   (Dirichlet, "x*t", [D_v], "y1")]
+            domain = helpers.create_domain(
+                bcs, materials=[LinearIsotropic(10e9, 0.3)],
+                thicknesses=(1.0,))
+            newton = PredictingNewton(1e-8, 10,
+                                      linear_solver=CountingSolver(),
+                                      predictor=predictor)
+            NonLinearStatic(newton, domain, [0.0, 0.5, 1.0]).go()
+            u[predictor] = domain.get_all_dof_values()
+
+            # The prescribed values change in two time steps. With the
+            # predictor a linear problem is solved by it and the
+            # iterations only check the residual.
+            if predictor:
+                self.assertEqual(solves, ["predictor"] * 2)
+            else:
+                self.assertEqual(solves, ["loop"] * 2)
+        self.assertTrue(np.allclose(u[True], u[False], rtol=1e-8,
+                                    atol=1e-12))
+        self.assertFalse(Newton(1e-8, 10).predictor)
+
+    def test_unknown_mode(self):
+        self.assertRaises(NewtonModeError, Newton, 1e-8, 10, mode="magic")
+
+
+if __name__ == "__main__":
+    unittest.main()
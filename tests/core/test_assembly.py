@@ -0,0 +1,182 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.boundary_conditions.point_load import PointLoad
+from lolFem.core.dof import D_u, D_v
+
+import helpers
+
+BCS = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+       (Dirichlet, "x*t", [D_v], "y1"),
+       (PointLoad, 1e6, [D_u], "x1")]
+
+
+def create_domain(assembly, cache_geometry=False):
+    """Domain with numbered dofs and created material state."""
+    domain = helpers.create_domain(BCS, assembly,
+                                   cache_geometry=cache_geometry)
+    domain.create_element_blocks()
+    if cache_geometry:
+        domain.create_geometry_cache()
+    domain.create_dofs()
+    domain.set_dof_numbering()
+    domain.create_material_statuses()
+    return domain
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the assembly of global matrices in `Domain`."""
+
+    def setUp(self):
+        self.domain_element = create_domain("element")
+        self.domain_batched = create_domain("batched")
+
+    def test_element_blocks(self):
+        blocks = self.domain_batched.element_blocks
+        self.assertEqual(sum(len(block) for block in blocks),
+                         len(self.domain_batched.mesh.elements))
+        for block in blocks:
+            for element in block.elements:
+                self.assertIs(element.section, block.section)
+                self.assertIs(type(element), type(block.prototype))
+
+    def test_stiffness_matrix(self):
+        K_element = self.domain_element.assemble_stiffness_matrix()
+        K_batched = self.domain_batched.assemble_stiffness_matrix()
+        self.assertEqual(K_element.shape, K_batched.shape)
+        self.assertTrue(np.array_equal(K_element.indptr, K_batched.indptr))
+        self.assertTrue(np.array_equal(K_element.indices, K_batched.indices))
+        scale = np.max(np.abs(K_element.data))
+        self.assertTrue(np.allclose(K_element.data, K_batched.data,
+                                    rtol=0.0, atol=1e-12 * scale))
+
+    def test_coupling_matrix(self):
+        K_fps = []
+        for domain in [self.domain_element, self.domain_batched]:
+            K, K_fp = domain.assemble_stiffness_matrix(coupling=True)
+            self.assertEqual(K_fp.shape, (domain.number_of_equations,
+                                          domain.number_of_prescribed_equations))
+            K_fps.append(K_fp.toarray())
+        scale = np.max(np.abs(K_fps[0]))
+        self.assertTrue(np.allclose(K_fps[0], K_fps[1],
+                                    rtol=0.0, atol=1e-12 * scale))
+
+        # The internal forces are linear in the prescribed values.
+        domain = self.domain_batched
+        f_0, _ = domain.assemble_internal_forces(0.0)
+        f_1, _ = domain.assemble_internal_forces(1.0)
+        du_p = domain.compute_prescribed_increment(1.0)
+        self.assertTrue(np.allclose(f_1 - f_0, K_fps[1].dot(du_p),
+                                    rtol=0.0, atol=1e-10 * np.max(np.abs(f_1))))
+
+    def test_stiffness_matrix_reassembly(self):
+        domain = self.domain_batched
+        K_1 = domain.assemble_stiffness_matrix()
+        K_2 = domain.assemble_stiffness_matrix()
+        self.assertFalse(np.may_share_memory(K_1.data, K_2.data))
+        self.assertTrue(np.array_equal(K_1.data, K_2.data))
+        self.assertTrue(K_2.has_canonical_format)
+
+        # Reused matrices share their values.
+        K_3 = domain.assemble_stiffness_matrix(reuse=True)
+        K_4 = domain.assemble_stiffness_matrix(reuse=True)
+        self.assertTrue(np.may_share_memory(K_3.data, K_4.data))
+        self.assertFalse(np.may_share_memory(K_1.data, K_3.data))
+        self.assertTrue(np.array_equal(K_1.data, K_4.data))
+
+    def test_internal_forces(self):
+        for domain in [self.domain_element, self.domain_batched]:
+            u = np.linspace(0.0, 1e-3, domain.number_of_equations)
+            domain.update_dof_values(u, 0.5)
+        f_element, f2_element = self.domain_element.get_internal_forces(0.5)
+        f_batched, f2_batched = self.domain_batched.get_internal_forces(0.5)
+        scale = np.max(np.abs(f_element))
+        self.assertTrue(np.allclose(f_element, f_batched,
+                                    rtol=0.0, atol=1e-12 * scale))
+        self.assertTrue(np.allclose(f2_element, f2_batched,
+                                    rtol=0.0, atol=1e-12 * scale ** 2))
+
+    def test_boundary_conditions(self):
+        domain = self.domain_batched
+        mesh = domain.mesh
+        dirichlet_0, dirichlet_y1, load = domain.boundary_conditions
+
+        # The load on x1 is given last and overrides the
+        # Dirichlet bcs on the corner nodes.
+        for node_id in mesh.node_sets["x1"].ids:
+            self.assertIs(domain.give_boundary_condition(node_id, D_u), load)
+        for node_id in mesh.node_sets["y1"].ids:
+            self.assertIs(domain.give_boundary_condition(node_id, D_v),
+                          dirichlet_y1)
+
+        f, f_squared = domain.compute_load_vector(0.5)
+        self.assertAlmostEqual(np.sum(f), 1e6 * len(mesh.node_sets["x1"].ids))
+        self.assertTrue(np.array_equal(f_squared, f ** 2))
+
+        u_p = domain.compute_prescribed_vector(0.5)
+        self.assertEqual(len(u_p), domain.number_of_prescribed_equations)
+        u = domain.give_unknowns(0.5)
+        for node_id in mesh.node_sets["y1"].ids:
+            node = mesh.nodes[node_id]
+            i = domain.dof_table.node_dofs[node.dof_index, D_v - 1]
+            eq = domain.dof_table.equation_number[i]
+            self.assertAlmostEqual(u_p[-eq - 1], 0.5 * node.coordinates[0])
+            self.assertAlmostEqual(u[i], 0.5 * node.coordinates[0])
+
+    def test_moved_boundary_conditions(self):
+        domain = self.domain_batched
+        mesh = domain.mesh
+        for node in mesh.nodes.values():
+            node.coordinates = [3.0 * node.coordinates[0]] + \
+                list(node.coordinates[1:])
+        domain.invalidate_geometry_cache()
+
+        # The Dirichlet bc "x*t" on y1 is evaluated in the moved nodes.
+        u_p = domain.compute_prescribed_vector(0.5)
+        for node_id in mesh.node_sets["y1"].ids:
+            node = mesh.nodes[node_id]
+            i = domain.dof_table.node_dofs[node.dof_index, D_v - 1]
+            eq = domain.dof_table.equation_number[i]
+            self.assertAlmostEqual(u_p[-eq - 1], 0.5 * node.coordinates[0])
+
+    def test_geometry_cache(self):
+        def stretch(domain):
+            # A non uniform transform, the plane strain stiffness
+            # is invariant to uniform scaling.
+            for node in domain.mesh.nodes.values():
+                x = node.coordinates
+                node.coordinates = [2.0 * x[0] + 0.5 * x[1]] + list(x[1:])
+
+        K_element = self.domain_element.assemble_stiffness_matrix().toarray()
+        fresh = create_domain("element")
+        stretch(fresh)
+        K_fresh = fresh.assemble_stiffness_matrix().toarray()
+        scale = np.max(np.abs(K_element))
+        self.assertFalse(np.allclose(K_element, K_fresh,
+                                     rtol=0.0, atol=1e-6 * scale))
+
+        for assembly in ["element", "batched"]:
+            domain = create_domain(assembly, cache_geometry=True)
+            self.assertTrue(domain.give_geometry_cache_nbytes() > 0)
+            K_cached = domain.assemble_stiffness_matrix().toarray()
+            self.assertTrue(np.allclose(K_cached, K_element,
+                                        rtol=0.0, atol=1e-11 * scale))
+
+            # The cache is used until it is invalidated.
+            stretch(domain)
+            K_stale = domain.assemble_stiffness_matrix().toarray()
+            self.assertTrue(np.array_equal(K_stale, K_cached))
+
+            domain.invalidate_geometry_cache()
+            K_moved = domain.assemble_stiffness_matrix().toarray()
+            self.assertFalse(np.allclose(K_moved, K_cached,
+                                         rtol=0.0, atol=1e-6 * scale))
+            self.assertTrue(np.allclose(K_moved, K_fresh,
+                                        rtol=0.0, atol=1e-11 * scale))
+
+
+if __name__ == "__main__":
+    unittest.main()
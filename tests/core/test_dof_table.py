@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.dof import DofTable, D_u, D_v, DT_active, DT_master
+from lolFem.core.node import Node
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the array backed dof storage: DofTable."""
+
+    def setUp(self):
+        self.nodes = [Node(1, [0.0, 0.0]), Node(2, [1.0, 0.0]),
+                      Node(3, [1.0, 1.0])]
+        has_dof = np.array([[True, True, False],
+                            [True, True, False],
+                            [True, True, False]])
+        prescribed = np.zeros((3, 3), dtype=bool)
+        prescribed[0, 0:2] = True
+        prescribed[2, 1] = True
+        self.table = DofTable(self.nodes, has_dof, prescribed)
+        for i, node in enumerate(self.nodes):
+            node.dof_table = self.table
+            node.dof_index = i
+
+    def test_ordering(self):
+        self.assertEqual(len(self.table), 6)
+        self.assertEqual(list(self.table.n), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(list(self.table.node_index), [0, 0, 1, 1, 2, 2])
+        self.assertEqual(list(self.table.dof_id), [D_u, D_v] * 3)
+        self.assertEqual(list(self.table.dof_type),
+                         [DT_active, DT_active, DT_master,
+                          DT_master, DT_master, DT_active])
+
+    def test_give_dof_indices(self):
+        dofs = self.table.give_dof_indices(np.array([[2, 0]]), [D_u, D_v])
+        self.assertEqual(dofs.tolist(), [[[4, 5], [0, 1]]])
+
+    def test_node_dofs_view(self):
+        dofs = self.nodes[1].dofs
+        self.assertEqual([dof.n for dof in dofs], [3, 4])
+        self.assertIs(dofs[0].node, self.nodes[1])
+        dofs[1].value += 2.5
+        self.assertEqual(self.table.value[3], 2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.boundary_conditions.point_load import PointLoad
+from lolFem.core.domain import RecoveryError
+from lolFem.core.recovery import give_interpolation_matrix
+from lolFem.core.dof import D_u, D_v
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.core.solvers.newton_raphson import Newton
+from lolFem.materials.linear_isotropic import LinearIsotropic
+
+import helpers
+
+
+def create_domain():
+    materials = [LinearIsotropic(100e9, 0.3), LinearIsotropic(10e9, 0.3)]
+    bcs = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+           (PointLoad, "1e6*t", [D_u], "y1")]
+    return helpers.create_domain(bcs, materials=materials,
+                                 thicknesses=(1.0, 1.0))
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the patch recovery and the error estimator."""
+
+    def test_linear_field(self):
+        domain = create_domain()
+        domain.create_material_statuses()
+        coordinates = domain.mesh.give_coordinates()
+
+        def field(x):
+            return np.array([1.0, 2.0, -1.0, 0.5]) + \
+                np.outer(x[:, 0], [1.0, 0.0, 3.0, 1.0]) + \
+                np.outer(x[:, 1], [-2.0, 1.0, 0.0, 4.0])
+
+        for block in domain.element_blocks:
+            N = give_interpolation_matrix(block.prototype)
+            gp_coords = np.einsum("gv,evk->egk", N,
+                                  coordinates[block.vertices])
+            block.material_state.committed["stress"][:] = field(
+                gp_coords.reshape(-1, 2))
+
+        # A linear field is recovered exactly in all nodes, also on
+        # the boundary and between the sections.
+        domain.recover_fields_in_nodes(method="spr")
+        self.assertTrue(np.allclose(domain.nodal_stress, field(coordinates),
+                                    rtol=1e-10, atol=1e-10))
+
+        estimator = domain.estimate_error()
+        self.assertLess(estimator.give_relative_error(), 1e-10)
+        self.assertEqual(estimator.give_elements_to_refine(1e-6), [])
+
+    def test_refinement(self):
+        domain = create_domain()
+        NonLinearStatic(Newton(1e-10, 10), domain, [0.0, 1.0]).go()
+        estimator = domain.estimate_error()
+        error = estimator.give_relative_error()
+        self.assertGreater(error, 0.0)
+        self.assertLess(error, 1.0)
+
+        n_elements = len(domain.mesh.elements)
+        self.assertEqual(sorted(estimator.give_elements_to_refine(0.0)),
+                         sorted(domain.mesh.elements))
+        refine = estimator.give_elements_to_refine(error)
+        self.assertGreater(len(refine), 0)
+        self.assertLess(len(refine), n_elements)
+
+        # The errors are consistent with the norms.
+        element_errors = np.concatenate(estimator.element_errors)
+        self.assertAlmostEqual(np.sqrt(np.sum(element_errors ** 2)),
+                               estimator.give_error_norm())
+
+    def test_unknown_method(self):
+        domain = create_domain()
+        domain.create_material_statuses()
+        self.assertRaises(RecoveryError, domain.recover_fields_in_nodes,
+                          method="magic")
+
+
+if __name__ == "__main__":
+    unittest.main()
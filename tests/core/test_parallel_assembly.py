@@ -0,0 +1,110 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.domain import AssemblyTypeError
+from lolFem.core.element_block import color_elements
+from lolFem.core.dof import D_u, D_v
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.core.parallel_assembly import (ParallelAssembler,
+                                          ParallelAssemblyError)
+from lolFem.core.solvers.newton_raphson import Newton
+from lolFem.materials.J2_plasticity import J2Plasticity
+from lolFem.materials.linear_isotropic import LinearIsotropic
+
+import helpers
+
+
+def create_domain(assembly="batched"):
+    """Mixed mesh with an elastic and a plastic section."""
+    materials = [LinearIsotropic(100e9, 0.3),
+                 J2Plasticity(100e6, LinearIsotropic(10e9, 0.3), H_iso=1e9)]
+    bcs = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+           (Dirichlet, "0.03*t", [D_v], "y1"),
+           (Dirichlet, 0.0, [D_u], "y1")]
+    return helpers.create_domain(bcs, assembly, materials,
+                                 thicknesses=(1.0, 1.0))
+
+
+def solve(n_workers, parallel="processes"):
+    domain = create_domain()
+    model = NonLinearStatic(Newton(1e-10, 15), domain, [0.0, 0.5, 1.0],
+                            n_workers=n_workers, parallel=parallel)
+    model.go()
+    return domain, model
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the parallel assembly."""
+
+    def test_color_elements(self):
+        vertices = np.array([[0, 1, 2], [1, 2, 3], [3, 4, 5], [6, 7, 8],
+                             [2, 3, 6]])
+        colors = color_elements(vertices)
+        self.assertEqual(colors.tolist(), [0, 1, 0, 0, 2])
+
+        domain = create_domain()
+        domain.create_element_blocks()
+        domain.color_element_blocks()
+        for block in domain.element_blocks:
+            offsets = block.color_offsets
+            for start, stop in zip(offsets[:-1], offsets[1:]):
+                nodes = block.vertices[start:stop].ravel()
+                self.assertEqual(len(np.unique(nodes)), len(nodes))
+            for i, element in enumerate(block.elements):
+                self.assertEqual(element.block_index, i)
+
+    def test_reproducible(self):
+        domain_serial, _ = solve(1)
+        u_serial = domain_serial.get_all_dof_values()
+        domain_2, model_2 = solve(2)
+        u_2 = domain_2.get_all_dof_values()
+        domain_3, _ = solve(3)
+        u_3 = domain_3.get_all_dof_values()
+
+        # The results do not depend on the number of workers.
+        self.assertTrue(np.array_equal(u_2, u_3))
+        self.assertTrue(np.allclose(u_2, u_serial, rtol=1e-10, atol=1e-14))
+
+        # The stresses computed by the workers are committed.
+        alpha = domain_2.element_blocks[1].material_state.committed["alpha"]
+        self.assertTrue(np.any(alpha > 0.0))
+        self.assertIsNone(domain_2.parallel_assembler)
+
+    def test_threads(self):
+        domain_processes, _ = solve(2)
+        domain_threads, _ = solve(3, "threads")
+        self.assertTrue(np.array_equal(domain_threads.get_all_dof_values(),
+                                       domain_processes.get_all_dof_values()))
+
+    def test_element_assembly(self):
+        domain = create_domain("element")
+        domain.create_element_blocks()
+        domain.color_element_blocks()
+        domain.create_dofs()
+        domain.set_dof_numbering()
+        domain.create_material_statuses()
+        self.assertRaises(ParallelAssemblyError,
+                          domain.start_parallel_assembly, 2)
+        self.assertRaises(AssemblyTypeError,
+                          domain.start_parallel_assembly, 2, "fibers")
+
+    def test_abstract(self):
+        class NoMap(ParallelAssembler):
+            def start(self):
+                pass
+
+        domain = create_domain()
+        domain.create_element_blocks()
+        domain.color_element_blocks()
+        domain.create_dofs()
+        domain.set_dof_numbering()
+        domain.create_material_statuses()
+        for cls in [ParallelAssembler, NoMap]:
+            self.assertRaises(TypeError, cls, domain, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
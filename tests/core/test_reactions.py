@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.boundary_conditions.point_load import PointLoad
+from lolFem.core.domain import ResultsError
+from lolFem.core.dof import D_u, D_v
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.core.node_set import NodeSet
+from lolFem.core.solvers.newton_raphson import Newton
+
+import helpers
+
+BCS = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+       (Dirichlet, "0.01*x*t", [D_v], "y1"),
+       (PointLoad, "1e6*t", [D_u], "x1")]
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the reaction forces and nodal results of `Domain`."""
+
+    def setUp(self):
+        self.domain = helpers.create_domain(BCS)
+
+    def test_not_assembled(self):
+        self.domain.create_dofs()
+        self.assertRaises(ResultsError, self.domain.give_reactions, "y0")
+
+    def test_reactions(self):
+        domain = self.domain
+        NonLinearStatic(Newton(1e-10, 10), domain, [0.0, 1.0]).go()
+        mesh = domain.mesh
+        f_int = domain.internal_forces
+
+        reactions = domain.give_reactions(mesh.node_sets["y0"])
+        self.assertEqual(reactions.shape, (len(mesh.node_sets["y0"].ids), 2))
+        for node_id, reaction in zip(mesh.node_sets["y0"].ids, reactions):
+            node = mesh.nodes[node_id]
+            for dof in node.dofs:
+                self.assertEqual(reaction[dof.dof_id - 1], f_int[dof.n - 1])
+
+        # The names of sets in the mesh can be used.
+        self.assertTrue(np.array_equal(
+            domain.give_reaction_sum("y0", [D_v]),
+            np.sum(reactions[:, 1:], axis=0)))
+
+        # The internal forces are in equilibrium.
+        all_nodes = NodeSet("all", mesh.nodes.keys())
+        total = domain.give_reaction_sum(all_nodes)
+        scale = np.max(np.abs(reactions))
+        self.assertTrue(np.allclose(total, 0.0, atol=1e-8 * scale))
+
+        # The loads are the reactions in the loaded dofs.
+        load = domain.give_reaction_sum("x1", [D_u])[0]
+        self.assertAlmostEqual(load / 1e6, len(mesh.node_sets["x1"].ids))
+
+    def test_displacements(self):
+        domain = self.domain
+        NonLinearStatic(Newton(1e-10, 10), domain, [0.0, 1.0]).go()
+        mesh = domain.mesh
+        u = domain.give_displacements("y1")
+        for node_id, u_node in zip(mesh.node_sets["y1"].ids, u):
+            x = mesh.nodes[node_id].coordinates[0]
+            self.assertAlmostEqual(u_node[1], 0.01 * x)
+        # The load on x1 overrides the bc in u on the corner node.
+        self.assertTrue(np.all(domain.give_displacements("y0", [D_v]) == 0.0))
+        self.assertIs(domain.give_node_set_nodes("y1"),
+                      domain.give_node_set_nodes(mesh.node_sets["y1"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from lolFem.core.read_abaqus_mesh import read_abaqus_mesh, ReadInpFileError
+from lolFem.core import mesh_cache
+from lolFem.core.element_block import create_element_blocks
+from lolFem.core.section import Section
+from lolFem.materials.linear_isotropic import LinearIsotropic
+
+MESH_DIR = os.path.join(os.path.dirname(__file__), "..", "..",
+                        "examples", "meshes")
+
+SMALL_INP = """*Heading
+** A comment
+*Part, name=Part-1
+*Node
+      1,   0.,   0.
+      2,   1.,   0.
+
+      3,   1.,   1.5
+      4,   0.,   1.
+*Element, type=CPS3
+1, 1, 2, 3
+*Element, type=CPS4R
+2, 1, 2, 3, 4
+*Elset, elset=All, generate
+ 1, 2, 1
+*Nset, nset=corners
+ 1, 2,
+ 4,
+*Nset, nset=odd, generate
+ 1, 4, 2
+*End Part
+*Nset, nset=outside
+ 1
+"""
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the reading of Abaqus input files."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, text):
+        filename = os.path.join(self.tmp_dir, "mesh.inp")
+        with open(filename, "w") as f:
+            f.write(text)
+        return filename
+
+    def test_small(self):
+        mesh = read_abaqus_mesh(self.write(SMALL_INP))
+        self.assertEqual(mesh.nodes.keys(), [1, 2, 3, 4])
+        self.assertEqual(mesh.nodes[3].coordinates, [1.0, 1.5])
+        self.assertEqual(mesh.elements[1].vertices, [1, 2, 3])
+        self.assertEqual(mesh.elements[2].vertices, [1, 2, 3, 4])
+        self.assertEqual(type(mesh.elements[2]).__name__, "QuadPlaneStrain")
+        self.assertEqual(mesh.element_sets["All"].ids, [1, 2])
+        self.assertEqual(mesh.node_sets["corners"].ids, [1, 2, 4])
+        self.assertEqual(mesh.node_sets["odd"].ids, [1, 3])
+        self.assertFalse("outside" in mesh.node_sets)
+
+    def test_example_mesh(self):
+        mesh = read_abaqus_mesh(os.path.join(MESH_DIR,
+                                             "square_with_circles.inp"))
+        self.assertEqual(len(mesh.nodes), 547)
+        self.assertEqual(len(mesh.elements), 517)
+        self.assertEqual(mesh.element_sets["matrix"].ids, range(96, 455))
+        self.assertEqual(len(mesh.element_sets["circles"].ids), 158)
+        self.assertEqual(mesh.node_sets["y0"].ids[-1], 73)
+
+    def test_bad_data(self):
+        filename = self.write(SMALL_INP.replace("0.,   1.", "0.,   x"))
+        self.assertRaises(ReadInpFileError, read_abaqus_mesh, filename)
+
+    def test_cache(self):
+        filename = self.write(SMALL_INP)
+        directory = mesh_cache.give_cache_directory(filename)
+        mesh = read_abaqus_mesh(filename, cache=True)
+        self.assertTrue(mesh_cache.is_cache_valid(directory, filename))
+
+        # Only touching the file keeps the cache and updates its key,
+        # so the file is not hashed again.
+        os.utime(filename, (1, 1))
+        self.assertTrue(mesh_cache.is_cache_valid(directory, filename))
+        key = mesh_cache.give_cache_meta(directory)["key"]
+        self.assertEqual(key, mesh_cache.give_file_key(filename))
+
+        cached = read_abaqus_mesh(filename, cache=True)
+        self.assertTrue(np.array_equal(cached.give_coordinates(),
+                                       mesh.give_coordinates()))
+        self.assertEqual(cached.elements.keys(), mesh.elements.keys())
+        for element_id, element in mesh.elements.iteritems():
+            self.assertEqual(cached.elements[element_id].vertices,
+                             element.vertices)
+            self.assertIs(type(cached.elements[element_id]), type(element))
+        self.assertEqual(cached.node_sets["corners"].ids, [1, 2, 4])
+        self.assertEqual(cached.element_sets["All"].ids, [1, 2])
+
+        # A changed file invalidates the cache.
+        filename = self.write(SMALL_INP.replace("1.5", "2.5"))
+        os.utime(filename, (0, 0))
+        self.assertFalse(mesh_cache.is_cache_valid(directory, filename))
+        mesh = read_abaqus_mesh(filename, cache=True)
+        self.assertEqual(mesh.nodes[3].coordinates, [1.0, 2.5])
+
+    def test_cache_arrays(self):
+        filename = os.path.join(MESH_DIR, "square_with_circles.inp")
+        directory = os.path.join(self.tmp_dir, "cache")
+        meshes = [read_abaqus_mesh(filename, cache=directory),
+                  read_abaqus_mesh(filename, cache=directory)]
+        mesh, cached = meshes
+        self.assertIsNone(mesh.coordinates)
+        self.assertTrue(isinstance(cached.coordinates, np.memmap))
+
+        # The coordinates and the connectivity are used without copies.
+        coordinates = cached.give_coordinates()
+        self.assertTrue(np.may_share_memory(coordinates, cached.coordinates))
+        self.assertTrue(np.array_equal(coordinates, mesh.give_coordinates()))
+        blocks = []
+        for m in meshes:
+            section = Section(LinearIsotropic(100e9, 0.3), 1.0)
+            section.assign_to(m, m.element_sets["circles"])
+            Section(LinearIsotropic(10e9, 0.3), 1.0).assign_to(
+                m, m.element_sets["matrix"])
+            blocks.append(create_element_blocks(m))
+        for block, cached_block in zip(*blocks):
+            self.assertTrue(np.array_equal(block.vertices,
+                                           cached_block.vertices))
+        self.assertTrue(any(
+            np.may_share_memory(block.vertices, vertices)
+            for block in blocks[1] for _, vertices in cached.vertex_runs))
+
+        # Moved nodes are seen after the arrays are invalidated.
+        node = cached.nodes.values()[0]
+        node.coordinates = [5.0, 6.0]
+        cached.invalidate_arrays()
+        self.assertEqual(cached.give_coordinates()[0].tolist(), [5.0, 6.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.recovery import give_extrapolation_matrix
+
+import helpers
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the recovery of fields in the nodes."""
+
+    def setUp(self):
+        self.domain = helpers.create_domain()
+        self.domain.create_material_statuses()
+
+    def test_extrapolation_matrix(self):
+        for block in self.domain.element_blocks:
+            element = block.prototype
+            E = give_extrapolation_matrix(element)
+            N = np.array([element.interpolator.eval_N(gp.local_coords)
+                          for gp in element.integrator.gausspoints])
+            self.assertEqual(E.shape, (len(element.vertices),
+                                       element.n_gausspoints))
+            if element.n_gausspoints == 1:
+                self.assertTrue(np.allclose(E, 1.0))
+            else:
+                self.assertTrue(np.allclose(E.dot(N), np.eye(len(N))))
+
+    def test_uniform(self):
+        domain = self.domain
+        value = np.array([1.0, -2.0, 3.0, 0.5])
+        for block in domain.element_blocks:
+            block.material_state.committed["stress"][:] = value
+            block.material_state.committed["strain"][:] = 2.0 * value
+        for volume_weighted in [False, True]:
+            domain.recover_fields_in_nodes(volume_weighted)
+            n_nodes = len(domain.mesh.nodes)
+            self.assertEqual(domain.nodal_stress.shape, (n_nodes, 4))
+            self.assertTrue(np.allclose(domain.nodal_stress, value))
+            self.assertTrue(np.allclose(domain.nodal_strain, 2.0 * value))
+
+    def test_average(self):
+        domain = self.domain
+        mesh = domain.mesh
+        rand = np.random.RandomState(0)
+        for block in domain.element_blocks:
+            stress = block.material_state.committed["stress"]
+            stress[:] = rand.rand(*stress.shape)
+        domain.recover_fields_in_nodes(volume_weighted=True)
+
+        # Extrapolate and average element by element.
+        node_index = mesh.give_node_index()
+        sums = np.zeros((len(mesh.nodes), 4))
+        weights = np.zeros(len(mesh.nodes))
+        for block in domain.element_blocks:
+            for i, element in enumerate(block.elements):
+                E = give_extrapolation_matrix(element)
+                gps = element.integrator.gausspoints
+                stress = np.array([gp.material_status.stress for gp in gps])
+                volume = sum(element.compute_volume_around(gp, mesh)
+                             for gp in gps)
+                for vert, node_stress in zip(element.vertices,
+                                             E.dot(stress)):
+                    sums[node_index[vert]] += volume * node_stress
+                    weights[node_index[vert]] += volume
+        expected = sums / weights[:, np.newaxis]
+        self.assertTrue(np.allclose(domain.nodal_stress, expected,
+                                    rtol=1e-12, atol=0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.boundary_conditions.point_load import PointLoad
+from lolFem.core.domain import RenumberingError
+from lolFem.core.dof import D_u, D_v
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.core.solvers.newton_raphson import Newton
+
+import helpers
+
+BCS = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+       (Dirichlet, "x*t", [D_v], "y1"),
+       (PointLoad, "1e6*t", [D_u], "x1")]
+
+
+def create_domain(renumbering):
+    return helpers.create_domain(BCS, renumbering=renumbering)
+
+
+def brute_force_bandwidth_and_profile(K):
+    K = K.tocoo()
+    lower = K.row >= K.col
+    rows, cols = K.row[lower], K.col[lower]
+    profile = 0
+    for row in np.unique(rows):
+        profile += row - cols[rows == row].min()
+    return [int(np.max(np.abs(K.row - K.col))), int(profile)]
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the renumbering of the equations."""
+
+    def test_bandwidth_and_profile(self):
+        stats = {}
+        for renumbering in [None, "rcm"]:
+            domain = create_domain(renumbering)
+            domain.create_element_blocks()
+            domain.create_dofs()
+            domain.set_dof_numbering()
+            domain.create_material_statuses()
+            K = domain.assemble_stiffness_matrix()
+            stats[renumbering] = domain.give_bandwidth_and_profile()
+            self.assertEqual(stats[renumbering],
+                             brute_force_bandwidth_and_profile(K))
+
+            # All free dofs get a unique equation number.
+            eq = domain.dof_table.equation_number
+            self.assertEqual(sorted(eq[eq > 0]),
+                             range(1, domain.number_of_equations + 1))
+        self.assertLess(stats["rcm"][0], stats[None][0])
+        self.assertLess(stats["rcm"][1], stats[None][1])
+
+    def test_solution(self):
+        u = {}
+        for renumbering in [None, "rcm"]:
+            domain = create_domain(renumbering)
+            NonLinearStatic(Newton(1e-8, 10), domain, [0.0, 0.5, 1.0]).go()
+            u[renumbering] = domain.get_all_dof_values()
+        # The values are in the order of the dofs for both numberings.
+        self.assertTrue(np.allclose(u["rcm"], u[None], rtol=1e-10,
+                                    atol=1e-14))
+
+    def test_unknown_renumbering(self):
+        self.assertRaises(RenumberingError, create_domain, "magic")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Shared helpers for the tests that run analyses on the example mesh
+of a square with circular inclusions.
+"""
+
+import os
+
+from lolFem.core.read_abaqus_mesh import read_abaqus_mesh
+from lolFem.core.domain import Domain
+from lolFem.core.section import Section
+from lolFem.materials.linear_isotropic import LinearIsotropic
+
+MESH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                        "examples", "meshes")
+
+#: The mixed triangle and quad mesh used by the analysis tests.
+MESH_FILE = os.path.join(MESH_DIR, "square_with_circles.inp")
+
+
+def create_domain(bcs=(), assembly="batched", materials=None,
+                  thicknesses=(1.0, 2.0), **kwargs):
+    """
+    Creates a plane strain domain on the square with circles.
+
+    Parameters
+    ==========
+    bcs : list of tuples
+        (boundary condition class, value, dof ids, node set name)
+        for each boundary condition.
+    assembly : {"element", "batched"}
+        The assembly of the domain.
+    materials : list of `lolFem.materials.material.Material`, optional
+        One material for all elements, or the materials of the
+        circles and of the matrix. Defaults to stiff circles in
+        a soft matrix.
+    thicknesses : tuple of floats
+        The thicknesses of the sections, in the same order
+        as `materials`.
+    kwargs :
+        Passed on to `lolFem.core.domain.Domain`.
+
+    Returns
+    =======
+    `lolFem.core.domain.Domain`
+    """
+    mesh = read_abaqus_mesh(MESH_FILE)
+    if materials is None:
+        materials = [LinearIsotropic(100e9, 0.45), LinearIsotropic(10e9, 0.3)]
+    if len(materials) == 1:
+        Section(materials[0], thicknesses[0]).assign_to(
+            mesh, mesh.element_sets["All"])
+    else:
+        for material, thickness, name in zip(materials, thicknesses,
+                                             ["circles", "matrix"]):
+            Section(material, thickness).assign_to(mesh,
+                                                   mesh.element_sets[name])
+
+    bcs = [bc_class(value, dof_ids, mesh.node_sets[name])
+           for bc_class, value, dof_ids, name in bcs]
+    return Domain(mesh, bcs, "plane_strain", assembly=assembly, **kwargs)
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.quadrature import GaussPoint
+from lolFem.materials.J2_plasticity import J2Plasticity
+from lolFem.materials.linear_isotropic import LinearIsotropic
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for J2Plasticity."""
+
+    def setUp(self):
+        self.linear = LinearIsotropic(200e9, 0.3)
+        self.material = J2Plasticity(200e6, self.linear,
+                                     H_iso=10e9, H_kin=5e9)
+        self.gausspoints = [GaussPoint(np.zeros(2), 1.0) for i in range(6)]
+        self.state = self.material.create_material_state(self.gausspoints)
+        self.strains = (np.random.RandomState(0).rand(6, 4) - 0.5) * 1e-2
+
+    def test_elastic(self):
+        strains = self.strains * 1e-3
+        stresses = self.material.compute_stresses(strains, self.state)
+        linear_stresses = strains.dot(
+            self.linear.give_stiffness_matrix_plane_strain(None).T)
+        self.assertTrue(np.allclose(stresses, linear_stresses))
+        self.assertTrue(np.all(self.state.temp["delta_gamma"] == 0.0))
+
+        tangents = self.material.compute_tangents(self.state)
+        for tangent in tangents:
+            self.assertTrue(np.allclose(
+                tangent, self.linear.give_stiffness_matrix_plane_strain(None)))
+
+    def test_return_mapping(self):
+        stresses = self.material.compute_stresses(self.strains, self.state)
+        self.assertTrue(np.all(self.state.temp["delta_gamma"] > 0.0))
+        f = self.material.compute_yield_func(stresses,
+                                             self.state.temp["back_stress"],
+                                             self.state.temp["alpha"])
+        self.assertTrue(np.allclose(f / self.material.sig_y, 0.0))
+
+        # The plastic strain is deviatoric.
+        plastic_strain = self.state.temp["plastic_strain"]
+        self.assertTrue(np.allclose(np.sum(plastic_strain[:, 0:3], axis=1),
+                                    0.0))
+
+        # Nothing is stored until the state is committed.
+        self.assertTrue(np.all(self.state.committed["alpha"] == 0.0))
+        self.state.commit()
+        status = self.gausspoints[0].material_status
+        self.assertEqual(status.alpha, self.state.temp["alpha"][0])
+        self.assertTrue(np.array_equal(status.back_stress,
+                                       self.state.temp["back_stress"][0]))
+
+    def test_gauss_point(self):
+        stresses = self.material.compute_stresses(self.strains, self.state)
+        tangents = self.material.compute_tangents(self.state)
+        for strain, stress, tangent, gp in zip(self.strains, stresses,
+                                               tangents, self.gausspoints):
+            self.assertTrue(np.allclose(
+                self.material.compute_stress(strain, gp), stress))
+            self.assertTrue(np.allclose(
+                self.material.give_stiffness_matrix_plane_strain(gp),
+                tangent))
+
+    def test_consistent_tangent(self):
+        # Take a plastic step and commit it so the next step starts
+        # from a state with plastic strain and back stress.
+        self.material.compute_stresses(self.strains, self.state)
+        self.state.commit()
+
+        strains = self.strains * 1.5
+        stresses, tangents = self.material.compute_stresses_and_tangents(
+            strains, self.state)
+
+        h = 1e-9
+        for j in range(4):
+            perturbed = strains.copy()
+            perturbed[:, j] += h
+            perturbed_stresses = self.material.compute_stresses(perturbed,
+                                                                self.state)
+            numerical = (perturbed_stresses - stresses) / h
+            self.assertTrue(np.allclose(numerical, tangents[:, :, j],
+                                        rtol=1e-4, atol=1e-4 * self.linear.G))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.quadrature import GaussPoint
+from lolFem.materials.linear_isotropic import LinearIsotropic
+from lolFem.materials.material import Material
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the batched interface of LinearIsotropic."""
+
+    def setUp(self):
+        self.material = LinearIsotropic(200e9, 0.3)
+        self.gausspoints = [GaussPoint(np.zeros(2), 1.0) for i in range(5)]
+        self.state = self.material.create_material_state(self.gausspoints)
+        self.strains = np.random.RandomState(0).rand(5, 4) * 1e-3
+
+    def test_stresses(self):
+        stresses = self.material.compute_stresses(self.strains, self.state)
+        for strain, stress, gp in zip(self.strains, stresses,
+                                      self.gausspoints):
+            self.assertTrue(np.allclose(
+                stress, self.material.compute_stress(strain, gp)))
+            self.assertTrue(np.allclose(gp.material_status.temp_stress,
+                                        stress))
+
+        # The default implementation loops over the gauss points.
+        default = Material.compute_stresses(self.material, self.strains,
+                                            self.state)
+        self.assertTrue(np.allclose(stresses, default))
+
+    def test_tangents(self):
+        stresses, tangents = self.material.compute_stresses_and_tangents(
+            self.strains, self.state)
+        D = self.material.give_stiffness_matrix_plane_strain(None)
+        self.assertEqual(tangents.shape, (5, 4, 4))
+        for tangent in tangents:
+            self.assertTrue(np.array_equal(tangent, D))
+        self.assertEqual(D[3, 3], self.material.G)
+
+    def test_stiffness_matrix_update(self):
+        D = self.material.give_stiffness_matrix_plane_strain(None).copy()
+        self.assertIs(self.material.give_stiffness_matrix_plane_strain(None),
+                      self.material.give_stiffness_matrix_plane_strain(None))
+        self.material.E *= 2.0
+        self.assertTrue(np.allclose(
+            self.material.give_stiffness_matrix_plane_strain(None)[0:3, 0:3],
+            2.0 * D[0:3, 0:3]))
+
+    def test_abstract(self):
+        class NoElasticStiffness(Material):
+            pass
+
+        self.assertRaises(TypeError, NoElasticStiffness)
+        self.assertTrue(np.array_equal(
+            self.material.give_elastic_stiffness_matrix_plane_strain(),
+            self.material.give_stiffness_matrix_plane_strain(None)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from lolFem.core.quadrature import GaussPoint
+from lolFem.materials.linear_isotropic import (LinearIsotropic,
+                                               LinearIsotropicMaterialStatus)
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the array backed material state."""
+
+    def setUp(self):
+        self.material = LinearIsotropic(200e9, 0.3)
+        self.gausspoints = [GaussPoint(np.zeros(2), 1.0) for i in range(3)]
+        self.state = self.material.create_material_state(self.gausspoints)
+
+    def test_layout(self):
+        self.assertEqual(self.state.fields.keys(), ["stress", "strain"])
+        self.assertEqual(self.state.temp["stress"].shape, (3, 4))
+        self.assertEqual(self.state.give_nbytes(), 4 * 3 * 4 * 8)
+        status = self.gausspoints[1].material_status
+        self.assertTrue(isinstance(status, LinearIsotropicMaterialStatus))
+
+    def test_views_and_commit(self):
+        gp = self.gausspoints[1]
+        strain = np.array([1.0, 2.0, 0.0, 3.0]) * 1e-3
+        stress = self.material.compute_stress(strain, gp)
+        self.assertTrue(np.array_equal(self.state.temp["stress"][1], stress))
+        self.assertTrue(np.array_equal(gp.material_status.temp_strain, strain))
+        self.assertFalse(np.any(gp.material_status.stress))
+
+        self.state.commit()
+        self.assertTrue(np.array_equal(gp.material_status.stress, stress))
+        self.assertTrue(np.array_equal(self.state.committed["strain"][1],
+                                       strain))
+
+        # Committing a single point.
+        gp = self.gausspoints[2]
+        self.material.compute_stress(strain, gp)
+        gp.update()
+        self.assertTrue(np.array_equal(gp.material_status.stress, stress))
+
+    def test_standalone_status(self):
+        status = self.material.create_material_status()
+        status.temp_stress = np.ones(4)
+        status.update()
+        self.assertTrue(np.array_equal(status.stress, np.ones(4)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+import filecmp
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.dof import D_u, D_v
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.core.solvers.newton_raphson import Newton
+from lolFem.materials.linear_isotropic import LinearIsotropic
+from lolFem.visualization.async_writer import AsyncWriter
+
+import helpers
+
+
+class BlockingWriter(object):
+
+    """Writer that waits for an event before each time step."""
+
+    def __init__(self):
+        self.steps = []
+        self.proceed = threading.Event()
+
+    def write(self, time, point_data):
+        self.proceed.wait()
+        if time < 0.0:
+            raise IOError("Disk full")
+        self.steps.append((time, point_data["u"].copy()))
+
+
+def solve(filename, async_output):
+    bcs = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+           (Dirichlet, "0.01*t", [D_v], "y1")]
+    domain = helpers.create_domain(
+        bcs, materials=[LinearIsotropic(100e9, 0.3)], thicknesses=(1.0,))
+    model = NonLinearStatic(Newton(1e-10, 10), domain, [0.0, 0.5, 1.0],
+                            filename, async_output=async_output)
+    model.go()
+    return model
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the asynchronous output."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_queue(self):
+        writer = BlockingWriter()
+        async_writer = AsyncWriter(writer, max_pending=1)
+        for t in [0.0, 1.0]:
+            async_writer.write(t, OrderedDict([("u", np.array([t]))]))
+        # The first step is being written and the second is waiting,
+        # so the queue is full until the writer proceeds.
+        self.assertTrue(async_writer.queue.full())
+        self.assertEqual(writer.steps, [])
+
+        writer.proceed.set()
+        async_writer.flush()
+        self.assertEqual([t for t, _ in writer.steps], [0.0, 1.0])
+        self.assertEqual(writer.steps[1][1].tolist(), [1.0])
+
+        async_writer.write(-1.0, OrderedDict([("u", np.array([0.0]))]))
+        self.assertRaises(IOError, async_writer.flush)
+        async_writer.close()
+        self.assertFalse(async_writer._thread.is_alive())
+
+    def test_model_output(self):
+        sync_name = os.path.join(self.directory, "sync")
+        async_name = os.path.join(self.directory, "async")
+        solve(sync_name, False)
+        model = solve(async_name, True)
+
+        # All steps are written when the analysis returns.
+        self.assertIsNone(model.output_writer)
+        for i in range(3):
+            self.assertTrue(filecmp.cmp("{}_{}.vtu".format(sync_name, i),
+                                        "{}_{}.vtu".format(async_name, i),
+                                        shallow=False))
+        with open(async_name + ".pvd") as f:
+            self.assertEqual(f.read().count("<DataSet"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
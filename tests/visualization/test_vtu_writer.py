@@ -0,0 +1,120 @@
+from collections import OrderedDict
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import zlib
+
+import numpy as np
+
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.dof import D_u, D_v
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.core.solvers.newton_raphson import Newton
+from lolFem.materials.linear_isotropic import LinearIsotropic
+from lolFem.visualization.vtu_writer import (VTUTimeSeriesWriter,
+                                             voigt_to_tensor)
+
+import helpers
+
+DTYPES = {"Float64": np.float64, "Int64": np.int64, "UInt8": np.uint8}
+
+
+def read_vtu(filename):
+    """Reads the arrays in a .vtu file with appended data."""
+    with open(filename, "rb") as f:
+        content = f.read()
+    header, data = content.split("<AppendedData encoding=\"raw\">\n_")
+    compressed = "vtkZLibDataCompressor" in header
+    arrays = {}
+    for attributes in re.findall(r"<DataArray (.*?)/>", header):
+        attributes = dict(re.findall(r"(\w+)=\"(.*?)\"", attributes))
+        offset = int(attributes["offset"])
+        if compressed:
+            n_blocks = int(np.frombuffer(data, np.uint64, 1, offset)[0])
+            sizes = np.frombuffer(data, np.uint64, 3 + n_blocks, offset)[3:]
+            start = offset + 8 * (3 + n_blocks)
+            raw = ""
+            for size in sizes.astype(int):
+                raw += zlib.decompress(data[start:start + size])
+                start += size
+        else:
+            n_bytes = int(np.frombuffer(data, np.uint64, 1, offset)[0])
+            raw = data[offset + 8:offset + 8 + n_bytes]
+        values = np.frombuffer(raw, DTYPES[attributes["type"]])
+        arrays[attributes["Name"]] = values.reshape(
+            -1, int(attributes["NumberOfComponents"]))
+    return arrays
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the .vtu time series writer."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write(self):
+        coordinates = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0],
+                                [0.0, 1.0], [2.0, 0.0]])
+        cells = [(np.array([[0, 1, 2, 3]]), 9),
+                 (np.array([[1, 4, 2]]), 5)]
+        for compress in [False, True]:
+            filename = os.path.join(self.directory, "result")
+            writer = VTUTimeSeriesWriter(filename, coordinates, cells,
+                                         compress)
+            values = []
+            for t in [0.0, 0.5]:
+                value = np.arange(15, dtype=np.float64).reshape(5, 3) + t
+                values.append(value)
+                writer.write(t, OrderedDict([("Displacement", value)]))
+
+            for i, value in enumerate(values):
+                arrays = read_vtu("{}_{}.vtu".format(filename, i))
+                self.assertTrue(np.array_equal(arrays["Points"][:, 0:2],
+                                               coordinates))
+                self.assertEqual(arrays["connectivity"].ravel().tolist(),
+                                 [0, 1, 2, 3, 1, 4, 2])
+                self.assertEqual(arrays["offsets"].ravel().tolist(), [4, 7])
+                self.assertEqual(arrays["types"].ravel().tolist(), [9, 5])
+                self.assertTrue(np.array_equal(arrays["Displacement"],
+                                               value))
+
+            with open(filename + ".pvd") as f:
+                collection = f.read()
+            self.assertEqual(re.findall(r"file=\"(.*?)\"", collection),
+                             ["result_0.vtu", "result_1.vtu"])
+            self.assertEqual(re.findall(r"timestep=\"(.*?)\"", collection),
+                             ["0.0", "0.5"])
+
+    def test_voigt_to_tensor(self):
+        tensors = voigt_to_tensor(np.array([[1.0, 2.0, 3.0, 4.0]]))
+        self.assertEqual(tensors.tolist(),
+                         [[1.0, 4.0, 0.0, 4.0, 2.0, 0.0, 0.0, 0.0, 3.0]])
+
+    def test_model_output(self):
+        bcs = [(Dirichlet, 0.0, [D_u, D_v], "y0"),
+               (Dirichlet, "0.01*t", [D_v], "y1")]
+        domain = helpers.create_domain(
+            bcs, materials=[LinearIsotropic(100e9, 0.3)], thicknesses=(1.0,))
+        mesh = domain.mesh
+        filename = os.path.join(self.directory, "square")
+        NonLinearStatic(Newton(1e-10, 10), domain, [0.0, 1.0], filename,
+                        compress_output=True).go()
+
+        arrays = read_vtu(filename + "_1.vtu")
+        self.assertEqual(len(arrays["Points"]), len(mesh.nodes))
+        self.assertEqual(len(arrays["types"]), len(mesh.elements))
+        self.assertTrue(np.array_equal(arrays["Displacement"][:, 0:2],
+                                       domain.give_displacements()))
+        self.assertTrue(np.array_equal(
+            arrays["Stress"], voigt_to_tensor(domain.nodal_stress)))
+        self.assertTrue(os.path.exists(filename + ".pvd"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+from collections import OrderedDict
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from lolFem.core.models.model import OutputFormatError
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.visualization.xdmf_writer import XDMFTimeSeriesWriter
+
+MESH_DIR = os.path.join(os.path.dirname(__file__), "..", "..",
+                        "examples", "meshes")
+
+DTYPES = {("Float", "8"): np.float64, ("Int", "4"): np.int32}
+
+RUN_MODEL = """
+import sys
+from lolFem.core.boundary_conditions.dirichlet import Dirichlet
+from lolFem.core.read_abaqus_mesh import read_abaqus_mesh
+from lolFem.core.domain import Domain
+from lolFem.core.section import Section
+from lolFem.core.dof import D_u, D_v
+from lolFem.core.models.non_linear_static import NonLinearStatic
+from lolFem.core.solvers.newton_raphson import Newton
+from lolFem.materials.linear_isotropic import LinearIsotropic
+
+mesh = read_abaqus_mesh(sys.argv[1])
+Section(LinearIsotropic(100e9, 0.3), 1.0).assign_to(
+    mesh, mesh.element_sets["All"])
+bcs = [Dirichlet(0.0, [D_u, D_v], mesh.node_sets["y0"]),
+       Dirichlet("0.01*t", [D_v], mesh.node_sets["y1"])]
+domain = Domain(mesh, bcs, "plane_strain", assembly="batched")
+model = NonLinearStatic(Newton(1e-10, 10), domain, [0.0, 0.5, 1.0],
+                        sys.argv[2], output_format=sys.argv[3])
+model.go()
+model.export_to_vtk(sys.argv[2] + "_final")
+assert "vtk" not in sys.modules
+"""
+
+
+def read_data_item(item, directory):
+    """Reads the values of a binary data item."""
+    dtype = DTYPES[item.get("NumberType"), item.get("Precision")]
+    shape = [int(n) for n in item.get("Dimensions").split()]
+    with open(os.path.join(directory, item.text), "rb") as f:
+        f.seek(int(item.get("Seek")))
+        return np.fromfile(f, dtype, int(np.prod(shape))).reshape(shape)
+
+
+class Test(unittest.TestCase):
+
+    """Unit tests for the XDMF time series writer."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write(self):
+        coordinates = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0],
+                                [0.0, 1.0], [2.0, 0.0]])
+        cells = [(np.array([[0, 1, 2, 3]]), 9),
+                 (np.array([[1, 4, 2]]), 5)]
+        filename = os.path.join(self.directory, "result")
+        writer = XDMFTimeSeriesWriter(filename, coordinates, cells)
+        values = []
+        for t in [0.0, 0.5]:
+            value = np.arange(15, dtype=np.float64).reshape(5, 3) + t
+            values.append(value)
+            writer.write(t, OrderedDict([("Displacement", value),
+                                         ("Stress", np.ones((5, 9)))]))
+
+        root = ET.parse(filename + ".xdmf").getroot()
+        grids = root.findall("Domain/Grid/Grid")
+        self.assertEqual([grid.find("Time").get("Value") for grid in grids],
+                         ["0.0", "0.5"])
+        for grid, value in zip(grids, values):
+            topology = read_data_item(grid.find("Topology/DataItem"),
+                                      self.directory)
+            self.assertEqual(topology.tolist(), [5, 0, 1, 2, 3, 4, 1, 4, 2])
+            self.assertEqual(grid.find("Topology").get("NumberOfElements"),
+                             "2")
+            points = read_data_item(grid.find("Geometry/DataItem"),
+                                    self.directory)
+            self.assertTrue(np.array_equal(points[:, 0:2], coordinates))
+
+            attributes = grid.findall("Attribute")
+            self.assertEqual([a.get("AttributeType") for a in attributes],
+                             ["Vector", "Tensor"])
+            self.assertTrue(np.array_equal(
+                read_data_item(attributes[0].find("DataItem"),
+                               self.directory), value))
+
+    def test_model_output_without_vtk(self):
+        filename = os.path.join(self.directory, "square")
+        mesh_filename = os.path.join(MESH_DIR, "square_with_circles.inp")
+        root = os.path.join(os.path.dirname(__file__), "..", "..")
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(root),
+                   MPLBACKEND="Agg")
+        for output_format in ["xdmf", "vtu"]:
+            subprocess.check_call([sys.executable, "-c", RUN_MODEL,
+                                   mesh_filename, filename, output_format],
+                                  env=env, stdout=open(os.devnull, "w"))
+        self.assertTrue(os.path.exists(filename + ".xdmf"))
+        self.assertTrue(os.path.exists(filename + "_2.bin"))
+        self.assertTrue(os.path.exists(filename + ".pvd"))
+        self.assertTrue(os.path.exists(filename + "_2.vtu"))
+        self.assertTrue(os.path.exists(filename + "_final.vtu"))
+
+    def test_unknown_format(self):
+        self.assertRaises(OutputFormatError, NonLinearStatic, None, None,
+                          [0.0], "result", output_format="vtk")
+        self.assertRaises(OutputFormatError, NonLinearStatic, None, None,
+                          [0.0], "result", compress_output=True,
+                          output_format="xdmf")
+
+
+if __name__ == "__main__":
+    unittest.main()